@@ -1,6 +1,282 @@
+"""
+Usage: python -m app [--host HOST] [--port PORT] [--workers N] [--no-preload]
+                     [--report-after SECONDS]
+
+Serves the API from N uvicorn workers forked from this process. The OCR
+readers (and the OCR and app modules) are loaded here once, before
+forking, so every worker and every OCR pool process forked from a worker
+shares the model weights copy-on-write instead of loading its own copy.
+gc.freeze() keeps the collector from touching, and so copying, the
+preloaded objects' pages.
+
+Memory is reported for this process after the preload and for every
+worker, with its OCR pool processes, once they have served for
+--report-after seconds: RSS counts the shared pages in full in each
+process, PSS splits them between the processes sharing them, so the PSS
+total is what the workers really use.
+
+A worker that dies is restarted after a delay that doubles with each
+worker that dies within RAPID_EXIT_SECONDS of starting; after
+MAX_RAPID_EXITS of those in a row the server stops instead.
+"""
+
+import argparse
+import gc
 import os
+import signal
 import sys
+import time
+import traceback
 
 parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 if parent_dir not in sys.path:
     sys.path.insert(0, parent_dir)
+
+# A worker exiting this soon after it started counts as a failed start
+RAPID_EXIT_SECONDS = 30
+MAX_RAPID_EXITS = 5
+MAX_RESTART_DELAY = 30
+
+
+def process_memory(pid):
+    """RSS, PSS, shared and private memory of a process in kB (Linux only), or None"""
+    fields = {
+        "Rss": "rss",
+        "Pss": "pss",
+        "Shared_Clean": "shared",
+        "Shared_Dirty": "shared",
+        "Private_Clean": "private",
+        "Private_Dirty": "private",
+    }
+    memory = {"rss": 0, "pss": 0, "shared": 0, "private": 0}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    memory[fields[name]] += int(value.split()[0])
+    except OSError:
+        return None
+    return memory
+
+
+def child_pids(pid):
+    """Direct children of a process, such as a worker's OCR pool (Linux only)"""
+    children = []
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return children
+    for task in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return sorted(children)
+
+
+def print_memory(title, pids, include_children=False):
+    print(f"\n📊 {title}")
+    print(
+        f"{'pid':>8} {'RSS MB':>9} {'PSS MB':>9} {'shared MB':>10} {'private MB':>11}"
+    )
+    rows = []
+    for pid in pids:
+        rows.append((f"{pid}", pid))
+        if include_children:
+            # OCR pool processes, listed under the worker that forked them
+            rows.extend((f"└ {child}", child) for child in child_pids(pid))
+
+    totals = {"rss": 0, "pss": 0}
+    for label, pid in rows:
+        memory = process_memory(pid)
+        if memory is None:
+            print(f"{label:>8}  (memory not available on this platform)")
+            continue
+        totals["rss"] += memory["rss"]
+        totals["pss"] += memory["pss"]
+        print(
+            f"{label:>8} {memory['rss'] / 1024:>9.1f} {memory['pss'] / 1024:>9.1f} "
+            f"{memory['shared'] / 1024:>10.1f} {memory['private'] / 1024:>11.1f}"
+        )
+    if len(rows) > 1:
+        print(f"{'total':>8} {totals['rss'] / 1024:>9.1f} {totals['pss'] / 1024:>9.1f}")
+
+
+def preload_ocr():
+    """Load the OCR readers and modules so forked workers inherit them"""
+    from app.services.ocr.engine import ocr_engine
+    from app.services.ocr.reader_registry import parse_language_sets, reader_registry
+    from app.utils.config import settings
+
+    import app.services.ocr.documents  # noqa: F401
+
+    started = time.perf_counter()
+    reader_registry.warm_up(parse_language_sets(settings.OCR_PRELOAD_LANGUAGES))
+    print(
+        f"✅ OCR readers loaded in {time.perf_counter() - started:.1f}s: "
+        f"{', '.join(reader_registry.status()['loaded']) or 'none'}"
+    )
+    # OCR pool processes must fork from their worker to inherit the readers;
+    # spawned ones would load their own copy
+    ocr_engine.start_method = "fork"
+
+
+def set_torch_threads(workers):
+    """Split the cores between the workers for OCR run on their own thread"""
+    from app.utils.config import settings
+
+    try:
+        import torch
+    except ImportError:
+        return
+    cpu_count = os.cpu_count() or 1
+    torch.set_num_threads(settings.OCR_TORCH_THREADS or max(1, cpu_count // workers))
+
+
+def run_worker(config, sock, workers):
+    import uvicorn
+
+    set_torch_threads(workers)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve(host, port, workers, preload, report_after):
+    import uvicorn
+
+    if preload:
+        preload_ocr()
+
+    # Import the app here too so its modules are shared as well
+    import app.main  # noqa: F401
+
+    config = uvicorn.Config("app.main:app", host=host, port=port)
+    sock = config.bind_socket()
+
+    # Objects that exist now are never collected in the workers, so the
+    # collector does not write to (and copy) the pages they sit on
+    gc.collect()
+    gc.freeze()
+    print_memory(
+        "Parent after preload (each worker would hold this alone)", [os.getpid()]
+    )
+
+    # pid -> when the worker started
+    children = {}
+    # When each replacement for a dead worker is due
+    restarts = []
+    rapid_exits = 0
+    stopping = failed = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            code = 1
+            try:
+                run_worker(config, sock, workers)
+                code = 0
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                os._exit(code)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+
+    print(f"🚀 Serving on http://{host}:{port} with {workers} forked workers")
+    for _ in range(workers):
+        spawn()
+
+    report_at = time.monotonic() + report_after
+    while children or (restarts and not stopping):
+        now = time.monotonic()
+        while restarts and restarts[0] <= now and not stopping:
+            restarts.pop(0)
+            spawn()
+
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            children.clear()
+            pid = 0
+        if pid:
+            started = children.pop(pid, now)
+            if stopping:
+                continue
+            if now - started < RAPID_EXIT_SECONDS:
+                rapid_exits += 1
+            else:
+                rapid_exits = 0
+            if rapid_exits >= MAX_RAPID_EXITS:
+                print(
+                    f"❌ {rapid_exits} workers in a row exited within "
+                    f"{RAPID_EXIT_SECONDS}s of starting, giving up"
+                )
+                stop(None, None)
+                failed = True
+                continue
+            delay = min(MAX_RESTART_DELAY, 2**rapid_exits) if rapid_exits else 0
+            print(f"❌ Worker {pid} exited ({status}), starting another in {delay}s")
+            restarts.append(now + delay)
+            restarts.sort()
+            continue
+
+        if report_at and now >= report_at and children:
+            print_memory("Workers after forking", sorted(children), True)
+            report_at = None
+        time.sleep(0.5)
+
+    sock.close()
+    if failed:
+        sys.exit(1)
+    print("✅ Server stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve the API from workers forked after preloading OCR"
+    )
+    # Every interface, like the uvicorn command in the container setup
+    parser.add_argument("--host", default="0.0.0.0")  # nosec B104
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument(
+        "--no-preload",
+        dest="preload",
+        action="store_false",
+        help="fork without loading the OCR readers first",
+    )
+    parser.add_argument(
+        "--report-after",
+        type=float,
+        default=10,
+        help="seconds after forking to report worker memory",
+    )
+    args = parser.parse_args()
+
+    try:
+        serve(
+            args.host, args.port, max(1, args.workers), args.preload, args.report_after
+        )
+    except Exception as e:
+        print(f"\n❌ Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Add ocr jobs table
+
+Revision ID: 4f7d2b9c1e03
+Revises: c8a0f5a1783e
+Create Date: 2026-10-18 10:12:41.305127
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "4f7d2b9c1e03"
+down_revision: Union[str, None] = "c8a0f5a1783e"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ocr_jobs",
+        sa.Column("id", sa.UUID(), nullable=False),
+        sa.Column(
+            "document_type",
+            sa.Enum(
+                "nicop_front",
+                "nicop_back",
+                "passport_front",
+                "iqama_front",
+                name="ocr_document_type_enum",
+            ),
+            nullable=False,
+        ),
+        sa.Column(
+            "status",
+            sa.Enum(
+                "pending",
+                "processing",
+                "completed",
+                "failed",
+                name="ocr_job_status_enum",
+            ),
+            nullable=False,
+        ),
+        sa.Column("file_name", sa.String(length=255), nullable=True),
+        sa.Column("image", sa.LargeBinary(), nullable=True),
+        sa.Column("result", postgresql.JSONB(astext_type=sa.Text()), nullable=True),
+        sa.Column("error", sa.String(length=1000), nullable=True),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("worker_id", sa.String(length=100), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_ocr_jobs_status"), "ocr_jobs", ["status"], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_ocr_jobs_status"), table_name="ocr_jobs")
+    op.drop_table("ocr_jobs")
+    sa.Enum(name="ocr_job_status_enum").drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name="ocr_document_type_enum").drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,32 @@
+"""Add available_at to ocr jobs
+
+Revision ID: 7c3e9a1d5b20
+Revises: 4f7d2b9c1e03
+Create Date: 2026-10-18 16:40:12.518903
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3e9a1d5b20"
+down_revision: Union[str, None] = "4f7d2b9c1e03"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "ocr_jobs",
+        sa.Column("available_at", sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("ocr_jobs", "available_at")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Usage: python -m app.commands.import_time_report [MODULE ...] [--top N]
+
+Imports each module (default: app.main and the OCR pipeline) in a fresh
+interpreter under python -X importtime and reports what it cost: total
+import time, peak RSS, which heavy OCR dependencies got loaded, and the
+top-level packages and single modules that took longest. Use it to check
+that the API, migrations and create_admin do not load torch/easyocr/cv2.
+"""
+
+import argparse
+import json
+import os
+import subprocess  # nosec B404 - only runs this interpreter, see measure()
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+DEFAULT_MODULES = ["app.main", "app.services.ocr.documents"]
+
+# Dependencies only OCR work should pay for
+HEAVY_MODULES = ["torch", "easyocr", "cv2", "rapidfuzz", "bidi", "numpy"]
+
+# Run in the child after the import, so its report follows the importtime log
+PROBE = """
+import json, resource, sys
+import {module}
+print(json.dumps({{
+    "max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+    "modules": len(sys.modules),
+}}))
+"""
+
+
+def parse_importtime(log):
+    """(depth, module, self_us, cumulative_us) for every line of -X importtime output"""
+    entries = []
+    for line in log.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, name.strip(), int(self_us), int(cumulative_us)))
+    return entries
+
+
+def measure(module):
+    # Fixed argv (this interpreter, no shell); module is a dotted import path
+    completed = subprocess.run(  # nosec B603
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            PROBE.format(module=module, heavy=HEAVY_MODULES),
+        ],
+        cwd=project_root,
+        env={**os.environ, "PYTHONPATH": str(project_root)},
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"import {module} failed: {error[0]}")
+    return json.loads(completed.stdout.strip().splitlines()[-1]), parse_importtime(
+        completed.stderr
+    )
+
+
+def top_level_costs(entries):
+    """Cumulative import time per top-level package, from the outermost imports"""
+    costs = defaultdict(int)
+    for depth, name, _, cumulative_us in entries:
+        # Imports are logged innermost first; the outermost ones (depth 1,
+        # under the probe) already include everything they pulled in
+        if depth == 1:
+            costs[name.partition(".")[0]] += cumulative_us
+    return sorted(costs.items(), key=lambda item: item[1], reverse=True)
+
+
+def report(module, top):
+    probe, entries = measure(module)
+    total_us = sum(cumulative for depth, _, _, cumulative in entries if depth == 1)
+
+    print(f"\n📦 {module}")
+    print("-" * 60)
+    print(f"import time   {total_us / 1000:>10.1f} ms")
+    print(f"peak RSS      {probe['max_rss_kb'] / 1024:>10.1f} MB")
+    print(f"modules       {probe['modules']:>10}")
+    print(f"heavy loaded  {', '.join(probe['loaded']) or 'none'}")
+
+    print(f"\n{'top-level package':<40} {'cumulative ms':>14}")
+    for name, cumulative_us in top_level_costs(entries)[:top]:
+        print(f"{name:<40} {cumulative_us / 1000:>14.1f}")
+
+    print(f"\n{'module':<40} {'self ms':>14}")
+    slowest = sorted(entries, key=lambda entry: entry[2], reverse=True)[:top]
+    for _, name, self_us, _ in slowest:
+        print(f"{name:<40} {self_us / 1000:>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report per-module import cost")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=10, help="rows per table")
+    args = parser.parse_args()
+
+    print("🚀 Import-time report")
+    print("=" * 60)
+    failed = False
+    for module in args.modules:
+        try:
+            report(module, args.top)
+        except RuntimeError as e:
+            print(f"\n❌ {e}")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+Usage: python -m app.commands.ocr_benchmark [--count N] [--types TYPE ...]
+           [--difficulty easy|medium|hard] [--seed S] [--dir DIR]
+           [--json PATH] [--verbose]
+
+End-to-end OCR benchmark on synthetic documents with known fields. Each
+document runs through run_document_ocr (quality gate, orientation, then
+process_nicop_front_improved, process_nicop_back_improved,
+process_passport_front or process_iqama_front) and the report gives:
+
+- latency percentiles per document type, and per pipeline stage (time
+  spent in the stage itself, not in the stages it calls, so the stages of
+  a document add up to its total)
+- the process's peak memory after loading the models and after the run
+- field-level accuracy against the rendered ground truth
+
+Documents are rendered in memory by app.commands.ocr_synthetic_documents
+(same --seed, same documents) or read from a directory it wrote (--dir).
+Models are never downloaded: the EasyOCR weights must already be in
+OCR_MODEL_DIR or ~/.EasyOCR. --json saves the report, so runs before and
+after a preprocessing or model change can be compared.
+"""
+
+import argparse
+import json
+import resource
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+# (stage, module in app.services.ocr, function); a stage's time excludes
+# the other stages it calls, and the rest of run_document_ocr counts as
+# "other"
+STAGES = [
+    ("decode", "Cleaning_OCR", "load_image"),
+    ("quality", "quality", "check_image_quality"),
+    ("orientation", "orientation", "normalize_orientation"),
+    ("layout", "layout", "read_layout_fields"),
+    ("mrz", "mrz", "read_passport_mrz"),
+    ("preprocess", "Cleaning_OCR", "preprocess_image_enhanced"),
+    ("detect", "Cleaning_OCR", "detect_text_regions"),
+    ("recognize", "Cleaning_OCR", "recognize_regions"),
+    ("fields", "nicop_service", "extract_nicop_fields_improved"),
+    ("fields", "nicop_service", "extract_nicop_back_fields"),
+    ("fields", "passport_service", "extract_passport_fields"),
+    ("fields", "iqama_service", "extract_iqama_fields"),
+]
+
+
+class StageTimer:
+    """Self time per stage for the document being OCR'd"""
+
+    def __init__(self):
+        self.document = Counter()
+        self._stack = []
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            self._stack.append(0.0)
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                nested = self._stack.pop()
+                self.document[stage] += elapsed - nested
+                if self._stack:
+                    self._stack[-1] += elapsed
+
+        return timed
+
+    def install(self):
+        """Replace every reference to a stage function in the OCR modules"""
+        for stage, module_name, function_name in STAGES:
+            module = sys.modules[f"app.services.ocr.{module_name}"]
+            original = getattr(module, function_name)
+            timed = self.wrap(stage, original)
+            for name, loaded in list(sys.modules.items()):
+                if not name.startswith("app.services.ocr.") or loaded is None:
+                    continue
+                for attribute, value in list(vars(loaded).items()):
+                    if value is original:
+                        setattr(loaded, attribute, timed)
+
+    def start(self):
+        self.document = Counter()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def normalize_value(value):
+    return " ".join(str(value).upper().split()) if value is not None else None
+
+
+def load_documents(directory):
+    """(name, document type, image bytes, truth) for each document in directory"""
+    for path in sorted(Path(directory).glob("*.json")):
+        image = path.with_suffix(".jpg")
+        if not image.exists():
+            continue
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        yield path.stem, data["document_type"], image.read_bytes(), data["truth"]
+
+
+def run_benchmark(documents, verbose=False):
+    from app.services.ocr.documents import run_document_ocr
+    from app.services.ocr.errors import ImageQualityError
+    from app.services.ocr.iqama_service import IQAMA_LANGUAGES
+    from app.services.ocr.metrics import ocr_metrics
+    from app.services.ocr.reader_registry import reader_registry
+
+    # Offline: a reader whose weights are missing fails instead of downloading
+    reader_registry.download_enabled = False
+    started = time.perf_counter()
+    reader_registry.warm_up([("en",), IQAMA_LANGUAGES])
+    errors = reader_registry.status()["errors"]
+    if errors:
+        for languages, error in errors.items():
+            print(f"❌ Could not load the {languages} reader: {error}")
+        return None
+    load_seconds = time.perf_counter() - started
+    rss_loaded = peak_rss_mb()
+
+    timer = StageTimer()
+    timer.install()
+    # Whatever the document spends outside the named stages
+    run_document_ocr = timer.wrap("other", run_document_ocr)
+
+    totals = defaultdict(list)
+    stages = defaultdict(lambda: defaultdict(list))
+    fields_ok = defaultdict(Counter)
+    fields_total = defaultdict(Counter)
+    rejected = Counter()
+    failed = Counter()
+
+    with ocr_metrics.capture() as counters:
+        for name, document_type, content, truth in documents:
+            timer.start()
+            started = time.perf_counter()
+            try:
+                result = run_document_ocr(document_type, content) or {}
+            except ImageQualityError as e:
+                rejected[document_type] += 1
+                result = {}
+                if verbose:
+                    print(f"  {name}: rejected ({e.reason})")
+            except Exception as e:
+                failed[document_type] += 1
+                result = {}
+                print(f"  {name}: ❌ {e}")
+            totals[document_type].append(time.perf_counter() - started)
+            for stage, seconds in timer.document.items():
+                stages[document_type][stage].append(seconds)
+
+            for field, expected in truth.items():
+                fields_total[document_type][field] += 1
+                actual = result.get(field)
+                if normalize_value(actual) == normalize_value(expected):
+                    fields_ok[document_type][field] += 1
+                elif verbose:
+                    print(f"  {name} {field}: expected {expected!r}, got {actual!r}")
+
+    report = {
+        "model_load_seconds": round(load_seconds, 3),
+        "peak_rss_mb": {
+            "models_loaded": round(rss_loaded, 1),
+            "after_run": round(peak_rss_mb(), 1),
+        },
+        "documents": {},
+        "counters": dict(sorted(counters.items())),
+    }
+    for document_type, seconds in totals.items():
+        ok, total = fields_ok[document_type], fields_total[document_type]
+        report["documents"][document_type] = {
+            "count": len(seconds),
+            "rejected": rejected[document_type],
+            "failed": failed[document_type],
+            "latency_ms": latency_summary(seconds),
+            "stages_ms": {
+                stage: latency_summary(values + [0.0] * (len(seconds) - len(values)))
+                for stage, values in stages[document_type].items()
+            },
+            "accuracy": sum(ok.values()) / max(1, sum(total.values())),
+            "fields": {field: ok[field] / total[field] for field in total},
+        }
+    return report
+
+
+def latency_summary(seconds):
+    return {
+        "p50": round(percentile(seconds, 0.50) * 1000, 1),
+        "p90": round(percentile(seconds, 0.90) * 1000, 1),
+        "p99": round(percentile(seconds, 0.99) * 1000, 1),
+        "mean": round(sum(seconds) / len(seconds) * 1000, 1),
+    }
+
+
+def print_report(report):
+    print(
+        f"\n{'document':<16} {'docs':>5} {'rejected':>9} {'p50 ms':>9} "
+        f"{'p90 ms':>9} {'p99 ms':>9} {'fields ok':>10}"
+    )
+    print("-" * 72)
+    for document_type, summary in sorted(report["documents"].items()):
+        latency = summary["latency_ms"]
+        print(
+            f"{document_type:<16} {summary['count']:>5} {summary['rejected']:>9} "
+            f"{latency['p50']:>9.1f} {latency['p90']:>9.1f} {latency['p99']:>9.1f} "
+            f"{summary['accuracy']:>10.1%}"
+        )
+
+    stage_names = list(dict.fromkeys(stage for stage, _, _ in STAGES)) + ["other"]
+    print("\n📊 Stage latency, p50 / p90 ms")
+    print(f"{'document':<16} " + " ".join(f"{stage:>11}" for stage in stage_names))
+    print("-" * (17 + 12 * len(stage_names)))
+    for document_type, summary in sorted(report["documents"].items()):
+        cells = []
+        for stage in stage_names:
+            latency = summary["stages_ms"].get(stage)
+            cell = f"{latency['p50']:.0f}/{latency['p90']:.0f}" if latency else "-"
+            cells.append(f"{cell:>11}")
+        print(f"{document_type:<16} " + " ".join(cells))
+
+    print("\n📊 Field accuracy")
+    for document_type, summary in sorted(report["documents"].items()):
+        fields = ", ".join(
+            f"{field} {score:.0%}" for field, score in summary["fields"].items()
+        )
+        print(f"  {document_type}: {fields}")
+
+    memory = report["peak_rss_mb"]
+    print(
+        f"\n📦 Peak RSS: {memory['models_loaded']:.0f} MB with models loaded "
+        f"({report['model_load_seconds']:.1f}s), {memory['after_run']:.0f} MB after the run"
+    )
+    if report["counters"]:
+        print(
+            "📦 Counters: "
+            + ", ".join(f"{k}={v}" for k, v in report["counters"].items())
+        )
+
+
+def main():
+    from app.commands.ocr_synthetic_documents import (
+        DIFFICULTIES,
+        DOCUMENT_TYPES,
+        generate_documents,
+    )
+
+    parser = argparse.ArgumentParser(description="Benchmark OCR on synthetic documents")
+    parser.add_argument("--count", type=int, default=10, help="documents per type")
+    parser.add_argument(
+        "--types", nargs="+", choices=DOCUMENT_TYPES, default=DOCUMENT_TYPES
+    )
+    parser.add_argument("--difficulty", choices=list(DIFFICULTIES), default="medium")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--dir", help="benchmark documents written by ocr_synthetic_documents"
+    )
+    parser.add_argument("--json", help="also write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="list every wrong field")
+    args = parser.parse_args()
+
+    print("🚀 OCR benchmark")
+    print("=" * 72)
+    if args.dir:
+        documents = [
+            document
+            for document in load_documents(args.dir)
+            if document[1] in args.types
+        ]
+    else:
+        documents = list(
+            generate_documents(
+                args.types, max(1, args.count), args.difficulty, args.seed
+            )
+        )
+    if not documents:
+        print("❌ No documents to benchmark")
+        sys.exit(1)
+    print(f"{len(documents)} documents, peak RSS {peak_rss_mb():.0f} MB before OCR")
+
+    try:
+        report = run_benchmark(documents, args.verbose)
+    except Exception as e:
+        print(f"\n❌ Unexpected error: {e}")
+        sys.exit(1)
+    if report is None:
+        sys.exit(1)
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Usage: python -m app.commands.ocr_fields_benchmark [--repeat N] [--tokens N] [--dates]
+
+Times field extraction alone, on synthetic OCR tokens laid out like each
+document, so the extractors can be measured without loading a model.
+--tokens pads every document with extra noise tokens, as a crowded photo
+would produce. --dates instead compares the shared date parser with the
+strptime format loop it replaced.
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def token(x, y, text, confidence=0.9):
+    width, height = 14 * len(text), 30
+    bbox = [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+    return (bbox, text, confidence)
+
+
+def nicop_front_tokens():
+    return [
+        token(40, 10, "ISLAMIC REPUBLIC OF PAKISTAN"),
+        token(40, 100, "Name"),
+        token(40, 140, "Muhammad Ali Khan"),
+        token(40, 200, "Father Name"),
+        token(40, 240, "Ahmed Khan"),
+        token(40, 300, "Gender"),
+        token(200, 300, "Country of Stay"),
+        token(40, 340, "M"),
+        token(200, 340, "Saudi Arabia"),
+        token(40, 400, "Identity Number"),
+        token(400, 400, "Date of Birth"),
+        token(40, 440, "35202-1234567-1"),
+        token(400, 440, "14.08.1985"),
+        token(40, 500, "Date of Issue"),
+        token(400, 500, "Date of Expiry"),
+        token(40, 540, "01.02.2020"),
+        token(400, 540, "01.02.2030"),
+    ]
+
+
+def nicop_back_tokens():
+    return [
+        token(10, 10, "35202-1234567-1"),
+        token(10, 40, "Present Address: House 12, Street 4,"),
+        token(10, 70, "Al Olaya Riyadh Saudi Arabia"),
+        token(10, 100, "Permanent Address: H.No. 5 Gulberg III Lahore"),
+        token(10, 130, "The holder of this card is entitled"),
+    ]
+
+
+def passport_tokens():
+    lines = [
+        "ISLAMIC REPUBLIC OF PAKISTAN",
+        "P",
+        "AB1234567",
+        "Surname",
+        "KHAN",
+        "Given Names",
+        "MUHAMMAD ALI",
+        "35202-1234567-1",
+        "M",
+        "Date of Birth",
+        "14 AUG 1985",
+        "Place of Birth",
+        "LAHORE, PAK",
+        "Father Name",
+        "KHAN, AHMED",
+        "Date of Issue",
+        "01 FEB 2020",
+        "Date of Expiry",
+        "31 JAN 2030",
+        "12345678901",
+        "P<PAKKHAN<<MUHAMMAD<ALI<<<<<<<<<<<<<<<<<<<<<",
+    ]
+    return [token(10, 10 + 30 * i, text) for i, text in enumerate(lines)]
+
+
+def iqama_tokens():
+    return [
+        token(10, 10, "المملكة العربية السعودية", 0.8),
+        token(10, 50, "رقم الهوية ٢٣٤٥٦٧٨٩٠١", 0.7),
+    ]
+
+
+def with_noise(tokens, count):
+    noise = [
+        token(600 + (i % 7) * 40, 20 * i, f"noise {i} xq", 0.5) for i in range(count)
+    ]
+    return tokens + noise
+
+
+def run_benchmark(repeat, extra_tokens):
+    from app.services.ocr.iqama_service import extract_iqama_fields
+    from app.services.ocr.nicop_service import (
+        extract_nicop_back_fields,
+        extract_nicop_fields_improved,
+    )
+    from app.services.ocr.passport_service import extract_passport_fields
+
+    documents = [
+        ("nicop_front", extract_nicop_fields_improved, nicop_front_tokens()),
+        ("nicop_back", extract_nicop_back_fields, nicop_back_tokens()),
+        ("passport", extract_passport_fields, passport_tokens()),
+        ("iqama", extract_iqama_fields, iqama_tokens()),
+    ]
+
+    print(f"{'document':<12} {'tokens':>7} {'median us':>10} {'max us':>10} found")
+    print("-" * 52)
+    for name, extract, tokens in documents:
+        tokens = with_noise(tokens, extra_tokens)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fields = extract(tokens)
+            timings.append((time.perf_counter() - started) * 1_000_000)
+        found = sum(1 for value in fields.values() if value and value != "Not Found")
+        print(
+            f"{name:<12} {len(tokens):>7} {statistics.median(timings):>10.1f} "
+            f"{max(timings):>10.1f} {found}/{len(fields)}"
+        )
+
+
+DATE_SAMPLES = [
+    "14.08.1985",
+    "14/08/1985",
+    "14-08-1985",
+    "14081985",
+    "I4.O8.I985",
+    "14 AUG 1985",
+    "14 August 1985",
+    "31.02.2020",
+    "12.25.2020",
+    "Date of Birth",
+]
+
+LEGACY_DATE_FORMATS = [
+    "%d %b %Y",
+    "%d %B %Y",
+    "%d %b %y",
+    "%d %B %y",
+    "%d/%m/%Y",
+    "%d-%m-%Y",
+    "%d.%m.%Y",
+    "%m/%d/%Y",
+    "%m-%d-%Y",
+]
+
+
+def legacy_parse_date(text):
+    from datetime import datetime
+
+    for fmt in LEGACY_DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def run_date_benchmark(repeat):
+    from app.services.ocr.dates import parse_ocr_date
+
+    print(f"{'parser':<10} {'us/date':>8} parsed")
+    print("-" * 26)
+    for name, parse in (("strptime", legacy_parse_date), ("table", parse_ocr_date)):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            parsed = [parse(text) for text in DATE_SAMPLES]
+        elapsed = time.perf_counter() - started
+        per_date = elapsed / (repeat * len(DATE_SAMPLES)) * 1_000_000
+        found = sum(1 for value in parsed if value)
+        print(f"{name:<10} {per_date:>8.2f} {found}/{len(DATE_SAMPLES)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark OCR field extraction")
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument(
+        "--tokens", type=int, default=0, help="extra noise tokens per document"
+    )
+    parser.add_argument(
+        "--dates", action="store_true", help="benchmark the date parser instead"
+    )
+    args = parser.parse_args()
+
+    print("🚀 OCR field extraction benchmark")
+    print("=" * 52)
+    if args.dates:
+        run_date_benchmark(args.repeat)
+    else:
+        run_benchmark(args.repeat, args.tokens)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Usage: python -m app.commands.ocr_replay record --type TYPE --out DIR IMAGE ...
+       python -m app.commands.ocr_replay replay FIXTURE_OR_DIR ... [--repeat N]
+                                                [--update] [--verbose]
+
+record OCRs the images once (full-image OCR, fast paths off) and saves
+their raw (bbox, text, confidence) tokens as fixtures in DIR; setting
+OCR_RECORD_DIR does the same for live traffic.
+
+replay runs the fixtures' tokens through the document field extractors
+without loading any model, and reports extraction latency per document
+type and field accuracy against each fixture's "expected" fields (the
+fields extracted when it was recorded, or corrected by hand). --update
+stores the current output as the new expected fields.
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def record(document_type, out, images):
+    from app.services.ocr.documents import run_document_ocr
+    from app.services.ocr.errors import ImageQualityError
+    from app.utils.config import settings
+
+    # Only full-image OCR produces the tokens the field extractors read
+    settings.OCR_RECORD_DIR = out
+    settings.OCR_LAYOUT_TEMPLATES = False
+    settings.OCR_PASSPORT_MRZ_FIRST = False
+    settings.OCR_IQAMA_FAST = False
+
+    out_dir = Path(out)
+    for image in images:
+        before = set(out_dir.glob("*.json")) if out_dir.is_dir() else set()
+        try:
+            run_document_ocr(document_type, Path(image).read_bytes())
+        except ImageQualityError as e:
+            print(f"❌ {image}: {e} ({e.reason})")
+            continue
+        recorded = set(out_dir.glob("*.json")) - before
+        if recorded:
+            print(f"✅ {image} -> {', '.join(path.name for path in recorded)}")
+        else:
+            print(f"❌ {image}: no text recognised, nothing recorded")
+
+
+def field_matches(expected, actual):
+    """(matching, compared) over the expected fields"""
+    if not expected:
+        return 0, 0
+    matching = sum(1 for name, value in expected.items() if actual.get(name) == value)
+    return matching, len(expected)
+
+
+def replay(paths, repeat, update, verbose):
+    from app.services.ocr.documents import DOCUMENT_FIELD_EXTRACTORS
+    from app.services.ocr.reader_registry import reader_registry
+    from app.services.ocr.replay import load_fixtures, results_from_fixture
+
+    timings = defaultdict(list)
+    accuracy = defaultdict(lambda: [0, 0])
+    documents = defaultdict(int)
+
+    for path, fixture in load_fixtures(paths):
+        document_type = fixture["document_type"]
+        extract_fields = DOCUMENT_FIELD_EXTRACTORS[document_type][1]
+        results = results_from_fixture(fixture)
+
+        for _ in range(repeat):
+            started = time.perf_counter()
+            fields = extract_fields(results) or {}
+            timings[document_type].append(time.perf_counter() - started)
+        documents[document_type] += 1
+
+        matching, compared = field_matches(fixture.get("expected"), fields)
+        accuracy[document_type][0] += matching
+        accuracy[document_type][1] += compared
+        if verbose and matching < compared:
+            print(f"\n{path.name}")
+            for name, value in fixture["expected"].items():
+                if fields.get(name) != value:
+                    print(f"  {name}: expected {value!r}, got {fields.get(name)!r}")
+
+        if update:
+            fixture["expected"] = fields or None
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(fixture, f, ensure_ascii=False, separators=(",", ":"))
+
+    if not documents:
+        print("❌ No fixtures found")
+        return False
+
+    print(
+        f"\n{'document':<16} {'docs':>5} {'docs/s':>9} {'median us':>10} "
+        f"{'p95 us':>8} {'fields ok':>10}"
+    )
+    print("-" * 63)
+    for document_type in sorted(documents):
+        seconds = sorted(timings[document_type])
+        p95 = seconds[min(len(seconds) - 1, int(len(seconds) * 0.95))]
+        matching, compared = accuracy[document_type]
+        score = f"{matching / compared:.1%}" if compared else "-"
+        print(
+            f"{document_type:<16} {documents[document_type]:>5} "
+            f"{len(seconds) / sum(seconds):>9.0f} "
+            f"{statistics.median(seconds) * 1e6:>10.1f} {p95 * 1e6:>8.1f} "
+            f"{score:>10}"
+        )
+
+    loaded = ", ".join(reader_registry.status()["loaded"]) or "none"
+    print(f"\nOCR models loaded: {loaded}")
+    if update:
+        print("✅ Expected fields updated")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay OCR tokens")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="OCR images into fixtures")
+    record_parser.add_argument(
+        "--type",
+        required=True,
+        choices=["nicop_front", "nicop_back", "passport_front", "iqama_front"],
+    )
+    record_parser.add_argument("--out", required=True, help="fixture directory")
+    record_parser.add_argument("images", nargs="+")
+
+    replay_parser = commands.add_parser("replay", help="benchmark the extractors")
+    replay_parser.add_argument("paths", nargs="+", help="fixture files or directories")
+    replay_parser.add_argument("--repeat", type=int, default=100)
+    replay_parser.add_argument(
+        "--update", action="store_true", help="store current output as expected"
+    )
+    replay_parser.add_argument(
+        "--verbose", action="store_true", help="list every mismatching field"
+    )
+
+    args = parser.parse_args()
+
+    print("🚀 OCR replay")
+    print("=" * 63)
+    try:
+        if args.command == "record":
+            record(args.type, args.out, args.images)
+        elif not replay(args.paths, max(1, args.repeat), args.update, args.verbose):
+            sys.exit(1)
+    except Exception as e:
+        print(f"\n❌ Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
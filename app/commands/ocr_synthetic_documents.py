@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Usage: python -m app.commands.ocr_synthetic_documents --out DIR [--count N]
+           [--types TYPE ...] [--difficulty easy|medium|hard] [--seed S]
+
+Renders synthetic NICOP fronts and backs, passport data pages and Iqama
+cards with Pillow: random names, CNIC numbers, dates and addresses on an
+ID-card or passport layout, photographed on a background with skew, blur,
+noise and JPEG artifacts. Each image is written as <type>-<n>.jpg next to
+<type>-<n>.json holding the ground-truth fields, in the format the
+extractors return. python -m app.commands.ocr_benchmark renders the same
+documents in memory and OCRs them.
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+DOCUMENT_TYPES = ["nicop_front", "nicop_back", "passport_front", "iqama_front"]
+
+# Photo conditions: skew in degrees, chance of a quarter/half turn, blur
+# radius, noise sigma and JPEG quality range
+DIFFICULTIES = {
+    "easy": {"skew": 1, "turn": 0.0, "blur": 0.0, "noise": 0, "quality": (90, 95)},
+    "medium": {"skew": 4, "turn": 0.1, "blur": 1.0, "noise": 6, "quality": (70, 90)},
+    "hard": {"skew": 8, "turn": 0.3, "blur": 1.8, "noise": 12, "quality": (50, 75)},
+}
+
+FONT_PATHS = [
+    "DejaVuSans.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "C:/Windows/Fonts/arial.ttf",
+]
+MONO_FONT_PATHS = [
+    "DejaVuSansMono.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+    "/Library/Fonts/Courier New.ttf",
+    "C:/Windows/Fonts/cour.ttf",
+]
+
+MALE_NAMES = ["Muhammad", "Ahmed", "Ali", "Hassan", "Usman", "Bilal", "Imran"]
+FEMALE_NAMES = ["Ayesha", "Fatima", "Sana", "Maryam", "Hina", "Zainab", "Amna"]
+SURNAMES = ["Khan", "Malik", "Qureshi", "Sheikh", "Butt", "Chaudhry", "Raza"]
+CITIES = ["Lahore", "Karachi", "Islamabad", "Peshawar", "Multan", "Faisalabad"]
+STAY_CITIES = ["Riyadh", "Jeddah", "Dammam", "Dubai", "Doha", "Kuwait City"]
+STAY_COUNTRIES = {
+    "Riyadh": "Saudi Arabia",
+    "Jeddah": "Saudi Arabia",
+    "Dammam": "Saudi Arabia",
+    "Dubai": "UAE",
+    "Doha": "Qatar",
+    "Kuwait City": "Kuwait",
+}
+AREAS = ["Gulberg III", "Model Town", "DHA Phase 5", "Satellite Town", "Johar Town"]
+ARABIC_INDIC = str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
+
+
+def load_font(size, mono=False):
+    from PIL import ImageFont
+
+    for path in MONO_FONT_PATHS if mono else FONT_PATHS:
+        try:
+            return ImageFont.truetype(path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default(size=size)
+
+
+def random_date(rng, start, end):
+    return start + timedelta(days=rng.randrange((end - start).days))
+
+
+def random_person(rng):
+    gender = rng.choice("MF")
+    given = rng.choice(MALE_NAMES if gender == "M" else FEMALE_NAMES)
+    middle = rng.choice([name for name in MALE_NAMES if name != given])
+    surname = rng.choice(SURNAMES)
+    father = f"{rng.choice(MALE_NAMES)} {surname}"
+    birth = random_date(rng, date(1955, 1, 1), date(2004, 12, 31))
+    issue = random_date(rng, date(2016, 1, 1), date(2024, 12, 31))
+    try:
+        ten_years = issue.replace(year=issue.year + 10)
+    except ValueError:
+        # Issued on 29 Feb: the anniversary falls on 28 Feb
+        ten_years = issue.replace(year=issue.year + 10, day=28)
+    return {
+        "gender": gender,
+        "given_names": f"{given} {middle}" if gender == "M" else given,
+        "surname": surname,
+        "father_name": father,
+        "cnic": (
+            f"{rng.randrange(10000, 99999)}-{rng.randrange(1000000, 9999999)}-"
+            f"{rng.randrange(10)}"
+        ),
+        "birth": birth,
+        "issue": issue,
+        "expiry": ten_years - timedelta(days=1),
+        "city": rng.choice(CITIES),
+        "stay_city": rng.choice(STAY_CITIES),
+    }
+
+
+def random_address(rng, city):
+    return (
+        f"House {rng.randrange(1, 999)}, Street {rng.randrange(1, 60)}, "
+        f"{rng.choice(AREAS)}, {city}"
+    )
+
+
+def _card(width, height, color):
+    from PIL import Image, ImageDraw
+
+    card = Image.new("RGB", (width, height), color)
+    draw = ImageDraw.Draw(card)
+    draw.rectangle([0, 0, width, int(height * 0.12)], fill=(30, 110, 60))
+    return card, draw
+
+
+def _text(draw, fraction, text, size, card_size, fill=(20, 20, 20), mono=False):
+    x, y = fraction
+    width, height = card_size
+    draw.text(
+        (int(x * width), int(y * height)), text, font=load_font(size, mono), fill=fill
+    )
+
+
+def render_nicop_front(rng, person):
+    size = (1280, 807)
+    card, draw = _card(*size, (232, 240, 228))
+    truth = {
+        "name": f"{person['given_names']} {person['surname']}",
+        "father_name": person["father_name"],
+        "gender": person["gender"],
+        "country": STAY_COUNTRIES[person["stay_city"]],
+        "cnic_number": person["cnic"],
+        "date_of_birth": person["birth"].strftime("%d.%m.%Y"),
+        "date_of_issue": person["issue"].strftime("%d.%m.%Y"),
+        "date_of_expiry": person["expiry"].strftime("%d.%m.%Y"),
+    }
+
+    _text(draw, (0.03, 0.03), "ISLAMIC REPUBLIC OF PAKISTAN", 36, size, (255, 255, 255))
+    # Labels sit in the gaps between the layout template's field regions
+    # (app.services.ocr.nicop_service) and values inside them
+    rows = [
+        ((0.03, 0.19), "Name", (0.03, 0.255), "name"),
+        ((0.03, 0.355), "Father Name", (0.03, 0.415), "father_name"),
+        ((0.03, 0.515), "Gender", (0.03, 0.57), "gender"),
+        ((0.21, 0.515), "Country of Stay", (0.21, 0.57), "country"),
+        ((0.03, 0.65), "Identity Number", (0.03, 0.70), "cnic_number"),
+        ((0.36, 0.65), "Date of Birth", (0.36, 0.70), "date_of_birth"),
+        ((0.03, 0.785), "Date of Issue", (0.03, 0.83), "date_of_issue"),
+        ((0.36, 0.785), "Date of Expiry", (0.36, 0.83), "date_of_expiry"),
+    ]
+    for label_at, label, value_at, field in rows:
+        _text(draw, label_at, label, 22, size, (60, 90, 70))
+        _text(draw, value_at, truth[field], 38, size)
+    # Photo
+    draw.rectangle([922, 161, 1216, 605], fill=(180, 180, 175))
+
+    return card, truth
+
+
+def render_nicop_back(rng, person):
+    size = (1280, 807)
+    card, draw = _card(*size, (232, 240, 228))
+    present = random_address(rng, person["stay_city"])
+    permanent = random_address(rng, person["city"])
+    for top, label, address in (
+        (0.14, "Present Address:", present),
+        (0.42, "Permanent Address:", permanent),
+    ):
+        first, _, second = address.rpartition(", ")
+        _text(draw, (0.03, top), label, 30, size, (60, 90, 70))
+        _text(draw, (0.03, top + 0.07), f"{first},", 34, size)
+        _text(draw, (0.03, top + 0.14), second, 34, size)
+    _text(
+        draw,
+        (0.03, 0.80),
+        "The holder of this card is entitled to visa free entry",
+        24,
+        size,
+    )
+    _text(draw, (0.76, 0.20), person["cnic"], 26, size)
+
+    return card, {"present_address": present, "permanent_address": permanent}
+
+
+def _mrz_date(value):
+    return value.strftime("%y%m%d")
+
+
+def passport_mrz(person, number):
+    from app.services.ocr.mrz import check_digit
+
+    names = f"{person['surname']}<<{person['given_names'].replace(' ', '<')}".upper()
+    line1 = f"P<PAK{names}"[:44].ljust(44, "<")
+    personal = person["cnic"].replace("-", "").ljust(14, "<")
+    birth, expiry = _mrz_date(person["birth"]), _mrz_date(person["expiry"])
+    fields = [
+        number + check_digit(number),
+        "PAK",
+        birth + check_digit(birth),
+        person["gender"],
+        expiry + check_digit(expiry),
+        personal + check_digit(personal),
+    ]
+    composite = fields[0] + fields[2] + fields[4] + fields[5]
+    line2 = "".join(fields) + check_digit(composite)
+    return line1, line2
+
+
+def render_passport(rng, person):
+    size = (1250, 880)
+    card, draw = _card(*size, (238, 236, 226))
+    number = f"{rng.choice('ABCDEFGHJK')}{rng.choice('ABCDEFGHJK')}{rng.randrange(1000000, 9999999)}"
+    tracking = str(rng.randrange(10**10, 10**11))
+    booklet = f"{rng.choice('ABCDEFGHJK')}{rng.randrange(1000000, 9999999)}"
+    dates = {
+        key: person[key].strftime("%d %b %Y").upper()
+        for key in ("birth", "issue", "expiry")
+    }
+
+    _text(draw, (0.03, 0.03), "ISLAMIC REPUBLIC OF PAKISTAN", 36, size, (255, 255, 255))
+    draw.rectangle([30, 150, 300, 500], fill=(185, 185, 180))
+    left = [
+        ("Type", "P"),
+        ("Country Code", "PAK"),
+        ("Passport Number", number),
+        ("Surname", person["surname"].upper()),
+        ("Given Names", person["given_names"].upper()),
+        ("Nationality", "PAKISTANI"),
+        ("Date of Birth", dates["birth"]),
+    ]
+    right = [
+        ("Sex", person["gender"]),
+        ("Place of Birth", f"{person['city'].upper()}, PAK"),
+        ("Father Name", person["father_name"].upper()),
+        ("Citizenship Number", person["cnic"]),
+        ("Date of Issue", dates["issue"]),
+        ("Date of Expiry", dates["expiry"]),
+        ("Issuing Authority", "PAKISTAN"),
+    ]
+    for column, x in ((left, 0.27), (right, 0.62)):
+        for row, (label, value) in enumerate(column):
+            y = 0.15 + row * 0.083
+            _text(draw, (x, y), label, 18, size, (90, 90, 90))
+            _text(draw, (x, y + 0.027), value, 28, size)
+    _text(draw, (0.03, 0.60), tracking, 24, size)
+    _text(draw, (0.03, 0.64), booklet, 24, size)
+
+    line1, line2 = passport_mrz(person, number)
+    _text(draw, (0.03, 0.80), line1, 42, size, mono=True)
+    _text(draw, (0.03, 0.88), line2, 42, size, mono=True)
+
+    truth = {
+        "type": "P",
+        "country_code": "PAK",
+        "passport_number": number,
+        "surname": person["surname"].upper(),
+        "given_names": person["given_names"].upper(),
+        "nationality": "PAKISTANI",
+        "citizenship_number": person["cnic"],
+        "sex": person["gender"],
+        "date_of_birth": dates["birth"],
+        "place_of_birth": f"{person['city'].upper()}, PAK",
+        "date_of_issue": dates["issue"],
+        "date_of_expiry": dates["expiry"],
+        "father_name": person["father_name"].upper(),
+        "issuing_authority": "PAKISTAN",
+        "tracking_number": tracking,
+        "booklet_number": booklet,
+    }
+    return card, truth
+
+
+def iqama_number(rng):
+    """A random Iqama number: 2, eight digits and a Luhn check digit"""
+    body = f"2{rng.randrange(10**7, 10**8)}"
+    for check in "0123456789":
+        number = body + check
+        total = 0
+        for i, digit in enumerate(int(d) for d in number):
+            if i % 2 == 0:
+                digit *= 2
+                digit = digit - 9 if digit > 9 else digit
+            total += digit
+        if total % 10 == 0:
+            return number
+
+
+def render_iqama(rng, person):
+    size = (1280, 807)
+    card, draw = _card(*size, (226, 236, 240))
+    number = iqama_number(rng)
+    _text(draw, (0.03, 0.03), "KINGDOM OF SAUDI ARABIA", 34, size, (255, 255, 255))
+    _text(draw, (0.55, 0.03), "المملكة العربية السعودية", 34, size, (255, 255, 255))
+    _text(draw, (0.03, 0.20), "Resident Identity", 30, size)
+    _text(draw, (0.03, 0.32), f"ID No. {number}", 40, size)
+    _text(draw, (0.55, 0.32), number.translate(ARABIC_INDIC), 40, size)
+    _text(draw, (0.03, 0.46), f"{person['given_names']} {person['surname']}", 34, size)
+    _text(draw, (0.03, 0.58), "Nationality: Pakistan", 30, size)
+    _text(
+        draw, (0.03, 0.70), f"Expiry: {person['expiry'].strftime('%d/%m/%Y')}", 30, size
+    )
+
+    return card, {"iqama_number_arabic": number.translate(ARABIC_INDIC)}
+
+
+RENDERERS = {
+    "nicop_front": render_nicop_front,
+    "nicop_back": render_nicop_back,
+    "passport_front": render_passport,
+    "iqama_front": render_iqama,
+}
+
+
+def photograph(card, rng, difficulty):
+    """The card as a JPEG phone photo: on a background, turned, blurred and noisy"""
+    import numpy as np
+    from PIL import Image, ImageFilter
+
+    conditions = DIFFICULTIES[difficulty]
+    background = tuple(rng.randrange(40, 120) for _ in range(3))
+    margin_x, margin_y = card.width // 5, card.height // 5
+    photo = Image.new(
+        "RGB", (card.width + 2 * margin_x, card.height + 2 * margin_y), background
+    )
+    photo.paste(
+        card, (margin_x + rng.randrange(-20, 21), margin_y + rng.randrange(-20, 21))
+    )
+
+    angle = rng.uniform(-conditions["skew"], conditions["skew"])
+    if rng.random() < conditions["turn"]:
+        angle += rng.choice((90, 180, 270))
+    photo = photo.rotate(
+        angle, resample=Image.BICUBIC, expand=True, fillcolor=background
+    )
+
+    if conditions["blur"]:
+        photo = photo.filter(
+            ImageFilter.GaussianBlur(rng.uniform(0, conditions["blur"]))
+        )
+    if conditions["noise"]:
+        pixels = np.asarray(photo, dtype=np.float32)
+        noise = np.random.default_rng(rng.randrange(2**32)).normal(
+            0, conditions["noise"], pixels.shape
+        )
+        photo = Image.fromarray(np.clip(pixels + noise, 0, 255).astype(np.uint8))
+
+    buffer = io.BytesIO()
+    photo.save(buffer, format="JPEG", quality=rng.randrange(*conditions["quality"]))
+    return buffer.getvalue()
+
+
+def generate_document(document_type, rng, difficulty="medium"):
+    """(JPEG bytes, ground-truth fields) for one synthetic document"""
+    card, truth = RENDERERS[document_type](rng, random_person(rng))
+    return photograph(card, rng, difficulty), truth
+
+
+def generate_documents(document_types, count, difficulty="medium", seed=0):
+    """(name, document type, JPEG bytes, truth), count per document type"""
+    # Seeded for reproducible test documents, not for anything secret
+    rng = random.Random(seed)  # nosec B311
+    for document_type in document_types:
+        for index in range(count):
+            content, truth = generate_document(document_type, rng, difficulty)
+            yield f"{document_type}-{index}", document_type, content, truth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render synthetic OCR test documents")
+    parser.add_argument("--out", required=True, help="output directory")
+    parser.add_argument("--count", type=int, default=5, help="documents per type")
+    parser.add_argument(
+        "--types", nargs="+", choices=DOCUMENT_TYPES, default=DOCUMENT_TYPES
+    )
+    parser.add_argument("--difficulty", choices=list(DIFFICULTIES), default="medium")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    print("🚀 Rendering synthetic documents")
+    written = 0
+    for name, document_type, content, truth in generate_documents(
+        args.types, args.count, args.difficulty, args.seed
+    ):
+        (out / f"{name}.jpg").write_bytes(content)
+        (out / f"{name}.json").write_text(
+            json.dumps(
+                {"document_type": document_type, "truth": truth},
+                ensure_ascii=False,
+                indent=2,
+            ),
+            encoding="utf-8",
+        )
+        written += 1
+    print(f"✅ {written} documents written to {out}")
+
+
+if __name__ == "__main__":
+    main()
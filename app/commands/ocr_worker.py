@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Usage: python -m app.commands.ocr_worker
+
+Claims queued OCR jobs from the ocr_jobs table and processes them one at a
+time. Run as many workers as there is OCR capacity; they coordinate through
+SELECT ... FOR UPDATE SKIP LOCKED, independently of the API workers.
+"""
+
+import os
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+_stopping = False
+
+
+def _request_stop(signum, frame):
+    global _stopping
+    _stopping = True
+    print("\nStopping after the current job...")
+
+
+def run_worker():
+    from app.features.user.noc_application.service import (
+        claim_next_ocr_job,
+        process_ocr_job,
+    )
+    from app.services.ocr.engine import ocr_engine, set_thread_budget
+    from app.services.ocr.reader_registry import parse_language_sets, reader_registry
+    from app.utils.config import settings
+    from app.utils.database import SessionLocal
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    print(f"🚀 OCR worker {worker_id} starting")
+
+    # Same per-process budget as an engine pool worker, so several job
+    # workers on one host do not oversubscribe the cores
+    set_thread_budget(ocr_engine.torch_threads, ocr_engine.opencv_threads)
+    if settings.OCR_PRELOAD:
+        reader_registry.warm_up(parse_language_sets(settings.OCR_PRELOAD_LANGUAGES))
+
+    signal.signal(signal.SIGINT, _request_stop)
+    signal.signal(signal.SIGTERM, _request_stop)
+
+    while not _stopping:
+        db = SessionLocal()
+        try:
+            job = claim_next_ocr_job(db, worker_id)
+            if job is None:
+                time.sleep(settings.OCR_JOB_POLL_SECONDS)
+                continue
+
+            started = time.perf_counter()
+            job = process_ocr_job(db, job)
+            print(
+                f"OCR job {job.id} ({job.document_type.value}) -> "
+                f"{job.status.value} in {time.perf_counter() - started:.2f}s"
+            )
+        except Exception as e:
+            db.rollback()
+            print(f"❌ OCR worker error: {e}")
+            time.sleep(settings.OCR_JOB_POLL_SECONDS)
+        finally:
+            db.close()
+
+    print("✅ OCR worker stopped")
+
+
+def main():
+    try:
+        run_worker()
+    except Exception as e:
+        print(f"\n❌ Unexpected error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
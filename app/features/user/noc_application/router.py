@@ -1,19 +1,22 @@
-import os
-import cv2
-import tempfile
-import time
-from fastapi import APIRouter, UploadFile, File, HTTPException
+from typing import Optional, Union
+from uuid import UUID
+from fastapi import APIRouter, UploadFile, File, HTTPException, status
 from .schema import UploadResponse
-from .service import process_image
-from .schema import NICOPFrontResponse, NICOPBackResponse
-from app.services.ocr.nicop_service import (
-    process_nicop_front_improved,
-    process_nicop_back_improved,
+from .service import (
+    process_image,
+    create_ocr_job,
+    get_ocr_job,
+    get_ocr_job_result,
+    extract_document,
+    extract_documents_batch,
 )
+from .schema import OCRJobSubmitResponse, OCRJobStatusResponse, OCRBatchResponse
+from .schema import NICOPFrontResponse, NICOPBackResponse
 from .schema import PassportResponse
-from app.services.ocr.passport_service import process_passport_front
 from .schema import IqamaData
-from app.services.ocr.iqama_service import process_iqama_front
+from app.services.ocr.errors import OCRError
+from app.models.ocr_job import OCRDocumentTypeEnum
+from app.utils.dependencies import DbSession
 
 
 router = APIRouter(prefix="/noc", tags=["NOC Application"])
@@ -36,18 +39,10 @@ async def upload_nicop_front(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only image files are allowed.")
 
     try:
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(file.filename)[1]
-        ) as tmp:
-            temp_path = tmp.name
-            content = await file.read()
-            tmp.write(content)
-
-        output_image_path = temp_path + "_vis.jpg"
-
-        result = process_nicop_front_improved(temp_path, output_image_path)
-
-        os.remove(temp_path)
+        result = await extract_document(
+            OCRDocumentTypeEnum.nicop_front,
+            await file.read(),
+        )
 
         if not result:
             raise HTTPException(status_code=500, detail="OCR failed to extract data.")
@@ -63,6 +58,8 @@ async def upload_nicop_front(file: UploadFile = File(...)):
             date_of_expiry=result["date_of_expiry"],
         )
 
+    except (HTTPException, OCRError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -73,18 +70,10 @@ async def upload_nicop_back(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only image files are allowed.")
 
     try:
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(file.filename)[1]
-        ) as tmp:
-            temp_path = tmp.name
-            content = await file.read()
-            tmp.write(content)
-
-        output_image_path = temp_path + "_vis.jpg"
-
-        result = process_nicop_back_improved(temp_path, output_image_path)
-
-        os.remove(temp_path)
+        result = await extract_document(
+            OCRDocumentTypeEnum.nicop_back,
+            await file.read(),
+        )
 
         if not result:
             raise HTTPException(status_code=500, detail="OCR failed to extract data.")
@@ -94,6 +83,8 @@ async def upload_nicop_back(file: UploadFile = File(...)):
             permanent_address=result["permanent_address"],
         )
 
+    except (HTTPException, OCRError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -104,21 +95,18 @@ async def upload_passport_front(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only image files are allowed.")
 
     try:
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(file.filename)[1]
-        ) as tmp:
-            temp_path = tmp.name
-            tmp.write(await file.read())
-
-        result = process_passport_front(temp_path)
-
-        os.remove(temp_path)
+        result = await extract_document(
+            OCRDocumentTypeEnum.passport_front,
+            await file.read(),
+        )
 
         if not result:
             raise HTTPException(status_code=500, detail="OCR failed to extract data.")
 
         return PassportResponse(**result)
 
+    except (HTTPException, OCRError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -129,20 +117,92 @@ async def upload_iqama_front(file: UploadFile = File(...)):
         raise HTTPException(status_code=400, detail="Only image files are allowed.")
 
     try:
-        with tempfile.NamedTemporaryFile(
-            delete=False, suffix=os.path.splitext(file.filename)[1]
-        ) as tmp:
-            temp_path = tmp.name
-            tmp.write(await file.read())
-
-        result = process_iqama_front(temp_path)
-
-        os.remove(temp_path)
+        result = await extract_document(
+            OCRDocumentTypeEnum.iqama_front,
+            await file.read(),
+        )
 
         if not result:
             raise HTTPException(status_code=500, detail="OCR failed to extract data.")
 
         return IqamaData(**result)
 
+    except (HTTPException, OCRError):
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch", response_model=OCRBatchResponse)
+async def upload_documents_batch(
+    nicop_front: Optional[UploadFile] = File(None),
+    nicop_back: Optional[UploadFile] = File(None),
+    passport_front: Optional[UploadFile] = File(None),
+    iqama_front: Optional[UploadFile] = File(None),
+):
+    files = {
+        OCRDocumentTypeEnum.nicop_front: nicop_front,
+        OCRDocumentTypeEnum.nicop_back: nicop_back,
+        OCRDocumentTypeEnum.passport_front: passport_front,
+        OCRDocumentTypeEnum.iqama_front: iqama_front,
+    }
+    files = {doc_type: file for doc_type, file in files.items() if file is not None}
+    if not files:
+        raise HTTPException(status_code=400, detail="Upload at least one document.")
+
+    try:
+        return await extract_documents_batch(files)
+
+    except (HTTPException, OCRError):
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post(
+    "/jobs/{document_type}",
+    response_model=OCRJobSubmitResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def submit_ocr_job(
+    document_type: OCRDocumentTypeEnum, db: DbSession, file: UploadFile = File(...)
+):
+    if not file.content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Only image files are allowed.")
+
+    job = create_ocr_job(db, document_type, file.filename, await file.read())
+
+    return OCRJobSubmitResponse(
+        job_id=job.id,
+        document_type=job.document_type.value,
+        status=job.status.value,
+        status_url=f"/api/noc/jobs/{job.id}",
+        result_url=f"/api/noc/jobs/{job.id}/result",
+    )
+
+
+@router.get("/jobs/{job_id}", response_model=OCRJobStatusResponse)
+async def get_ocr_job_status(job_id: UUID, db: DbSession):
+    job = get_ocr_job(db, job_id)
+
+    return OCRJobStatusResponse(
+        job_id=job.id,
+        document_type=job.document_type.value,
+        status=job.status.value,
+        attempts=job.attempts,
+        error=job.error,
+        result=job.result,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@router.get(
+    "/jobs/{job_id}/result",
+    response_model=Union[
+        NICOPFrontResponse, NICOPBackResponse, PassportResponse, IqamaData
+    ],
+)
+async def get_ocr_job_result_route(job_id: UUID, db: DbSession):
+    return get_ocr_job_result(db, job_id)
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
+from datetime import datetime
 from typing import Optional, List, Dict, Any
+from uuid import UUID
 
 
 class UploadResponse(BaseModel):
@@ -49,3 +51,33 @@ class IqamaData(BaseModel):
     iqama_number_arabic: Optional[str] = Field(
         None, description="Iqama number in Arabic digits"
     )
+
+
+class OCRJobSubmitResponse(BaseModel):
+    job_id: UUID
+    document_type: str
+    status: str
+    status_url: str
+    result_url: str
+
+
+class OCRJobStatusResponse(BaseModel):
+    job_id: UUID
+    document_type: str
+    status: str
+    attempts: int
+    error: Optional[str] = None
+    result: Optional[Dict[str, Any]] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class OCRBatchResponse(BaseModel):
+    nicop_front: Optional[NICOPFrontResponse] = None
+    nicop_back: Optional[NICOPBackResponse] = None
+    passport_front: Optional[PassportResponse] = None
+    iqama_front: Optional[IqamaData] = None
+    errors: Dict[str, str] = Field(
+        default_factory=dict, description="Document type -> reason it has no result"
+    )
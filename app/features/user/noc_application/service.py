@@ -1,7 +1,251 @@
-from fastapi import UploadFile
+import functools
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session
+
+from app.models.ocr_job import OCRDocumentTypeEnum, OCRJob, OCRJobStatusEnum
+from app.services.ocr.admission import ocr_admission
+from app.services.ocr.cache import ocr_result_cache
+from app.services.ocr.engine import job_deadline, ocr_engine
+from app.services.ocr.errors import ImageQualityError
+from app.services.ocr.singleflight import ocr_single_flight
+from app.utils.config import settings
+from app.utils.logging import logging
+
+from .schema import (
+    IqamaData,
+    NICOPBackResponse,
+    NICOPFrontResponse,
+    OCRBatchResponse,
+    PassportResponse,
+)
+
+logger = logging.getLogger(__name__)
+
+# Imported by the OCR workers when a job runs, so the API process does not
+# load cv2, torch and easyocr
+RUN_DOCUMENT_OCR = "app.services.ocr.documents:run_document_ocr"
+RUN_DOCUMENTS_BATCH = "app.services.ocr.documents:run_documents_batch"
+
+OCR_RESPONSE_SCHEMAS = {
+    OCRDocumentTypeEnum.nicop_front: NICOPFrontResponse,
+    OCRDocumentTypeEnum.nicop_back: NICOPBackResponse,
+    OCRDocumentTypeEnum.passport_front: PassportResponse,
+    OCRDocumentTypeEnum.iqama_front: IqamaData,
+}
 
 
 async def process_image(file: UploadFile) -> str:
     await file.read()
     print(f"Uploaded file: {file.filename}")
     return file.filename
+
+
+async def _run_document_ocr(document_type: str, content: bytes) -> Optional[dict]:
+    async with ocr_admission.admit(document_type):
+        result = await ocr_engine.run(RUN_DOCUMENT_OCR, document_type, content)
+    ocr_result_cache.set(document_type, content, result)
+    return result
+
+
+async def extract_document(
+    document_type: OCRDocumentTypeEnum, content: bytes
+) -> Optional[dict]:
+    """
+    OCR one upload on the engine; repeat uploads are answered from the cache,
+    and copies arriving while the first is still being OCR'd (client
+    retries) wait for that run instead of starting their own.
+
+    Raises OCRBusyError when admission control turns the request away.
+    """
+    result = ocr_result_cache.get(document_type.value, content)
+    if result is None:
+        result = await ocr_single_flight.run(
+            ocr_result_cache.key(document_type.value, content),
+            functools.partial(_run_document_ocr, document_type.value, content),
+        )
+    return result
+
+
+async def extract_documents_batch(files: dict) -> OCRBatchResponse:
+    """OCR every uploaded document in one batched job; files maps type -> UploadFile"""
+    documents = {}
+    outcomes = {}
+    for document_type, file in files.items():
+        if not file.content_type.startswith("image/"):
+            raise HTTPException(
+                status_code=400,
+                detail=f"{document_type}: only image files are allowed.",
+            )
+        content = await file.read()
+
+        cached = ocr_result_cache.get(document_type.value, content)
+        if cached is not None:
+            outcomes[document_type.value] = {"result": cached, "error": None}
+        else:
+            documents[document_type.value] = content
+
+    if documents:
+        async with ocr_admission.admit(*documents):
+            batch_outcomes = await ocr_engine.run(
+                RUN_DOCUMENTS_BATCH,
+                documents,
+                timeout=ocr_engine.job_timeout * len(documents),
+            )
+        for document_type, outcome in batch_outcomes.items():
+            ocr_result_cache.set(
+                document_type, documents[document_type], outcome["result"]
+            )
+        outcomes.update(batch_outcomes)
+
+    response = OCRBatchResponse()
+    for document_type, outcome in outcomes.items():
+        schema = OCR_RESPONSE_SCHEMAS[OCRDocumentTypeEnum(document_type)]
+        if outcome["result"]:
+            setattr(response, document_type, schema(**outcome["result"]))
+        else:
+            response.errors[document_type] = outcome["error"]
+    return response
+
+
+def create_ocr_job(
+    db: Session, document_type: OCRDocumentTypeEnum, file_name: str, content: bytes
+) -> OCRJob:
+    job = OCRJob(
+        document_type=document_type,
+        status=OCRJobStatusEnum.pending,
+        file_name=file_name,
+        image=content,
+        attempts=0,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def get_ocr_job(db: Session, job_id: uuid.UUID) -> OCRJob:
+    job = db.query(OCRJob).filter(OCRJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="OCR job not found")
+    return job
+
+
+def get_ocr_job_result(db: Session, job_id: uuid.UUID):
+    job = get_ocr_job(db, job_id)
+
+    if job.status == OCRJobStatusEnum.failed:
+        raise HTTPException(status_code=500, detail=job.error or "OCR failed.")
+
+    if job.status != OCRJobStatusEnum.completed:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"OCR job is still {job.status.value}",
+        )
+
+    return OCR_RESPONSE_SCHEMAS[job.document_type](**job.result)
+
+
+def claim_next_ocr_job(db: Session, worker_id: str) -> Optional[OCRJob]:
+    """
+    Lock the oldest runnable job for this worker.
+
+    FOR UPDATE SKIP LOCKED lets any number of workers poll the same table
+    without handing one job to two of them. Jobs left in "processing" longer
+    than the lease belong to a dead worker and are claimed again; jobs put
+    back after a failure wait until their available_at.
+    """
+    now = datetime.now(timezone.utc)
+    lease_expired_before = now - timedelta(seconds=settings.OCR_JOB_LEASE_SECONDS)
+    job = (
+        db.query(OCRJob)
+        .filter(
+            or_(
+                and_(
+                    OCRJob.status == OCRJobStatusEnum.pending,
+                    or_(OCRJob.available_at.is_(None), OCRJob.available_at <= now),
+                ),
+                and_(
+                    OCRJob.status == OCRJobStatusEnum.processing,
+                    OCRJob.started_at < lease_expired_before,
+                ),
+            )
+        )
+        .order_by(OCRJob.created_at)
+        .with_for_update(skip_locked=True)
+        .limit(1)
+        .first()
+    )
+
+    if not job:
+        db.rollback()
+        return None
+
+    job.status = OCRJobStatusEnum.processing
+    job.attempts += 1
+    job.worker_id = worker_id
+    job.started_at = datetime.now(timezone.utc)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def finish_ocr_job(
+    db: Session, job: OCRJob, result: Optional[dict] = None, error: str = None
+) -> OCRJob:
+    job.status = OCRJobStatusEnum.failed if error else OCRJobStatusEnum.completed
+    job.result = result
+    job.error = error[:1000] if error else None
+    job.finished_at = datetime.now(timezone.utc)
+    job.image = None
+    db.commit()
+    return job
+
+
+def retry_ocr_job(db: Session, job: OCRJob) -> OCRJob:
+    """Put a failed job back in the queue after an exponential backoff"""
+    delay = settings.OCR_JOB_RETRY_BACKOFF_SECONDS * 2 ** max(0, job.attempts - 1)
+    db.rollback()
+    job.status = OCRJobStatusEnum.pending
+    job.available_at = datetime.now(timezone.utc) + timedelta(seconds=delay)
+    db.commit()
+    return job
+
+
+def process_ocr_job(db: Session, job: OCRJob) -> OCRJob:
+    """
+    Run OCR for a claimed job in the current process and store the outcome.
+
+    Must run on the main thread: the job is interrupted after
+    OCR_JOB_TIMEOUT_SECONDS (SIGALRM), so a hung OCR fails and is retried
+    instead of holding the job until its lease expires.
+    """
+    if job.attempts > settings.OCR_JOB_MAX_ATTEMPTS:
+        return finish_ocr_job(db, job, error="OCR job exceeded its retry limit.")
+
+    from app.services.ocr.documents import run_document_ocr
+
+    try:
+        result = ocr_result_cache.get(job.document_type.value, job.image)
+        if result is None:
+            with job_deadline(ocr_engine.job_timeout):
+                result = run_document_ocr(job.document_type.value, job.image)
+            ocr_result_cache.set(job.document_type.value, job.image, result)
+        if not result:
+            return finish_ocr_job(db, job, error="OCR failed to extract data.")
+
+        payload = OCR_RESPONSE_SCHEMAS[job.document_type](**result).model_dump()
+        return finish_ocr_job(db, job, result=payload)
+
+    except ImageQualityError as e:
+        # Retrying cannot fix the photo
+        return finish_ocr_job(db, job, error=str(e))
+    except Exception as e:
+        logger.exception("OCR job %s failed", job.id)
+        if job.attempts < settings.OCR_JOB_MAX_ATTEMPTS:
+            return retry_ocr_job(db, job)
+        return finish_ocr_job(db, job, error=str(e))
@@ -1,4 +1,6 @@
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from pathlib import Path
 
 from fastapi import FastAPI
@@ -10,10 +12,16 @@ from pydantic import ValidationError
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
+from app.services.ocr.admission import ocr_admission
+from app.services.ocr.cache import ocr_result_cache
+from app.services.ocr.engine import ocr_engine
+from app.services.ocr.errors import OCRError
+from app.services.ocr.metrics import ocr_metrics
 from app.utils.api import register_routes
 from app.utils.config import settings
 from app.utils.exception_handler import (
     http_exception_handler,
+    ocr_exception_handler,
     pydantic_validation_exception_handler,
     validation_exception_handler,
 )
@@ -21,12 +29,25 @@ from app.utils.exception_handler import (
 from .utils.logging import LogLevels, configure_logging
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start the OCR workers and let them load their models in the background
+    app.state.ocr_warm_up = asyncio.create_task(ocr_engine.warm_up())
+    # Drop on-disk OCR cache entries that expired while the API was down
+    app.state.ocr_cache_purge = asyncio.create_task(
+        asyncio.to_thread(ocr_result_cache.purge_expired)
+    )
+    yield
+    ocr_engine.shutdown(wait=False)
+
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="FASTAPI",
         description="FASTAPI POSTGRES TEMPLATE",
         version="1.0.0",
         debug=settings.DEBUG,
+        lifespan=lifespan,
     )
 
     configure_logging(log_level=LogLevels.info)
@@ -35,6 +56,7 @@ def create_app() -> FastAPI:
     app.add_exception_handler(ValidationError, pydantic_validation_exception_handler)
     app.add_exception_handler(HTTPException, http_exception_handler)
     app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+    app.add_exception_handler(OCRError, ocr_exception_handler)
 
     app.add_middleware(
         CORSMiddleware,
@@ -49,6 +71,23 @@ def create_app() -> FastAPI:
     async def health_check():
         return JSONResponse({"status": "ok", "message": "API is running"})
 
+    # OCR readiness: 503 until the OCR workers have loaded their readers
+    @app.get("/api/health/ocr")
+    async def ocr_health_check():
+        ocr_status = ocr_engine.status()
+        return JSONResponse(
+            {
+                "status": "ok" if ocr_status["ready"] else "loading",
+                **ocr_status,
+                "admission": ocr_admission.status(),
+            },
+            status_code=200 if ocr_status["ready"] else 503,
+        )
+
+    @app.get("/api/metrics/ocr")
+    async def ocr_metrics_snapshot():
+        return ocr_metrics.snapshot()
+
     # Register API routes
     register_routes(app)
 
@@ -5,6 +5,7 @@ from .guest import Guest
 from .noc_application import NOCApplication
 from .admin import Admin
 from .document import Document
+from .ocr_job import OCRJob
 
 # from .tracking_application import TrackingApplication
 
@@ -17,4 +18,5 @@ __all__ = [
     "Admin",
     # "TrackingApplication",
     "Document",
+    "OCRJob",
 ]
@@ -0,0 +1,52 @@
+import uuid
+import enum
+from sqlalchemy import Column, String, Enum, Integer, DateTime, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import deferred
+from app.utils.database import Base
+from .base import TimestampMixin
+
+
+class OCRDocumentTypeEnum(str, enum.Enum):
+    nicop_front = "nicop_front"
+    nicop_back = "nicop_back"
+    passport_front = "passport_front"
+    iqama_front = "iqama_front"
+
+
+class OCRJobStatusEnum(str, enum.Enum):
+    pending = "pending"
+    processing = "processing"
+    completed = "completed"
+    failed = "failed"
+
+
+class OCRJob(Base, TimestampMixin):
+    __tablename__ = "ocr_jobs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    document_type = Column(
+        Enum(OCRDocumentTypeEnum, name="ocr_document_type_enum"), nullable=False
+    )
+    status = Column(
+        Enum(OCRJobStatusEnum, name="ocr_job_status_enum"),
+        nullable=False,
+        default=OCRJobStatusEnum.pending,
+        index=True,
+    )
+    file_name = Column(String(255), nullable=True)
+
+    # Raw upload, cleared once the job finishes; deferred so polling is cheap
+    image = deferred(Column(LargeBinary, nullable=True))
+
+    result = Column(JSONB, nullable=True)
+    error = Column(String(1000), nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    worker_id = Column(String(100), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # A failed attempt is not claimed again before this (retry backoff)
+    available_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<OCRJob(id='{self.id}', type='{self.document_type}', status='{self.status}')>"
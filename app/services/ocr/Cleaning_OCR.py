@@ -1,94 +1,503 @@
 import cv2
 import numpy as np
-import easyocr
 import re
 from rapidfuzz import fuzz
 import os
+import logging
+from collections import defaultdict
 from datetime import datetime
 
+from app.utils.config import settings
 
-def preprocess_image_enhanced(image_path, resize_factor=2.5):
-    image = cv2.imread(image_path)
+from .metrics import ocr_metrics
+from .reader_registry import get_reader
 
+logger = logging.getLogger(__name__)
+
+
+def load_image(source):
+    """
+    Return a BGR image for a file path, encoded image bytes (or a file-like
+    object holding them) or an already decoded numpy array.
+
+    Uploads are decoded straight from memory with cv2.imdecode, so they never
+    need to be written to disk first.
+    """
+    if isinstance(source, np.ndarray):
+        return source
+
+    if isinstance(source, (str, os.PathLike)):
+        image = cv2.imread(os.fspath(source))
+        if image is None:
+            raise FileNotFoundError(f"Image not found at {source}")
+        return image
+
+    if hasattr(source, "read"):
+        source = source.read()
+
+    image = cv2.imdecode(np.frombuffer(source, dtype=np.uint8), cv2.IMREAD_COLOR)
     if image is None:
-        raise FileNotFoundError(f"Image not found at {image_path}")
+        raise ValueError("Could not decode the uploaded image.")
+    return image
 
-    if resize_factor != 1.0:
-        image = cv2.resize(
-            image,
-            None,
-            fx=resize_factor,
-            fy=resize_factor,
-            interpolation=cv2.INTER_CUBIC,
+
+# Preprocessing profiles. Images are scaled so their long side is
+# target_size px rather than by a fixed factor: EasyOCR's detector works on at
+# most 2560 px anyway, and upscaling a 12 MP photo 2.5x only made denoising slow.
+PREPROCESSING_PROFILES = {
+    "fast": {"target_size": 1280, "denoise": "median", "sharpen": False},
+    "balanced": {"target_size": 1920, "denoise": "bilateral", "sharpen": True},
+    "quality": {"target_size": 2560, "denoise": "nlmeans", "sharpen": True},
+}
+
+SHARPEN_KERNEL = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
+
+
+def preprocessing_profile(document_type=None):
+    """
+    Profile name for a document type: its entry in OCR_DOCUMENT_PROFILES
+    ("iqama_front=quality,nicop_back=fast") or OCR_PREPROCESSING_PROFILE.
+    """
+    for item in settings.OCR_DOCUMENT_PROFILES.split(","):
+        name, _, profile = item.partition("=")
+        if document_type and name.strip() == document_type and profile.strip():
+            return profile.strip()
+    return settings.OCR_PREPROCESSING_PROFILE
+
+
+def resize_to_target(image, target_size):
+    scale = target_size / max(image.shape[:2])
+    if abs(scale - 1.0) < 0.05:
+        return image
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(image, None, fx=scale, fy=scale, interpolation=interpolation)
+
+
+def denoise(gray, method):
+    if method == "median":
+        return cv2.medianBlur(gray, 3)
+    if method == "bilateral":
+        return cv2.bilateralFilter(gray, 5, 40, 40)
+    if method == "nlmeans":
+        return cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+    return gray
+
+
+# Multi-scale OCR: the long side chosen from the text height stays within the
+# sizes EasyOCR's detector handles well
+SCALE_THUMBNAIL = 800
+MIN_TARGET_SIZE = 960
+MAX_TARGET_SIZE = 2560
+# Longest side of one box after upscale_regions() has enlarged it
+UPSCALE_MAX_SIDE = 1600
+
+
+def estimate_text_height(image, languages=("en",)):
+    """Median height of the text boxes detected on a thumbnail, in image px, or None"""
+    gray = _grayscale(image)
+    scale = min(1.0, SCALE_THUMBNAIL / max(gray.shape[:2]))
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    horizontal_list, _ = detect_text_regions(get_reader(languages), [gray])[0]
+    heights = [y_max - y_min for _, _, y_min, y_max in horizontal_list if y_max > y_min]
+    if not heights:
+        return None
+    return float(np.median(heights)) / scale
+
+
+def text_target_size(image, languages, default):
+    """
+    Long side that brings the image's text to OCR_TEXT_HEIGHT px, or default
+    when the quick detection pass finds no text.
+    """
+    height = estimate_text_height(image, languages)
+    if height is None:
+        ocr_metrics.increment("ocr.scale.no_text")
+        return default
+    target = max(image.shape[:2]) * settings.OCR_TEXT_HEIGHT / height
+    ocr_metrics.increment("ocr.scale.text_height")
+    return int(min(MAX_TARGET_SIZE, max(MIN_TARGET_SIZE, target)))
+
+
+def preprocess_image_enhanced(image, profile=None, resize_factor=None, languages=None):
+    """
+    Return (resized BGR image, enhanced grayscale image for OCR).
+
+    profile names an entry of PREPROCESSING_PROFILES (default
+    OCR_PREPROCESSING_PROFILE); resize_factor, if given, scales by a fixed
+    factor instead of normalizing to the profile's target size. With
+    languages and OCR_MULTISCALE on, the target size comes from the text
+    height measured by that reader instead.
+    """
+    image = load_image(image)
+    options = PREPROCESSING_PROFILES.get(
+        profile or settings.OCR_PREPROCESSING_PROFILE,
+        PREPROCESSING_PROFILES["balanced"],
+    )
+
+    if resize_factor is not None:
+        if resize_factor != 1.0:
+            image = cv2.resize(
+                image,
+                None,
+                fx=resize_factor,
+                fy=resize_factor,
+                interpolation=cv2.INTER_CUBIC,
+            )
+    elif languages and settings.OCR_MULTISCALE:
+        image = resize_to_target(
+            image, text_target_size(image, languages, options["target_size"])
         )
+    else:
+        image = resize_to_target(image, options["target_size"])
 
     gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
+    denoised = denoise(gray, options["denoise"])
     clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
     enhanced = clahe.apply(denoised)
-    kernel = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
-    sharpened = cv2.filter2D(enhanced, -1, kernel)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 1))
-    morphed = cv2.morphologyEx(sharpened, cv2.MORPH_CLOSE, kernel)
-    final_image = cv2.cvtColor(morphed, cv2.COLOR_GRAY2BGR)
+    if options["sharpen"]:
+        enhanced = cv2.filter2D(enhanced, -1, SHARPEN_KERNEL)
+
+    return image, enhanced
+
+
+# Recognition passes over one set of detected boxes: greedy decoding, then
+# beam search; results of both are merged
+GREEDY_PASS = {"decoder": "greedy"}
+BEAM_PASS = {"decoder": "beamsearch", "beamWidth": 5}
+OCR_PASS_CONFIGS = [GREEDY_PASS, BEAM_PASS]
+
+
+# Two results are duplicates when their texts are this similar (fuzz.ratio)
+# and their first corners are closer than DUPLICATE_DISTANCE px
+DUPLICATE_TEXT_SIMILARITY = 80
+DUPLICATE_DISTANCE = 50
+MIN_RESULT_CONFIDENCE = 0.3
+
+
+def filter_duplicate_results(all_results):
+    """
+    Drop empty and low-confidence results and merge duplicates, most confident first.
+
+    Results are visited in descending confidence (ties keep their input
+    order), so every group of duplicates keeps its highest-confidence box and
+    the outcome does not depend on which pass produced what. Accepted boxes
+    are bucketed in a grid of DUPLICATE_DISTANCE-sized cells, so each result
+    is only compared with the boxes in the neighbouring cells.
+    """
+    candidates = [
+        result
+        for result in all_results
+        if result[1].strip() and result[2] > MIN_RESULT_CONFIDENCE
+    ]
+    candidates.sort(key=lambda result: result[2], reverse=True)
+
+    filtered_results = []
+    texts = []
+    anchors = np.empty((len(candidates), 2))
+    grid = defaultdict(list)
+
+    for result in candidates:
+        x, y = float(result[0][0][0]), float(result[0][0][1])
+        text = result[1].strip().lower()
+        cell_x, cell_y = int(x // DUPLICATE_DISTANCE), int(y // DUPLICATE_DISTANCE)
+
+        nearby = [
+            index
+            for dx in (-1, 0, 1)
+            for dy in (-1, 0, 1)
+            for index in grid.get((cell_x + dx, cell_y + dy), ())
+        ]
+        if nearby:
+            distances = np.hypot(anchors[nearby, 0] - x, anchors[nearby, 1] - y)
+            close = [i for i, d in zip(nearby, distances) if d < DUPLICATE_DISTANCE]
+            if any(
+                fuzz.ratio(text, texts[i]) > DUPLICATE_TEXT_SIMILARITY for i in close
+            ):
+                continue
+
+        index = len(filtered_results)
+        anchors[index] = (x, y)
+        texts.append(text)
+        grid[(cell_x, cell_y)].append(index)
+        filtered_results.append(result)
+
+    return filtered_results
+
+
+def required_fields_check(extract_fields, required_fields):
+    """Build a has_required_fields callback from a document's field extractor"""
+
+    def has_required_fields(results):
+        fields = extract_fields(results) or {}
+        return all(
+            fields.get(name) not in (None, "Not Found") for name in required_fields
+        )
+
+    return has_required_fields
+
+
+def escalation_mode(greedy_results, has_required_fields):
+    """
+    Decide how much beam search a greedy pass needs:
 
-    return image, final_image
+    - "none": the required fields come out of confident tokens alone
+    - "regions": they only come out with low-confidence tokens, so re-read
+      just those boxes with beam search
+    - "full": they are missing, so run the full beam-search pass
+    """
+    min_confidence = settings.OCR_ADAPTIVE_MIN_CONFIDENCE
+    confident = [r for r in greedy_results if r[2] >= min_confidence]
+    if has_required_fields(filter_duplicate_results(confident)):
+        return "none"
 
+    uncertain = len(confident) < len(greedy_results)
+    if uncertain and has_required_fields(filter_duplicate_results(greedy_results)):
+        return "regions"
 
-def extract_text_with_multiple_configs(image):
-    reader = easyocr.Reader(["en"], gpu=False)
-    all_results = []
+    return "full"
 
+
+def _grayscale(image):
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+
+
+def _rgb(image):
+    if image.ndim == 2:
+        return cv2.cvtColor(image, cv2.COLOR_GRAY2RGB)
+    return image[:, :, ::-1]
+
+
+def detect_text_regions(reader, images):
+    """
+    Run the CRAFT text detector once over same-sized images.
+
+    Returns (horizontal_list, free_list) per image, in the form
+    reader.recognize() takes, so every decoder reuses the same boxes.
+    """
+    batch = np.stack([_rgb(image) for image in images])
     try:
-        results1 = reader.readtext(image, detail=1, paragraph=False)
-        all_results.extend(results1)
+        horizontal_lists, free_lists = reader.detect(batch, reformat=False)
     except Exception as e:
-        print(f"Config 1 failed: {e}")
+        logger.warning("Text detection failed: %s", e, exc_info=True)
+        return [([], []) for _ in images]
+    return list(zip(horizontal_lists, free_lists))
 
+
+def recognize_regions(reader, gray, regions, config, index, batch_size=1):
+    horizontal_list, free_list = regions
+    if not horizontal_list and not free_list:
+        return []
     try:
-        results2 = reader.readtext(
-            image,
+        return reader.recognize(
+            gray,
+            horizontal_list=horizontal_list,
+            free_list=free_list,
             detail=1,
             paragraph=False,
-            width_ths=0.5,
-            height_ths=0.5,
-            decoder="beamsearch",
-            beamWidth=5,
+            batch_size=batch_size,
+            **config,
         )
-        all_results.extend(results2)
     except Exception as e:
-        print(f"Config 2 failed: {e}")
+        logger.warning("Recognition config %s failed: %s", index, e, exc_info=True)
+        return []
 
-    filtered_results = []
-    for result in all_results:
-        bbox, text, confidence = result[:3]
-        text_clean = text.strip()
-
-        if len(text_clean) > 0 and confidence > 0.3:
-            is_duplicate = False
-            for existing in filtered_results:
-                existing_text = existing[1].strip()
-                existing_bbox = existing[0]
-                text_similarity = fuzz.ratio(text_clean.lower(), existing_text.lower())
-                pos1 = np.array(bbox[0])
-                pos2 = np.array(existing_bbox[0])
-                distance = np.linalg.norm(pos1 - pos2)
-
-                if text_similarity > 80 and distance < 50:
-                    is_duplicate = True
-                    if confidence > existing[2]:
-                        filtered_results.remove(existing)
-                        break
-                    else:
-                        is_duplicate = True
-                        break
-
-            if not is_duplicate:
-                filtered_results.append(result)
-
-    filtered_results.sort(key=lambda x: x[2], reverse=True)
-
-    for i, result in enumerate(filtered_results):
-        bbox, text, confidence = result[:3]
 
-    return filtered_results
+def uncertain_regions(results):
+    """The boxes of low-confidence results, split back into horizontal and free boxes"""
+    min_confidence = settings.OCR_ADAPTIVE_MIN_CONFIDENCE
+    horizontal_list, free_list = [], []
+    for bbox, _, confidence in (r[:3] for r in results):
+        if confidence >= min_confidence:
+            continue
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = bbox
+        if y0 == y1 and x1 == x2 and y2 == y3 and x3 == x0:
+            horizontal_list.append([int(x0), int(x1), int(y0), int(y2)])
+        else:
+            free_list.append([[int(x), int(y)] for x, y in bbox])
+    return horizontal_list, free_list
+
+
+def extract_text_with_multiple_configs(
+    image, languages=("en",), has_required_fields=None
+):
+    """
+    Greedy OCR pass plus beam search where it is needed.
+
+    Text is detected once; both decoders recognize the same boxes. Without
+    has_required_fields (or with OCR_ADAPTIVE off) both passes always run.
+    Otherwise the beam-search work is chosen by escalation_mode(), and boxes
+    whose fields still fail are re-read upscaled by upscale_failed_regions().
+    """
+    reader = get_reader(languages)
+    gray = _grayscale(image)
+    regions = detect_text_regions(reader, [image])[0]
+    all_results = recognize_regions(reader, gray, regions, GREEDY_PASS, 1)
+
+    if has_required_fields is None or not settings.OCR_ADAPTIVE:
+        mode = "always"
+    else:
+        mode = escalation_mode(all_results, has_required_fields)
+
+    greedy_results = all_results
+    if mode in ("always", "full"):
+        all_results = all_results + recognize_regions(
+            reader, gray, regions, BEAM_PASS, 2
+        )
+    elif mode == "regions":
+        all_results = all_results + recognize_regions(
+            reader, gray, uncertain_regions(all_results), BEAM_PASS, 2
+        )
+    if mode in ("regions", "full"):
+        all_results = upscale_failed_regions(
+            reader, gray, greedy_results, all_results, has_required_fields
+        )
+
+    ocr_metrics.increment(f"ocr.escalation.{mode}")
+    logger.debug("OCR escalation for %s: %s", ",".join(languages), mode)
+
+    return filter_duplicate_results(all_results)
+
+
+def pad_to_common_size(images, fill=255):
+    """Pad images on the right/bottom so they stack into one batch; boxes keep their coordinates"""
+    height = max(image.shape[0] for image in images)
+    width = max(image.shape[1] for image in images)
+    return [
+        cv2.copyMakeBorder(
+            image,
+            0,
+            height - image.shape[0],
+            0,
+            width - image.shape[1],
+            cv2.BORDER_CONSTANT,
+            value=(fill, fill, fill),
+        )
+        for image in images
+    ]
+
+
+def extract_text_batched(images, languages=("en",), checks=None, batch_size=32):
+    """
+    extract_text_with_multiple_configs over several images at once.
+
+    The CRAFT detector runs one forward pass over the whole (padded) batch and
+    recognition crops are decoded batch_size at a time instead of one by one.
+    checks holds an optional has_required_fields callback per image; beam
+    search reuses the detected boxes and runs only for the images that need it.
+    """
+    if not images:
+        return []
+
+    reader = get_reader(languages)
+    checks = checks or [None] * len(images)
+    grays = [_grayscale(image) for image in images]
+    regions = detect_text_regions(reader, pad_to_common_size(images))
+
+    all_results = [
+        recognize_regions(reader, gray, image_regions, GREEDY_PASS, 1, batch_size)
+        for gray, image_regions in zip(grays, regions)
+    ]
+
+    for i, check in enumerate(checks):
+        if check is None or not settings.OCR_ADAPTIVE:
+            mode = "always"
+        else:
+            mode = escalation_mode(all_results[i], check)
+
+        if mode in ("always", "full"):
+            beam_regions = regions[i]
+        elif mode == "regions":
+            beam_regions = uncertain_regions(all_results[i])
+        else:
+            beam_regions = ([], [])
+
+        greedy_results = all_results[i]
+        all_results[i] = greedy_results + recognize_regions(
+            reader, grays[i], beam_regions, BEAM_PASS, 2, batch_size
+        )
+        if mode in ("regions", "full"):
+            all_results[i] = upscale_failed_regions(
+                reader, grays[i], greedy_results, all_results[i], check
+            )
+        ocr_metrics.increment(f"ocr.escalation.{mode}")
+
+    return [filter_duplicate_results(results) for results in all_results]
+
+
+def _upscale_box(reader, gray, points, horizontal, config, factor):
+    """Recognize one box again from its own crop, upscaled by at most factor"""
+    height, width = gray.shape[:2]
+    xs = [x for x, _ in points]
+    ys = [y for _, y in points]
+    x0, y0 = max(0, int(min(xs)) - 4), max(0, int(min(ys)) - 4)
+    x1, y1 = min(width, int(max(xs)) + 4), min(height, int(max(ys)) + 4)
+    if x1 <= x0 or y1 <= y0:
+        return []
+    scale = min(factor, UPSCALE_MAX_SIDE / max(x1 - x0, y1 - y0))
+    if scale <= 1:
+        return []
+    crop = cv2.resize(
+        gray[y0:y1, x0:x1], None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC
+    )
+
+    scaled = [[int((x - x0) * scale), int((y - y0) * scale)] for x, y in points]
+    if horizontal:
+        (left, top), _, (right, bottom), _ = scaled
+        crop_regions = ([[left, right, top, bottom]], [])
+    else:
+        crop_regions = ([], [scaled])
+    return [
+        (
+            [[int(x / scale) + x0, int(y / scale) + y0] for x, y in bbox],
+            text,
+            confidence,
+        )
+        for bbox, text, confidence in recognize_regions(
+            reader, crop, crop_regions, config, 3
+        )
+    ]
+
+
+def upscale_regions(reader, gray, regions, config, factor):
+    """
+    Recognize regions again at factor times the resolution.
+
+    Each box is cropped and upscaled on its own, with its longest side capped
+    at UPSCALE_MAX_SIDE, so two uncertain boxes far apart do not upscale the
+    page between them; boxes that cannot be enlarged under the cap are
+    skipped. Result boxes are mapped back to gray's coordinates.
+    """
+    horizontal_list, free_list = regions
+    boxes = [
+        ([[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]], True)
+        for x_min, x_max, y_min, y_max in horizontal_list
+    ]
+    boxes += [(box, False) for box in free_list]
+    ocr_metrics.increment("ocr.upscale.boxes", len(boxes))
+
+    results = []
+    for points, horizontal in boxes:
+        results += _upscale_box(reader, gray, points, horizontal, config, factor)
+    return results
+
+
+def upscale_failed_regions(reader, gray, greedy_results, results, has_required_fields):
+    """
+    results plus an upscaled beam-search read of the greedy pass's uncertain
+    boxes, when the required fields are still missing after escalation.
+    """
+    if not settings.OCR_MULTISCALE or settings.OCR_UPSCALE_FACTOR <= 1:
+        return results
+    if has_required_fields(filter_duplicate_results(results)):
+        return results
+
+    regions = uncertain_regions(greedy_results)
+    if not regions[0] and not regions[1]:
+        ocr_metrics.increment("ocr.upscale.no_regions")
+        return results
+
+    ocr_metrics.increment("ocr.upscale.regions")
+    return results + upscale_regions(
+        reader, gray, regions, BEAM_PASS, settings.OCR_UPSCALE_FACTOR
+    )
@@ -0,0 +1,156 @@
+import asyncio
+import math
+import time
+from contextlib import asynccontextmanager
+
+from app.utils.config import settings
+
+from .errors import OCRBusyError
+from .metrics import ocr_metrics
+
+# Assumed job latency until the first job has finished
+DEFAULT_JOB_SECONDS = 5.0
+
+
+def parse_document_limits(value):
+    """Parse "passport_front=1,iqama_front=1" into {"passport_front": 1, ...}"""
+    limits = {}
+    for item in (value or "").split(","):
+        name, _, limit = item.partition("=")
+        if name.strip() and limit.strip():
+            limits[name.strip()] = int(limit)
+    return limits
+
+
+class AdmissionController:
+    """
+    Bounds the OCR work one API process lets in.
+
+    At most limit jobs run at once (and at most document_limits[type] of
+    one document type); up to max_queue more wait for a slot, each for at
+    most max_wait seconds. Anything beyond that is turned away at once with
+    OCRBusyError, whose retry_after is the time the current queue should
+    take to drain at the recent job latency (an exponentially weighted
+    moving average with weight smoothing). A batch counts as one job per
+    document, up to limit.
+    """
+
+    def __init__(
+        self, limit=1, max_queue=8, max_wait=10, document_limits=None, smoothing=0.2
+    ):
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.max_wait = max_wait
+        self.document_limits = document_limits or {}
+        self.smoothing = smoothing
+        self.active = 0
+        self.waiting = 0
+        self.average_seconds = None
+        self._slots = asyncio.Semaphore(self.limit)
+        # Batches take their slots one at a time; only one batch does so at
+        # once, so two batches never each hold part of the slots they need
+        self._batch_lock = asyncio.Lock()
+        self._document_slots = {
+            document_type: asyncio.Semaphore(max(1, limit))
+            for document_type, limit in self.document_limits.items()
+        }
+
+    def retry_after(self):
+        """Whole seconds until the queue in front of a new request has drained"""
+        average = self.average_seconds or DEFAULT_JOB_SECONDS
+        return max(1, math.ceil((self.waiting + 1) * average / self.limit))
+
+    def _reject(self, reason):
+        ocr_metrics.increment(f"ocr.admission.rejected.{reason}")
+        retry_after = self.retry_after()
+        raise OCRBusyError(
+            f"OCR is busy, please retry in {retry_after}s", retry_after=retry_after
+        )
+
+    def _observe(self, seconds):
+        if self.average_seconds is None:
+            self.average_seconds = seconds
+        else:
+            self.average_seconds += self.smoothing * (seconds - self.average_seconds)
+
+    async def _acquire(self, semaphores):
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+        acquired = []
+        try:
+            for semaphore in semaphores:
+                if semaphore.locked():
+                    timeout = max(0, deadline - loop.time())
+                    await asyncio.wait_for(semaphore.acquire(), timeout)
+                else:
+                    await semaphore.acquire()
+                acquired.append(semaphore)
+        except BaseException as e:
+            for semaphore in acquired:
+                semaphore.release()
+            if isinstance(e, asyncio.TimeoutError):
+                self._reject("timeout")
+            raise
+        return acquired
+
+    @asynccontextmanager
+    async def admit(self, *document_types):
+        """
+        Hold an OCR slot per document type given (one if none) for the
+        duration of the block, or raise OCRBusyError
+        """
+        slots = max(1, min(len(document_types), self.limit))
+        semaphores = [
+            self._document_slots[document_type]
+            for document_type in sorted(set(document_types))
+            if document_type in self._document_slots
+        ]
+        semaphores += [self._slots] * slots
+        if slots > 1:
+            semaphores.insert(0, self._batch_lock)
+
+        if any(semaphore.locked() for semaphore in semaphores):
+            if self.waiting >= self.max_queue:
+                self._reject("queue_full")
+            ocr_metrics.increment("ocr.admission.queued")
+
+        self.waiting += 1
+        try:
+            acquired = await self._acquire(semaphores)
+        finally:
+            self.waiting -= 1
+        if slots > 1:
+            acquired.remove(self._batch_lock)
+            self._batch_lock.release()
+
+        ocr_metrics.increment("ocr.admission.admitted")
+        self.active += slots
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.active -= slots
+            self._observe((time.perf_counter() - started) / slots)
+            for semaphore in reversed(acquired):
+                semaphore.release()
+
+    def status(self):
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "max_wait": self.max_wait,
+            "document_limits": self.document_limits,
+            "average_seconds": (
+                round(self.average_seconds, 3) if self.average_seconds else None
+            ),
+        }
+
+
+ocr_admission = AdmissionController(
+    limit=settings.OCR_MAX_CONCURRENT or settings.OCR_WORKERS or 1,
+    max_queue=settings.OCR_MAX_QUEUE,
+    max_wait=settings.OCR_MAX_QUEUE_WAIT_SECONDS,
+    document_limits=parse_document_limits(settings.OCR_DOCUMENT_CONCURRENCY),
+)
@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+from app.utils.config import settings
+
+from .metrics import ocr_metrics
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever preprocessing, OCR or field extraction changes what a given
+# image produces, so results cached by an older pipeline are never served
+OCR_PIPELINE_VERSION = "10"
+
+
+class OCRResultCache:
+    """
+    Extracted fields keyed by the SHA-256 of the uploaded bytes.
+
+    A bounded LRU dict answers repeat uploads inside one process; a directory
+    of JSON files shares results between processes and restarts. Both tiers
+    expire entries after ttl_seconds. Only successful extractions are stored.
+    """
+
+    def __init__(self, max_entries=256, directory=None, ttl_seconds=86400):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(document_type, content):
+        digest = hashlib.sha256(content).hexdigest()
+        return f"{OCR_PIPELINE_VERSION}-{document_type}-{digest}"
+
+    def get(self, document_type, content):
+        key = self.key(document_type, content)
+        now = time.time()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    ocr_metrics.increment("ocr.cache.memory_hit")
+                    return result
+                del self._entries[key]
+
+        result = self._read_file(key, now)
+        if result is not None:
+            self._remember(key, result, now)
+            ocr_metrics.increment("ocr.cache.disk_hit")
+            return result
+
+        ocr_metrics.increment("ocr.cache.miss")
+        return None
+
+    def set(self, document_type, content, result):
+        if not result:
+            return
+        key = self.key(document_type, content)
+        now = time.time()
+        self._remember(key, result, now)
+        self._write_file(key, result)
+
+    def _remember(self, key, result, now):
+        with self._lock:
+            self._entries[key] = (now + self.ttl_seconds, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_file(self, key, now):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl_seconds <= now:
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable OCR cache entry %s: %s", path, e)
+            return None
+
+    def _write_file(self, key, result):
+        if not self.directory:
+            return
+        try:
+            # Owner-only: entries hold names, CNIC numbers and addresses
+            os.makedirs(self.directory, mode=0o700, exist_ok=True)
+            # Write then rename so concurrent readers never see a partial file
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False)
+            os.replace(tmp_path, self._path(key))
+        except OSError as e:
+            logger.warning("Could not write OCR cache entry %s: %s", key, e)
+
+    def purge_expired(self):
+        """Delete expired on-disk entries; returns how many were removed"""
+        if not self.directory or not os.path.isdir(self.directory):
+            return 0
+        removed = 0
+        cutoff = time.time() - self.ttl_seconds
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.is_file() and entry.stat().st_mtime <= cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except OSError:
+                continue
+        return removed
+
+
+ocr_result_cache = OCRResultCache(
+    max_entries=settings.OCR_CACHE_MAX_ENTRIES,
+    directory=settings.OCR_CACHE_DIR,
+    ttl_seconds=settings.OCR_CACHE_TTL_SECONDS,
+)
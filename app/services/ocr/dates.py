@@ -0,0 +1,74 @@
+import calendar
+import re
+from datetime import date
+
+# Day-first numeric dates (14.08.1985, 14/08/1985, 14081985) and printed
+# ones (14 AUG 1985, 14 August 85). O and I stand in for 0 and 1, which OCR
+# confuses. Groups: numeric day, month, year; compact day, month, year;
+# printed day, month name, year.
+DATE_PATTERN = (
+    r"\b([0-9OI]{1,2})[.\-/, ]+([0-9OI]{1,2})[.\-/, ]+([0-9OI]{4})\b"
+    r"|\b(\d{2})(\d{2})(\d{4})\b"
+    r"|\b([0-9OI]{1,2})[ .\-]*([A-Z]{3})[A-Z]*\.?[ .\-]*([0-9OI]{4}|\d{2})\b"
+)
+DATE_REGEX = re.compile(DATE_PATTERN, re.IGNORECASE)
+
+DIGIT_REPAIRS = str.maketrans("OoIi", "0011")
+
+MONTHS = {
+    "JAN": 1,
+    "FEB": 2,
+    "MAR": 3,
+    "APR": 4,
+    "MAY": 5,
+    "JUN": 6,
+    "JUL": 7,
+    "AUG": 8,
+    "SEP": 9,
+    "OCT": 10,
+    "NOV": 11,
+    "DEC": 12,
+}
+
+
+def _number(text):
+    return int(text.translate(DIGIT_REPAIRS))
+
+
+def date_from_match(match):
+    """The date a DATE_REGEX match stands for, or None if it is not a date"""
+    groups = match.groups()
+    if groups[0] is not None:
+        day, month, year = (_number(group) for group in groups[0:3])
+    elif groups[3] is not None:
+        day, month, year = (int(group) for group in groups[3:6])
+    else:
+        month = MONTHS.get(groups[7].upper())
+        if month is None:
+            return None
+        day, year = _number(groups[6]), _number(groups[8])
+        if len(groups[8]) == 2:
+            # Two-digit years: anything after this year is last century
+            year += 2000 if year <= date.today().year % 100 else 1900
+
+    # A month over 12 means the date was printed month-first
+    if month > 12 and day <= 12:
+        day, month = month, day
+    if not 1 <= month <= 12 or not 1900 <= year <= 2100:
+        return None
+    if not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    return date(year, month, day)
+
+
+def parse_ocr_date(text):
+    """The first valid date in an OCR token, as a date, or None"""
+    match = DATE_REGEX.search(text)
+    while match is not None:
+        parsed = date_from_match(match)
+        if parsed is not None:
+            return parsed
+        # Not finditer: a rejected match ("issued 01") may have swallowed the
+        # start of the real date
+        match = DATE_REGEX.search(text, match.start() + 1)
+    return None
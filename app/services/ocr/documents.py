@@ -0,0 +1,174 @@
+from .Cleaning_OCR import (
+    extract_text_batched,
+    load_image,
+    preprocess_image_enhanced,
+    preprocessing_profile,
+    required_fields_check,
+)
+from .iqama_service import (
+    IQAMA_LANGUAGES,
+    IQAMA_REQUIRED_FIELDS,
+    extract_iqama_fast,
+    extract_iqama_fields,
+    process_iqama_front,
+)
+from .nicop_service import (
+    NICOP_BACK_REQUIRED_FIELDS,
+    NICOP_FRONT_REQUIRED_FIELDS,
+    extract_nicop_back_fields,
+    extract_nicop_back_with_layout,
+    extract_nicop_front_with_layout,
+    extract_nicop_fields_improved,
+    process_nicop_back_improved,
+    process_nicop_front_improved,
+)
+from .passport_service import (
+    PASSPORT_REQUIRED_FIELDS,
+    extract_passport_fields,
+    merge_mrz_fields,
+    process_passport_front,
+    read_mrz_first,
+)
+from .orientation import normalize_orientation
+from .quality import check_image_quality
+from .replay import record_ocr_results
+
+
+def _iqama_fields(results):
+    data = {k: v for k, v in extract_iqama_fields(results).items() if v is not None}
+    return data or None
+
+
+# Keyed by OCRDocumentTypeEnum values
+DOCUMENT_PROCESSORS = {
+    "nicop_front": process_nicop_front_improved,
+    "nicop_back": process_nicop_back_improved,
+    "passport_front": process_passport_front,
+    "iqama_front": process_iqama_front,
+}
+
+# Reader languages, field extractor and adaptive-OCR check used when
+# documents are OCR'd together
+DOCUMENT_FIELD_EXTRACTORS = {
+    "nicop_front": (
+        ("en",),
+        extract_nicop_fields_improved,
+        required_fields_check(
+            extract_nicop_fields_improved, NICOP_FRONT_REQUIRED_FIELDS
+        ),
+    ),
+    "nicop_back": (
+        ("en",),
+        extract_nicop_back_fields,
+        required_fields_check(extract_nicop_back_fields, NICOP_BACK_REQUIRED_FIELDS),
+    ),
+    "passport_front": (
+        ("en",),
+        extract_passport_fields,
+        required_fields_check(extract_passport_fields, PASSPORT_REQUIRED_FIELDS),
+    ),
+    "iqama_front": (
+        IQAMA_LANGUAGES,
+        _iqama_fields,
+        required_fields_check(extract_iqama_fields, IQAMA_REQUIRED_FIELDS),
+    ),
+}
+
+# Cheaper per-document reads tried before the batched full-image OCR; each
+# takes the decoded image and returns the fields or None
+DOCUMENT_FAST_PATHS = {
+    "nicop_front": extract_nicop_front_with_layout,
+    "nicop_back": extract_nicop_back_with_layout,
+    "iqama_front": extract_iqama_fast,
+}
+
+
+def run_document_ocr(document_type, content):
+    """
+    OCR one uploaded image (encoded bytes) and return its extracted fields (or None).
+
+    Raises ImageQualityError for an upload too poor to read.
+    """
+    processor = DOCUMENT_PROCESSORS.get(document_type)
+    if processor is None:
+        raise ValueError(f"Unsupported document type: {document_type}")
+
+    image = load_image(content)
+    check_image_quality(image, document_type)
+    return processor(normalize_orientation(image))
+
+
+def run_documents_batch(documents):
+    """
+    OCR several documents with one batched OCR call per reader language set.
+
+    documents maps document type -> encoded image bytes. Returns document type ->
+    {"result": fields or None, "error": message or None}.
+    """
+    outcomes = {}
+    batches = {}
+    mrz_fields = {}
+
+    for document_type, content in documents.items():
+        if document_type not in DOCUMENT_FIELD_EXTRACTORS:
+            raise ValueError(f"Unsupported document type: {document_type}")
+
+        languages = DOCUMENT_FIELD_EXTRACTORS[document_type][0]
+        try:
+            image = load_image(content)
+            check_image_quality(image, document_type)
+            image = normalize_orientation(image)
+            if document_type in DOCUMENT_FAST_PATHS:
+                fields = DOCUMENT_FAST_PATHS[document_type](image)
+                if fields:
+                    outcomes[document_type] = {"result": fields, "error": None}
+                    continue
+
+            if document_type == "passport_front":
+                mrz_fields[document_type], image, required_fields = read_mrz_first(
+                    image
+                )
+                if image is None:
+                    outcomes[document_type] = {
+                        "result": merge_mrz_fields(
+                            extract_passport_fields([]), mrz_fields[document_type]
+                        ),
+                        "error": None,
+                    }
+                    continue
+                check = required_fields_check(extract_passport_fields, required_fields)
+            else:
+                check = DOCUMENT_FIELD_EXTRACTORS[document_type][2]
+
+            _, processed_image = preprocess_image_enhanced(
+                image, profile=preprocessing_profile(document_type), languages=("en",)
+            )
+        except Exception as e:
+            outcomes[document_type] = {"result": None, "error": str(e)}
+            continue
+
+        batches.setdefault(languages, []).append(
+            (document_type, processed_image, check)
+        )
+
+    for languages, items in batches.items():
+        batch_results = extract_text_batched(
+            [image for _, image, _ in items],
+            languages=languages,
+            checks=[check for _, _, check in items],
+        )
+
+        for (document_type, _, _), results in zip(items, batch_results):
+            extract_fields = DOCUMENT_FIELD_EXTRACTORS[document_type][1]
+            fields = extract_fields(results) if results else None
+            record_ocr_results(document_type, results, fields)
+            if mrz_fields.get(document_type):
+                fields = merge_mrz_fields(
+                    fields or extract_fields([]), mrz_fields[document_type]
+                )
+            outcomes[document_type] = {
+                "result": fields,
+                "error": None if fields else "OCR failed to extract data.",
+            }
+
+    return outcomes
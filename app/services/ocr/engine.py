@@ -0,0 +1,266 @@
+import asyncio
+import functools
+import importlib
+import logging
+import multiprocessing
+import os
+import signal
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from app.utils.config import settings
+
+from .errors import OCREngineUnavailableError, OCRTimeoutError
+from .metrics import ocr_metrics
+from .reader_registry import parse_language_sets
+
+logger = logging.getLogger(__name__)
+
+
+class _JobDeadline(BaseException):
+    # BaseException so the services' broad "except Exception" cannot swallow it
+    pass
+
+
+def _raise_deadline(signum, frame):
+    raise _JobDeadline()
+
+
+def set_thread_budget(torch_threads, opencv_threads):
+    """Limit the threads torch and OpenCV use in this process"""
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(torch_threads)
+
+    import cv2
+    import torch
+
+    torch.set_num_threads(torch_threads)
+    torch.set_num_interop_threads(1)
+    cv2.setNumThreads(opencv_threads)
+
+
+def _init_worker(torch_threads, opencv_threads, preload_languages):
+    """Runs once in every pool process before it accepts jobs"""
+    # Ctrl+C is handled by the parent, which shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    set_thread_budget(torch_threads, opencv_threads)
+
+    if preload_languages:
+        from .reader_registry import reader_registry
+
+        reader_registry.warm_up(preload_languages)
+
+
+def resolve(func):
+    """func itself, or the function a "package.module:function" string names"""
+    if not isinstance(func, str):
+        return func
+    module_name, _, name = func.partition(":")
+    return getattr(importlib.import_module(module_name), name)
+
+
+def _call(func, args, kwargs):
+    return resolve(func)(*args, **kwargs)
+
+
+@contextmanager
+def job_deadline(timeout):
+    """
+    Raise OCRTimeoutError if the block runs longer than timeout seconds.
+
+    Uses SIGALRM, so it must run on the main thread of its process; a falsy
+    timeout disables it.
+    """
+    if not timeout:
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _raise_deadline)
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        yield
+    except _JobDeadline:
+        raise OCRTimeoutError(f"OCR job exceeded {timeout}s")
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _run_job(func, args, kwargs, timeout):
+    """Run a job on a pool process; returns its result and the metrics it recorded"""
+    # Runs on the main thread of a pool process, so SIGALRM can interrupt it
+    with job_deadline(timeout), ocr_metrics.capture() as recorded:
+        result = _call(func, args, kwargs)
+    return result, dict(recorded)
+
+
+def _warm_worker(preload_languages):
+    from .reader_registry import reader_registry
+
+    # No-op in pool processes, whose initializer already loaded the readers
+    reader_registry.warm_up(preload_languages)
+    return {"pid": os.getpid(), **reader_registry.status()}
+
+
+class OCREngine:
+    """
+    Runs CPU-bound OCR work outside the event loop.
+
+    With workers > 0 jobs go to a process pool whose processes each hold their
+    own EasyOCR readers and a fixed torch/OpenCV thread budget, so N workers
+    use about N * torch_threads cores. With workers == 0 jobs run on a single
+    background thread of the API process (useful for development).
+
+    Jobs may name their function as a "package.module:function" string; it is
+    imported where the job runs, so the API process never has to load the
+    OCR stack itself.
+    """
+
+    def __init__(
+        self,
+        workers=2,
+        torch_threads=0,
+        opencv_threads=0,
+        job_timeout=120,
+        preload_languages=None,
+        start_method="spawn",
+    ):
+        cpu_count = os.cpu_count() or 1
+        self.workers = max(0, workers)
+        self.torch_threads = torch_threads or max(1, cpu_count // max(1, self.workers))
+        self.opencv_threads = opencv_threads or self.torch_threads
+        self.job_timeout = job_timeout
+        self.preload_languages = preload_languages or []
+        self.start_method = start_method
+        self.ready = False
+        self.worker_status = []
+        self._executor = None
+        self._warm_up_task = None
+
+    @property
+    def uses_processes(self):
+        return self.workers > 0
+
+    def start(self):
+        if self._executor is not None:
+            return
+
+        if self.uses_processes:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context(self.start_method),
+                initializer=_init_worker,
+                initargs=(
+                    self.torch_threads,
+                    self.opencv_threads,
+                    self.preload_languages,
+                ),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ocr")
+        logger.info(
+            "OCR engine started: workers=%s torch_threads=%s opencv_threads=%s",
+            self.workers,
+            self.torch_threads,
+            self.opencv_threads,
+        )
+
+    async def warm_up(self):
+        """Wait until every pool process has finished loading its readers"""
+        self.start()
+        pings = self.workers if self.uses_processes else 1
+        try:
+            statuses = await asyncio.gather(
+                *[
+                    self.run(_warm_worker, self.preload_languages, timeout=0)
+                    for _ in range(pings)
+                ]
+            )
+        except Exception as e:
+            logger.error("OCR engine warm-up failed: %s", e)
+            return
+
+        self.worker_status = statuses
+        self.ready = all(status["ready"] for status in statuses)
+
+    def shutdown(self, wait=True):
+        if self._executor is None:
+            return
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+        self.ready = False
+
+    def _restart(self, executor):
+        """
+        Replace the broken pool executor, unless another job that failed on
+        it has already done so; True if this call restarted the pool
+        """
+        if self._executor is not executor:
+            return False
+        logger.warning("Restarting OCR worker pool")
+        self._executor = None
+        self.ready = False
+        self.worker_status = []
+        executor.shutdown(wait=False, cancel_futures=True)
+        self.start()
+        return True
+
+    async def run(self, func, *args, timeout=None, **kwargs):
+        """Run func(*args, **kwargs) in the pool and await its result
+
+        func is a picklable function or a "package.module:function" string.
+        """
+        self.start()
+        timeout = self.job_timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+
+        if not self.uses_processes:
+            # A thread cannot be interrupted; stop waiting for it instead
+            future = loop.run_in_executor(
+                self._executor, functools.partial(_call, func, args, kwargs)
+            )
+            try:
+                return await asyncio.wait_for(future, timeout=timeout or None)
+            except asyncio.TimeoutError:
+                raise OCRTimeoutError(f"OCR job exceeded {timeout}s")
+
+        # Pool processes enforce the deadline themselves, counted from when
+        # the job starts rather than from when it was queued
+        job = functools.partial(_run_job, func, args, kwargs, timeout)
+        executor = self._executor
+        try:
+            result, recorded = await loop.run_in_executor(executor, job)
+        except BrokenProcessPool:
+            if self._restart(executor):
+                # Ready again once the new processes have loaded their readers
+                self._warm_up_task = asyncio.create_task(self.warm_up())
+            raise OCREngineUnavailableError("OCR worker crashed, please retry")
+
+        ocr_metrics.merge(recorded)
+        return result
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "mode": "process" if self.uses_processes else "thread",
+            "workers": self.workers,
+            "torch_threads": self.torch_threads,
+            "opencv_threads": self.opencv_threads,
+            "job_timeout": self.job_timeout,
+            "worker_status": self.worker_status,
+        }
+
+
+ocr_engine = OCREngine(
+    workers=settings.OCR_WORKERS,
+    torch_threads=settings.OCR_TORCH_THREADS,
+    opencv_threads=settings.OCR_OPENCV_THREADS,
+    job_timeout=settings.OCR_JOB_TIMEOUT_SECONDS,
+    preload_languages=(
+        parse_language_sets(settings.OCR_PRELOAD_LANGUAGES)
+        if settings.OCR_PRELOAD
+        else []
+    ),
+    start_method=settings.OCR_START_METHOD,
+)
@@ -0,0 +1,68 @@
+# Exceptions the API maps to responses. Kept free of the OCR stack's
+# imports (cv2, torch, easyocr) so routers can import them cheaply.
+
+QUALITY_MESSAGES = {
+    "too_small": "The photo resolution is too low. Please take a closer photo.",
+    "blurry": "The photo is too blurry. Please hold the camera steady and retake it.",
+    "too_dark": "The photo is too dark. Please retake it in better light.",
+    "overexposed": "The photo is washed out or has glare. Please retake it "
+    "without direct light on the document.",
+    "card_too_small": "The card fills too little of the photo. Please move "
+    "closer so the card fills the frame.",
+}
+
+
+class OCRError(Exception):
+    """Base of the errors the API answers with status_code (see main.py)"""
+
+    status_code = 500
+
+
+class ImageQualityError(OCRError):
+    """An upload too poor to OCR; reason is one of QUALITY_MESSAGES' keys"""
+
+    status_code = 422
+
+    def __init__(self, reason, scores):
+        super().__init__(reason, scores)
+        self.reason = reason
+        self.scores = scores
+        self.message = QUALITY_MESSAGES[reason]
+
+    def __str__(self):
+        return self.message
+
+    def detail(self):
+        """HTTPException detail in the API's {"message", "errors"} format"""
+        return {
+            "message": self.message,
+            "errors": {"image": [self.message]},
+            "reason": self.reason,
+            "quality": self.scores,
+        }
+
+
+class OCRBusyError(OCRError):
+    """OCR admission refused a request; retry_after is in whole seconds"""
+
+    status_code = 503
+
+    def __init__(self, message, retry_after):
+        super().__init__(message, retry_after)
+        self.message = message
+        self.retry_after = retry_after
+
+    def __str__(self):
+        return self.message
+
+
+class OCRTimeoutError(OCRError):
+    """An OCR job ran past its deadline"""
+
+    status_code = 504
+
+
+class OCREngineUnavailableError(OCRError):
+    """The OCR worker pool is down or a worker crashed"""
+
+    status_code = 503
@@ -0,0 +1,340 @@
+import bisect
+import re
+from collections import defaultdict
+
+import numpy as np
+from rapidfuzz import fuzz, process
+
+NOT_FOUND = "Not Found"
+
+# 13 digits, grouped 5-7-1 with whatever separator OCR read in between
+CNIC_PATTERN = r"\d{5}\D?\d{7}\D?\d"
+
+
+def format_cnic(text):
+    digits = re.sub(r"\D", "", text)
+    if len(digits) != 13:
+        return None
+    return f"{digits[:5]}-{digits[5:12]}-{digits[12]}"
+
+
+class Token:
+    """One OCR result (EasyOCR's four-point box), with its extents and centre"""
+
+    __slots__ = ("text", "confidence", "x", "y", "x0", "x1", "y0", "y1")
+
+    def __init__(self, bbox, text, confidence):
+        (ax, ay), (bx, by), (cx, cy), (dx, dy) = bbox
+        self.x0, self.x1 = min(ax, bx, cx, dx), max(ax, bx, cx, dx)
+        self.y0, self.y1 = min(ay, by, cy, dy), max(ay, by, cy, dy)
+        self.x = (ax + bx + cx + dx) / 4
+        self.y = (ay + by + cy + dy) / 4
+        self.text = text.strip()
+        self.confidence = confidence
+
+
+class FieldSpec:
+    """
+    One field of a document.
+
+    labels are the printed label's synonyms; relation says where the value
+    sits relative to a label:
+
+    - "next": the next token in reading order
+    - "right": the nearest token to the right on the same line
+    - "below": the nearest token underneath that overlaps it horizontally
+    - "following": all text after the label up to the next label
+
+    A value must contain a match of pattern (when given); normalize turns the
+    matched text into the field value or rejects it by returning None.
+    Fields with anywhere=True fall back to the first match of pattern in the
+    whole text (pick chooses among all matches instead); whole_token=True
+    matches pattern against entire tokens rather than running text.
+    multiple=True keeps every match as a list. Fields whose name starts
+    with "_" are collected for the document's resolver but not returned.
+    """
+
+    def __init__(
+        self,
+        name,
+        labels=(),
+        pattern=None,
+        relation="next",
+        anywhere=False,
+        whole_token=False,
+        multiple=False,
+        normalize=None,
+        pick=None,
+        flags=0,
+    ):
+        self.name = name
+        self.labels = labels
+        self.pattern = pattern
+        self.relation = relation
+        self.anywhere = anywhere
+        self.whole_token = whole_token
+        self.multiple = multiple
+        self.normalize = normalize
+        self.pick = pick
+        self.flags = flags
+        self.regex = re.compile(pattern, flags) if pattern else None
+
+    def value_from(self, text):
+        if self.regex is not None:
+            match = self.regex.search(text)
+            if not match:
+                return None
+            text = match.group()
+        text = text.strip()
+        if not text:
+            return None
+        return self.normalize(text) if self.normalize else text
+
+
+def _label_pattern(label):
+    return r"\s+".join(re.escape(word) for word in label.split())
+
+
+def _group(prefix, index, pattern, flags):
+    pattern = f"(?{_inline_flags(flags)}:{pattern})" if flags else f"(?:{pattern})"
+    return f"(?P<{prefix}{index}>{pattern})"
+
+
+def _inline_flags(flags):
+    return ("i" if flags & re.IGNORECASE else "") + ("s" if flags & re.DOTALL else "")
+
+
+class Extraction:
+    """What DocumentSpec.extract() found, for document-specific resolvers"""
+
+    def __init__(self, fields, found, tokens, texts):
+        self.fields = fields
+        self.found = found
+        self.tokens = tokens
+        self.texts = texts
+
+
+class DocumentSpec:
+    """
+    A document's fields as data, compiled once.
+
+    All label synonyms become one alternation (longest first, so "father
+    name" wins over "name"), the anywhere patterns another and the
+    whole-token patterns a third. extract() joins the tokens in reading
+    order and scans that text once per alternation, then resolves each
+    label's value through its relation.
+
+    With fuzzy_labels, labels are matched per token instead, for documents
+    whose printed labels OCR tends to garble: one process.cdist call scores
+    every token against every label with fuzz.partial_ratio, and each token
+    takes its best label scoring at least label_threshold.
+    """
+
+    def __init__(
+        self,
+        fields,
+        stop_labels=(),
+        min_confidence=0.3,
+        order="reading",
+        uppercase=False,
+        fuzzy_labels=False,
+        label_threshold=80,
+        default=NOT_FOUND,
+    ):
+        self.fields = fields
+        self.min_confidence = min_confidence
+        self.order = order
+        self.uppercase = uppercase
+        self.fuzzy_labels = fuzzy_labels
+        self.label_threshold = label_threshold
+        self.default = default
+
+        labels = [(label, field) for field in fields for label in field.labels]
+        labels += [(label, None) for label in stop_labels]
+        labels.sort(key=lambda item: len(item[0]), reverse=True)
+        self._labels = [(label.upper(), field) for label, field in labels]
+        self._label_names = [label for label, _ in self._labels]
+        self._label_lengths = np.array(
+            [len(label) for label in self._label_names], dtype=np.float32
+        )
+        self._label_fields = {f"L{i}": field for i, (_, field) in enumerate(labels)}
+        self._label_regex = (
+            re.compile(
+                # Only positions starting a label's first letter are tried
+                f"(?=[{''.join(sorted({label[0].lower() for label, _ in labels}))}])"
+                + r"\b(?:"
+                + "|".join(
+                    f"(?P<L{i}>{_label_pattern(label)})"
+                    for i, (label, _) in enumerate(labels)
+                )
+                + r")\b",
+                re.IGNORECASE,
+            )
+            if labels
+            else None
+        )
+
+        anywhere = [f for f in fields if f.anywhere and f.regex and not f.whole_token]
+        self._value_fields = {f"V{i}": field for i, field in enumerate(anywhere)}
+        self._value_regex = (
+            re.compile(
+                "|".join(
+                    _group("V", i, field.pattern, field.flags)
+                    for i, field in enumerate(anywhere)
+                )
+            )
+            if anywhere
+            else None
+        )
+
+        whole = [f for f in fields if f.whole_token and f.regex]
+        self._token_fields = {f"W{i}": field for i, field in enumerate(whole)}
+        self._token_regex = (
+            re.compile(
+                "|".join(
+                    _group("W", i, field.pattern, field.flags)
+                    for i, field in enumerate(whole)
+                ),
+                re.IGNORECASE,
+            )
+            if whole
+            else None
+        )
+
+    def tokens(self, results):
+        tokens = [
+            Token(*result[:3])
+            for result in results
+            if self.min_confidence is None or result[2] > self.min_confidence
+        ]
+        if self.order == "confidence":
+            tokens.sort(key=lambda token: token.confidence, reverse=True)
+        else:
+            tokens.sort(key=lambda token: token.y)
+        return tokens
+
+    def _label_hits(self, texts, starts, full_text):
+        """(field or None, token index, start, end) for every label, in text order"""
+        if self._label_regex is None:
+            return []
+        if not self.fuzzy_labels:
+            return [
+                (
+                    self._label_fields[match.lastgroup],
+                    bisect.bisect_right(starts, match.start()) - 1,
+                    match.start(),
+                    match.end(),
+                )
+                for match in self._label_regex.finditer(full_text)
+            ]
+
+        if not texts:
+            return []
+
+        # Every token against every label in one call; scores under the
+        # cutoff come back as 0. One thread: the matrix is a few hundred
+        # short strings, and the OCR pool already runs documents in parallel
+        scores = process.cdist(
+            [text.upper() for text in texts],
+            self._label_names,
+            scorer=fuzz.partial_ratio,
+            score_cutoff=self.label_threshold,
+            workers=1,
+        )
+        # partial_ratio scores a fragment inside a label as a full match, so
+        # a token must be most of a label's length to count
+        lengths = np.fromiter((len(text) for text in texts), dtype=np.float32)
+        scores[lengths[:, None] < 0.75 * self._label_lengths[None, :]] = 0
+
+        best = scores.argmax(axis=1)
+        hits = []
+        for index in np.flatnonzero(scores[np.arange(len(texts)), best]):
+            start = starts[index]
+            field = self._labels[best[index]][1]
+            hits.append((field, int(index), start, start + len(texts[index])))
+        return hits
+
+    def _related_text(self, field, index, end, hits, tokens, texts, full_text):
+        if field.relation == "following":
+            next_start = next((h[2] for h in hits if h[2] >= end), len(full_text))
+            return full_text[end:next_start].strip(" :")
+
+        if field.relation == "next":
+            return texts[index + 1] if index + 1 < len(texts) else None
+
+        label = tokens[index]
+        height = max(1, label.y1 - label.y0)
+        if field.relation == "right":
+            candidates = [
+                (token.x0, i)
+                for i, token in enumerate(tokens)
+                if i != index
+                and abs(token.y - label.y) < height / 2
+                and token.x0 >= label.x
+            ]
+        else:
+            candidates = [
+                (token.y, i)
+                for i, token in enumerate(tokens)
+                if token.y0 > label.y
+                and token.x0 < label.x1
+                and token.x1 > label.x0
+                and token.y - label.y < height * 4
+            ]
+        return texts[min(candidates)[1]] if candidates else None
+
+    def extract(self, results):
+        tokens = self.tokens(results)
+        texts = [
+            token.text.upper() if self.uppercase else token.text for token in tokens
+        ]
+
+        starts = []
+        offset = 0
+        for text in texts:
+            starts.append(offset)
+            offset += len(text) + 1
+        full_text = " ".join(texts)
+
+        found = defaultdict(list)
+        if self._value_regex is not None:
+            for match in self._value_regex.finditer(full_text):
+                field = self._value_fields[match.lastgroup]
+                value = field.value_from(match.group())
+                if value is not None:
+                    found[field.name].append(value)
+
+        if self._token_regex is not None:
+            for text in texts:
+                match = self._token_regex.fullmatch(text)
+                if match:
+                    field = self._token_fields[match.lastgroup]
+                    value = field.value_from(text)
+                    if value is not None:
+                        found[field.name].append(value)
+
+        values = {}
+        hits = self._label_hits(texts, starts, full_text)
+        for field, index, _, end in hits:
+            if field is None or field.name in values:
+                continue
+            text = self._related_text(field, index, end, hits, tokens, texts, full_text)
+            value = field.value_from(text) if text else None
+            if value is not None:
+                values[field.name] = value
+
+        for field in self.fields:
+            if field.name in values or not found[field.name]:
+                continue
+            if field.multiple:
+                values[field.name] = found[field.name]
+            elif field.anywhere or field.whole_token:
+                pick = field.pick or (lambda matches: matches[0])
+                values[field.name] = pick(found[field.name])
+
+        fields = {
+            field.name: values.get(field.name, [] if field.multiple else self.default)
+            for field in self.fields
+            if not field.name.startswith("_")
+        }
+        return Extraction(fields, found, tokens, texts)
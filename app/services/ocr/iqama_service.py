@@ -1,47 +1,39 @@
-import cv2
-import numpy as np
-import easyocr
+import logging
 import re
-from rapidfuzz import fuzz
-import os
-from datetime import datetime
 
-# import arabic_reshaper
-from bidi.algorithm import get_display
-import tempfile
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from pydantic import BaseModel, Field
-from typing import Optional
-
-# from deep_translator import GoogleTranslator
+from app.utils.config import settings
 
+from .Cleaning_OCR import (
+    GREEDY_PASS,
+    detect_text_regions,
+    preprocess_image_enhanced,
+    preprocessing_profile,
+    extract_text_with_multiple_configs,
+    recognize_regions,
+    required_fields_check,
+)
+from .fields import DocumentSpec, FieldSpec
+from .metrics import ocr_metrics
+from .replay import record_ocr_results
+from .reader_registry import get_reader
 
-def preprocess_image_enhanced(image_path, resize_factor=2.5):
-    image = cv2.imread(image_path)
+logger = logging.getLogger(__name__)
 
-    if image is None:
-        raise FileNotFoundError(f"Image not found at {image_path}")
+# import arabic_reshaper
+# from bidi.algorithm import get_display
 
-    if resize_factor != 1.0:
-        image = cv2.resize(
-            image,
-            None,
-            fx=resize_factor,
-            fy=resize_factor,
-            interpolation=cv2.INTER_CUBIC,
-        )
+# from deep_translator import GoogleTranslator
 
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-    denoised = cv2.fastNlMeansDenoising(gray, None, 10, 7, 21)
-    clahe = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8))
-    enhanced = clahe.apply(denoised)
-    kernel = np.array([[-1, -1, -1], [-1, 9, -1], [-1, -1, -1]])
-    sharpened = cv2.filter2D(enhanced, -1, kernel)
-    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 1))
-    morphed = cv2.morphologyEx(sharpened, cv2.MORPH_CLOSE, kernel)
-    final_image = cv2.cvtColor(morphed, cv2.COLOR_GRAY2BGR)
+IQAMA_LANGUAGES = ("ar", "en")
+# Fields that must be read confidently before beam search is skipped
+IQAMA_REQUIRED_FIELDS = ("iqama_number_arabic",)
 
-    return image, final_image
+# Fast mode: the English reader with a digit allowlist over number-shaped boxes
+IQAMA_NUMBER_ALLOWLIST = "0123456789"
+IQAMA_NUMBER_PATTERN = re.compile(r"2\d{9}")
+IQAMA_CANDIDATE_ASPECT = (3, 16)
+IQAMA_CANDIDATES_PER_CALL = 8
+TO_ARABIC_INDIC = str.maketrans("0123456789", "٠١٢٣٤٥٦٧٨٩")
 
 
 # def process_arabic_text(text):
@@ -66,99 +58,114 @@ def preprocess_image_enhanced(image_path, resize_factor=2.5):
 # return None
 
 
-def extract_text_with_multiple_configs(image):
-    reader = easyocr.Reader(["ar", "en"], gpu=False)
-
-    all_results = []
-    try:
-        results1 = reader.readtext(image, detail=1, paragraph=False)
-        all_results.extend(results1)
-    except Exception as e:
-        print(f"Config 1 failed: {e}")
-
-    try:
-        results2 = reader.readtext(
-            image,
-            detail=1,
-            paragraph=False,
-            width_ths=0.5,
-            height_ths=0.5,
-            decoder="beamsearch",
-            beamWidth=5,
+# The most confident token with a run of exactly ten Arabic-Indic digits
+IQAMA_SPEC = DocumentSpec(
+    [
+        FieldSpec(
+            "iqama_number_arabic",
+            pattern=r"(?<![٠-٩])[٠-٩]{10}(?![٠-٩])",
+            anywhere=True,
         )
-        all_results.extend(results2)
-    except Exception as e:
-        print(f"Config 2 failed: {e}")
-
-    filtered_results = []
-    for result in all_results:
-        bbox, text, confidence = result[:3]
-        text_clean = text.strip()
-
-        if len(text_clean) > 0 and confidence > 0.3:
-            is_duplicate = False
-            for existing in filtered_results:
-                existing_text = existing[1].strip()
-                existing_bbox = existing[0]
-
-                text_similarity = fuzz.ratio(text_clean.lower(), existing_text.lower())
-
-                pos1 = np.array(bbox[0])
-                pos2 = np.array(existing_bbox[0])
-                distance = np.linalg.norm(pos1 - pos2)
-
-                if text_similarity > 80 and distance < 50:
-                    is_duplicate = True
-                    if confidence > existing[2]:
-                        filtered_results.remove(existing)
-                        break
-                    else:
-                        is_duplicate = True
-                        break
-
-            if not is_duplicate:
-                filtered_results.append(result)
-
-    filtered_results.sort(key=lambda x: x[2], reverse=True)
-
-    for i, result in enumerate(filtered_results):
-        bbox, text, confidence = result[:3]
-
-    return filtered_results
+    ],
+    min_confidence=None,
+    order="confidence",
+    default=None,
+)
 
 
 def extract_iqama_fields(results):
-    extracted_data = {"iqama_number_arabic": None}
-
-    sorted_results = sorted(results, key=lambda x: x[2], reverse=True)
-
-    for i, result in enumerate(sorted_results):
-        bbox, text, confidence = result[:3]
-        text_clean = text.strip()
-
-        if extracted_data["iqama_number_arabic"] is None:
-            arabic_digits = re.findall(r"[٠-٩]+", text_clean)
-            for digit_group in arabic_digits:
-                if len(digit_group) == 10:
-                    extracted_data["iqama_number_arabic"] = digit_group
-                    break
-
-            if extracted_data["iqama_number_arabic"]:
-                break
+    return IQAMA_SPEC.extract(results).fields
+
+
+def is_valid_iqama_number(number):
+    """Iqama numbers are 10 digits, start with 2 and end in a Luhn check digit"""
+    if not IQAMA_NUMBER_PATTERN.fullmatch(number):
+        return False
+    total = 0
+    for i, digit in enumerate(int(d) for d in number):
+        if i % 2 == 0:
+            digit *= 2
+            digit = digit - 9 if digit > 9 else digit
+        total += digit
+    return total % 10 == 0
+
+
+def read_iqama_number_fast(processed_image):
+    """
+    Iqama number (Arabic-Indic digits) read with the English model only, or None.
+
+    Only boxes shaped like a 10-digit number are recognized, with a digit
+    allowlist, a few at a time, stopping at the first valid number.
+    """
+    reader = get_reader(("en",))
+    horizontal_list, _ = detect_text_regions(reader, [processed_image])[0]
+
+    low, high = IQAMA_CANDIDATE_ASPECT
+    candidates = [
+        box
+        for box in horizontal_list
+        if low <= (box[1] - box[0]) / max(1, box[3] - box[2]) <= high
+    ]
+    # Ten digits are roughly seven times wider than tall
+    candidates.sort(
+        key=lambda box: abs((box[1] - box[0]) / max(1, box[3] - box[2]) - 7)
+    )
+
+    config = {**GREEDY_PASS, "allowlist": IQAMA_NUMBER_ALLOWLIST}
+    for start in range(0, len(candidates), IQAMA_CANDIDATES_PER_CALL):
+        chunk = candidates[start : start + IQAMA_CANDIDATES_PER_CALL]
+        for _, text, _ in recognize_regions(
+            reader, processed_image, (chunk, []), config, 1, len(chunk)
+        ):
+            digits = re.sub(r"\D", "", text)
+            for match in IQAMA_NUMBER_PATTERN.finditer(digits):
+                if is_valid_iqama_number(match.group()):
+                    return match.group().translate(TO_ARABIC_INDIC)
+
+    return None
+
+
+def extract_iqama_fast(image, processed_image=None):
+    """Fields from the fast mode, or None when it found no valid number"""
+    if not settings.OCR_IQAMA_FAST:
+        return None
+
+    if processed_image is None:
+        _, processed_image = preprocess_image_enhanced(
+            image, profile=preprocessing_profile("iqama_front")
+        )
 
-    if extracted_data["iqama_number_arabic"] is None:
-        all_text = " ".join([result[1].strip() for result in sorted_results])
-        arabic_numbers = re.findall(r"[٠-٩]{10}", all_text)
-        if arabic_numbers:
-            extracted_data["iqama_number_arabic"] = arabic_numbers[0]
+    try:
+        number = read_iqama_number_fast(processed_image)
+    except Exception as e:
+        logger.warning("Iqama fast mode failed: %s", e, exc_info=True)
+        number = None
 
-    return extracted_data
+    ocr_metrics.increment(f"ocr.iqama.fast_{'hit' if number else 'miss'}")
+    return {"iqama_number_arabic": number} if number else None
 
 
-def process_iqama_front(image_path):
+def process_iqama_front(image):
+    """image may be a file path, encoded image bytes or a decoded numpy array"""
     try:
-        original_image, processed_image = preprocess_image_enhanced(image_path)
-        ocr_results = extract_text_with_multiple_configs(processed_image)
+        # Text height is measured with the English reader's detector, so the
+        # Arabic model still only loads when the fast mode fails
+        original_image, processed_image = preprocess_image_enhanced(
+            image, profile=preprocessing_profile("iqama_front"), languages=("en",)
+        )
+
+        # The Arabic model is only loaded when the fast mode finds nothing
+        fast_data = extract_iqama_fast(original_image, processed_image)
+        if fast_data:
+            return fast_data
+
+        ocr_results = extract_text_with_multiple_configs(
+            processed_image,
+            languages=IQAMA_LANGUAGES,
+            has_required_fields=required_fields_check(
+                extract_iqama_fields, IQAMA_REQUIRED_FIELDS
+            ),
+        )
 
         if not ocr_results:
             print("No text detected in the image")
@@ -167,6 +174,7 @@ def process_iqama_front(image_path):
         extracted_data = extract_iqama_fields(ocr_results)
 
         filtered_data = {k: v for k, v in extracted_data.items() if v is not None}
+        record_ocr_results("iqama_front", ocr_results, filtered_data or None)
 
         if not filtered_data:
             return None
@@ -0,0 +1,139 @@
+import cv2
+import numpy as np
+
+from .Cleaning_OCR import GREEDY_PASS, detect_text_regions, recognize_regions
+from .metrics import ocr_metrics
+from .reader_registry import get_reader
+
+# ID-1 cards (CNIC, NICOP, Iqama) are 85.60 x 53.98 mm
+ID1_ASPECT_RATIO = 85.60 / 53.98
+
+
+class CardLayout:
+    """
+    Where each field sits on a card, as (x0, y0, x1, y1) fractions of the
+    rectified card. Cards are warped to width x width / aspect_ratio px.
+    """
+
+    def __init__(self, name, fields, width=1280, aspect_ratio=ID1_ASPECT_RATIO):
+        self.name = name
+        self.fields = fields
+        self.width = width
+        self.height = int(round(width / aspect_ratio))
+        self.aspect_ratio = aspect_ratio
+
+    def field_at(self, x, y):
+        fx, fy = x / self.width, y / self.height
+        for field, (x0, y0, x1, y1) in self.fields.items():
+            if x0 <= fx <= x1 and y0 <= fy <= y1:
+                return field
+        return None
+
+
+def order_corners(points):
+    """Order four points as top-left, top-right, bottom-right, bottom-left"""
+    points = np.asarray(points, dtype=np.float32)
+    sums = points.sum(axis=1)
+    diffs = np.diff(points, axis=1).ravel()
+    return np.array(
+        [
+            points[np.argmin(sums)],
+            points[np.argmin(diffs)],
+            points[np.argmax(sums)],
+            points[np.argmax(diffs)],
+        ],
+        dtype=np.float32,
+    )
+
+
+def find_card(image, aspect_ratio=ID1_ASPECT_RATIO, min_area=0.2, thumbnail=800):
+    """
+    Corners of the card in a photo, or None.
+
+    Looks for the largest convex quadrilateral covering at least min_area of
+    the image on an edge map of a thumbnail. A photo already cropped to the
+    card has no such contour, so an image with the card's aspect ratio is
+    taken as the card itself.
+    """
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    height, width = gray.shape
+    scale = min(1.0, thumbnail / max(height, width))
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    edges = cv2.Canny(cv2.GaussianBlur(small, (5, 5), 0), 50, 150)
+    edges = cv2.dilate(edges, np.ones((3, 3), np.uint8))
+    contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    for contour in sorted(contours, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contour) < min_area * small.size:
+            break
+        approx = cv2.approxPolyDP(contour, 0.02 * cv2.arcLength(contour, True), True)
+        if len(approx) == 4 and cv2.isContourConvex(approx):
+            return order_corners(approx.reshape(4, 2) / scale)
+
+    if abs(width / height - aspect_ratio) / aspect_ratio < 0.12:
+        return order_corners([[0, 0], [width, 0], [width, height], [0, height]])
+    return None
+
+
+def rectify_card(image, corners, layout):
+    """Warp the card to the layout's size; None if it is not landscape"""
+    top_left, top_right, bottom_right, bottom_left = corners
+    card_width = max(
+        np.linalg.norm(top_right - top_left), np.linalg.norm(bottom_right - bottom_left)
+    )
+    card_height = max(
+        np.linalg.norm(bottom_left - top_left), np.linalg.norm(bottom_right - top_right)
+    )
+    if card_width < card_height:
+        return None
+
+    target = np.array(
+        [[0, 0], [layout.width, 0], [layout.width, layout.height], [0, layout.height]],
+        dtype=np.float32,
+    )
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(image, matrix, (layout.width, layout.height))
+
+
+def read_layout_fields(image, layout, languages=("en",)):
+    """
+    OCR only the field regions of a card.
+
+    Returns field -> text (tokens joined in reading order), or None when no
+    card is found. Detection runs on the rectified card alone and only the
+    boxes whose centre falls inside a field region are recognized.
+    """
+    corners = find_card(image, layout.aspect_ratio)
+    card = rectify_card(image, corners, layout) if corners is not None else None
+    if card is None:
+        ocr_metrics.increment(f"ocr.layout.{layout.name}.no_card")
+        return None
+
+    gray = cv2.cvtColor(card, cv2.COLOR_BGR2GRAY) if card.ndim == 3 else card
+    gray = cv2.createCLAHE(clipLimit=2.0, tileGridSize=(8, 8)).apply(gray)
+
+    reader = get_reader(languages)
+    horizontal_list, free_list = detect_text_regions(reader, [gray])[0]
+
+    field_boxes = []
+    for box in horizontal_list:
+        x_min, x_max, y_min, y_max = box
+        if layout.field_at((x_min + x_max) / 2, (y_min + y_max) / 2):
+            field_boxes.append(box)
+
+    tokens = {field: [] for field in layout.fields}
+    for bbox, text, _ in recognize_regions(
+        reader, gray, (field_boxes, []), GREEDY_PASS, 1, len(field_boxes) or 1
+    ):
+        xs = [point[0] for point in bbox]
+        ys = [point[1] for point in bbox]
+        x, y = sum(xs) / len(xs), sum(ys) / len(ys)
+        field = layout.field_at(x, y)
+        if field and text.strip():
+            tokens[field].append((round(y / 20), x, text.strip()))
+
+    return {
+        field: " ".join(text for _, _, text in sorted(items))
+        for field, items in tokens.items()
+    }
@@ -0,0 +1,48 @@
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+
+class OCRMetrics:
+    """
+    Process-local OCR counters.
+
+    Pool processes record into their own instance; the engine captures what a
+    job recorded and merges it into the API process, so snapshot() there
+    covers every worker.
+    """
+
+    def __init__(self):
+        self._counters = Counter()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counters[name] += amount
+        for captured in getattr(self._local, "captures", ()):
+            captured[name] += amount
+
+    def merge(self, counters):
+        with self._lock:
+            self._counters.update(counters)
+
+    @contextmanager
+    def capture(self):
+        """Collect the increments made by this thread inside the block"""
+        captured = Counter()
+        captures = getattr(self._local, "captures", None)
+        if captures is None:
+            captures = self._local.captures = []
+        captures.append(captured)
+        try:
+            yield captured
+        finally:
+            captures.remove(captured)
+
+    def snapshot(self):
+        with self._lock:
+            return dict(sorted(self._counters.items()))
+
+
+ocr_metrics = OCRMetrics()
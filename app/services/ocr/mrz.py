@@ -0,0 +1,233 @@
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+from .Cleaning_OCR import (
+    BEAM_PASS,
+    GREEDY_PASS,
+    detect_text_regions,
+    recognize_regions,
+)
+from .reader_registry import get_reader
+
+MRZ_ALLOWLIST = "<ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+TD3_LINE_LENGTH = 44
+
+CHECK_DIGIT_WEIGHTS = (7, 3, 1)
+
+# Letters OCR tends to read in place of digits in numeric MRZ fields
+DIGIT_REPAIRS = str.maketrans(
+    {"O": "0", "Q": "0", "D": "0", "I": "1", "L": "1", "Z": "2", "S": "5", "B": "8"}
+)
+
+NATIONALITIES = {"PAK": "PAKISTANI"}
+ISSUING_STATES = {"PAK": "PAKISTAN"}
+
+
+def mrz_char_value(char):
+    if char.isdigit():
+        return int(char)
+    if "A" <= char <= "Z":
+        return ord(char) - ord("A") + 10
+    return 0
+
+
+def check_digit(value):
+    """ICAO 9303 check digit: weights 7, 3, 1 repeating, sum mod 10"""
+    total = sum(
+        mrz_char_value(char) * CHECK_DIGIT_WEIGHTS[i % 3]
+        for i, char in enumerate(value)
+    )
+    return str(total % 10)
+
+
+def locate_mrz_band(gray, search_fraction=0.45):
+    """
+    (top, bottom) rows of the MRZ band in a grayscale passport page, or None.
+
+    A blackhat transform brings out dark characters on the light page in the
+    bottom strip; closing the horizontal gradient with a wide kernel merges
+    each MRZ line into one long, thin blob.
+    """
+    height, width = gray.shape
+    strip_top = int(height * (1 - search_fraction))
+    strip = cv2.GaussianBlur(gray[strip_top:], (3, 3), 0)
+
+    char_height = max(3, width // 60)
+    rect_kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT, (char_height * 3, char_height)
+    )
+    square_kernel = cv2.getStructuringElement(
+        cv2.MORPH_RECT, (char_height * 2, char_height * 2)
+    )
+
+    blackhat = cv2.morphologyEx(strip, cv2.MORPH_BLACKHAT, rect_kernel)
+    gradient = np.absolute(cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1))
+    gradient = cv2.normalize(gradient, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+    gradient = cv2.morphologyEx(gradient, cv2.MORPH_CLOSE, rect_kernel)
+    _, thresh = cv2.threshold(gradient, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    thresh = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, square_kernel)
+    thresh = cv2.erode(thresh, None, iterations=2)
+
+    contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    bands = []
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if w >= 0.5 * width and w / max(h, 1) > 5:
+            bands.append((y, y + h))
+
+    if not bands:
+        return None
+
+    # The MRZ is the bottom-most group of wide lines; stop at the first gap
+    # larger than three line heights
+    bands.sort()
+    top, bottom = bands[-1]
+    for y0, y1 in reversed(bands[:-1]):
+        if top - y1 > 3 * (y1 - y0):
+            break
+        top = y0
+    padding = (bottom - top) // 4 + char_height // 2
+    return max(0, strip_top + top - padding), min(height, strip_top + bottom + padding)
+
+
+def read_mrz_lines(reader, band, config):
+    """Recognize the band and join its tokens into MRZ lines, top to bottom"""
+    regions = detect_text_regions(reader, [band])[0]
+    results = recognize_regions(reader, band, regions, config, 1, 16)
+
+    rows = []
+    for bbox, text, _ in sorted(results, key=lambda r: r[0][0][1]):
+        y = (bbox[0][1] + bbox[2][1]) / 2
+        line_height = max(1, bbox[2][1] - bbox[0][1])
+        if rows and abs(rows[-1][0] - y) < line_height / 2:
+            rows[-1][1].append((bbox[0][0], text))
+        else:
+            rows.append((y, [(bbox[0][0], text)]))
+
+    return [
+        "".join(text for _, text in sorted(tokens)).replace(" ", "").upper()
+        for _, tokens in rows
+    ]
+
+
+def _fit(line):
+    return line[:TD3_LINE_LENGTH].ljust(TD3_LINE_LENGTH, "<")
+
+
+def _mrz_date(value, future):
+    try:
+        parsed = datetime.strptime(value, "%y%m%d")
+    except ValueError:
+        return None
+    # %y maps 00-68 to 20xx; a birth date can never be in the future
+    if not future and parsed > datetime.now():
+        parsed = parsed.replace(year=parsed.year - 100)
+    return parsed.strftime("%d %b %Y").upper()
+
+
+def parse_td3(line1, line2):
+    """
+    Fields of a TD3 (passport) MRZ, or None unless every check digit holds.
+
+    Digit fields are repaired for common letter/digit confusions before
+    validation; names and codes are taken as read.
+    """
+    line1, line2 = _fit(line1), _fit(line2)
+    if not line1.startswith("P"):
+        return None
+
+    number = line2[0:9]
+    number_check = line2[9].translate(DIGIT_REPAIRS)
+    birth = line2[13:19].translate(DIGIT_REPAIRS)
+    birth_check = line2[19].translate(DIGIT_REPAIRS)
+    expiry = line2[21:27].translate(DIGIT_REPAIRS)
+    expiry_check = line2[27].translate(DIGIT_REPAIRS)
+    personal = line2[28:42]
+    personal_check = line2[42].translate(DIGIT_REPAIRS)
+    final_check = line2[43].translate(DIGIT_REPAIRS)
+
+    if check_digit(number) != number_check:
+        return None
+    if check_digit(birth) != birth_check or check_digit(expiry) != expiry_check:
+        return None
+    if personal.strip("<") and check_digit(personal) != personal_check.replace(
+        "<", "0"
+    ):
+        return None
+    composite = (
+        number
+        + number_check
+        + birth
+        + birth_check
+        + expiry
+        + expiry_check
+        + personal
+        + personal_check
+    )
+    if check_digit(composite) != final_check:
+        return None
+
+    date_of_birth = _mrz_date(birth, future=False)
+    date_of_expiry = _mrz_date(expiry, future=True)
+    if not date_of_birth or not date_of_expiry:
+        return None
+
+    issuing_state = line1[2:5].replace("<", "")
+    nationality = line2[10:13].replace("<", "")
+    surname, _, given_names = line1[5:].partition("<<")
+    personal_digits = personal.replace("<", "")
+    sex = line2[20]
+
+    return {
+        "type": line1[0],
+        "country_code": issuing_state,
+        "passport_number": number.replace("<", ""),
+        "surname": surname.replace("<", " ").strip() or "Not Found",
+        "given_names": given_names.replace("<", " ").strip() or "Not Found",
+        "nationality": NATIONALITIES.get(nationality, nationality),
+        "citizenship_number": (
+            f"{personal_digits[:5]}-{personal_digits[5:12]}-{personal_digits[12]}"
+            if len(personal_digits) == 13 and personal_digits.isdigit()
+            else "Not Found"
+        ),
+        "sex": sex if sex in ("M", "F") else "Not Found",
+        "date_of_birth": date_of_birth,
+        "date_of_expiry": date_of_expiry,
+        "issuing_authority": ISSUING_STATES.get(issuing_state, issuing_state),
+        "mrz_lines": [line1, line2],
+    }
+
+
+def read_passport_mrz(gray):
+    """
+    Locate and decode the MRZ of a grayscale passport page.
+
+    Returns (fields, band_top): fields is None unless a TD3 MRZ with valid
+    check digits was read; band_top is the first row of the band (or None),
+    so the caller can limit further OCR to the page above it. A greedy read
+    is tried first and beam search only when it fails validation.
+    """
+    band_rows = locate_mrz_band(gray)
+    if band_rows is None:
+        return None, None
+
+    top, bottom = band_rows
+    band = gray[top:bottom]
+    reader = get_reader(("en",))
+
+    for config in (GREEDY_PASS, BEAM_PASS):
+        lines = [
+            line
+            for line in read_mrz_lines(
+                reader, band, {**config, "allowlist": MRZ_ALLOWLIST}
+            )
+            if len(line) >= TD3_LINE_LENGTH - 6
+        ]
+        for line1, line2 in zip(lines, lines[1:]):
+            fields = parse_td3(line1, line2)
+            if fields:
+                return fields, top
+
+    return None, top
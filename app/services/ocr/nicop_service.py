@@ -1,29 +1,201 @@
-import cv2
-import numpy as np
-import easyocr
+import logging
 import re
-from rapidfuzz import fuzz
 import os
 from datetime import datetime
-from .Cleaning_OCR import preprocess_image_enhanced, extract_text_with_multiple_configs
+from app.utils.config import settings
+
+from .Cleaning_OCR import (
+    load_image,
+    preprocess_image_enhanced,
+    preprocessing_profile,
+    extract_text_with_multiple_configs,
+    required_fields_check,
+)
+from .dates import DATE_PATTERN, parse_ocr_date
+from .fields import CNIC_PATTERN, DocumentSpec, FieldSpec, format_cnic
+from .layout import CardLayout, read_layout_fields
+from .metrics import ocr_metrics
+from .replay import record_ocr_results
+
+logger = logging.getLogger(__name__)
+
+# Fields that must be read confidently before beam search is skipped
+NICOP_FRONT_REQUIRED_FIELDS = (
+    "cnic_number",
+    "date_of_birth",
+    "date_of_issue",
+    "date_of_expiry",
+)
+NICOP_BACK_REQUIRED_FIELDS = ("present_address", "permanent_address")
+
+# Field regions of the NADRA smart card, as fractions of the rectified card.
+# Value lines only: the printed labels sit just above each region.
+NICOP_FRONT_LAYOUT = CardLayout(
+    "nicop_front",
+    {
+        "name": (0.02, 0.24, 0.66, 0.35),
+        "father_name": (0.02, 0.40, 0.66, 0.51),
+        "gender": (0.02, 0.56, 0.18, 0.65),
+        "country": (0.20, 0.56, 0.66, 0.65),
+        "cnic_number": (0.02, 0.69, 0.34, 0.78),
+        "date_of_birth": (0.35, 0.69, 0.66, 0.78),
+        "date_of_issue": (0.02, 0.82, 0.34, 0.91),
+        "date_of_expiry": (0.35, 0.82, 0.66, 0.91),
+    },
+)
+NICOP_BACK_LAYOUT = CardLayout(
+    "nicop_back",
+    {
+        "present_address": (0.02, 0.06, 0.72, 0.38),
+        "permanent_address": (0.02, 0.40, 0.72, 0.72),
+    },
+)
+
+LAYOUT_LABEL_PATTERN = re.compile(
+    r"\b(?:father\s+name|name|gender|country\s+of\s+stay|present\s+address|"
+    r"permanent\s+address)\b\s*:?",
+    re.IGNORECASE,
+)
+NICOP_DATE_FORMAT = "%d.%m.%Y"
+
+
+def _layout_date(text):
+    parsed = parse_ocr_date(text)
+    return parsed.strftime(NICOP_DATE_FORMAT) if parsed else "Not Found"
+
+
+def _layout_cnic(text):
+    digits = re.sub(r"\D", "", text)
+    if len(digits) != 13:
+        return "Not Found"
+    return f"{digits[:5]}-{digits[5:12]}-{digits[12]}"
+
+
+def _layout_gender(text):
+    text = text.upper().strip()
+    if text in ("M", "MALE"):
+        return "M"
+    if text in ("F", "FEMALE"):
+        return "F"
+    return "Not Found"
+
+
+def _layout_name(text):
+    text = re.sub(r"[^A-Za-z' -]", "", LAYOUT_LABEL_PATTERN.sub("", text)).strip()
+    return text if len(text) > 2 else "Not Found"
+
+
+def _layout_country(text):
+    text = _layout_name(text)
+    return text.title() if text != "Not Found" else text
+
+
+def _layout_address(text):
+    text = re.sub(r"\s+", " ", LAYOUT_LABEL_PATTERN.sub("", text)).strip(" :,")
+    return text or "Not Found"
+
+
+NICOP_FRONT_LAYOUT_PARSERS = {
+    "name": _layout_name,
+    "father_name": _layout_name,
+    "gender": _layout_gender,
+    "country": _layout_country,
+    "cnic_number": _layout_cnic,
+    "date_of_birth": _layout_date,
+    "date_of_issue": _layout_date,
+    "date_of_expiry": _layout_date,
+}
+NICOP_BACK_LAYOUT_PARSERS = {
+    "present_address": _layout_address,
+    "permanent_address": _layout_address,
+}
+
+
+def _layout_dates_plausible(info):
+    """The layout's dates fall in NICOP order, so a misaligned crop is not trusted"""
+    birth, issue, expiry = (
+        datetime.strptime(info[field], NICOP_DATE_FORMAT).date()
+        for field in NICOP_DATE_FIELDS
+    )
+    return plausible_nicop_dates(birth, issue, expiry)
+
+
+def extract_with_layout(image, layout, parsers, required_fields, check=None):
+    """
+    Read a card through its layout template.
+
+    Returns the parsed fields, or None when the card is not found, a
+    required field does not parse or check(fields) fails, so the caller can
+    fall back to full-image OCR.
+    """
+    if not settings.OCR_LAYOUT_TEMPLATES:
+        return None
+
+    try:
+        raw_fields = read_layout_fields(image, layout)
+    except Exception as e:
+        logger.warning("Layout OCR failed: %s", e, exc_info=True)
+        raw_fields = None
+
+    if raw_fields is not None:
+        info = {field: parse(raw_fields[field]) for field, parse in parsers.items()}
+        if all(info[field] != "Not Found" for field in required_fields):
+            if check is None or check(info):
+                ocr_metrics.increment(f"ocr.layout.{layout.name}.hit")
+                return info
+            ocr_metrics.increment(f"ocr.layout.{layout.name}.implausible")
+
+    ocr_metrics.increment(f"ocr.layout.{layout.name}.fallback")
+    return None
 
 
-def process_nicop_front_improved(image_path, output_image_path):
+def extract_nicop_front_with_layout(image):
+    return extract_with_layout(
+        image,
+        NICOP_FRONT_LAYOUT,
+        NICOP_FRONT_LAYOUT_PARSERS,
+        NICOP_FRONT_REQUIRED_FIELDS,
+        check=_layout_dates_plausible,
+    )
+
+
+def extract_nicop_back_with_layout(image):
+    return extract_with_layout(
+        image,
+        NICOP_BACK_LAYOUT,
+        NICOP_BACK_LAYOUT_PARSERS,
+        NICOP_BACK_REQUIRED_FIELDS,
+    )
+
+
+def process_nicop_front_improved(image, output_image_path=None):
+    """image may be a file path, encoded image bytes or a decoded numpy array"""
     try:
-        if not os.path.exists(image_path):
-            print(f"Error: Image file '{image_path}' not found!")
+        if isinstance(image, str) and not os.path.exists(image):
+            print(f"Error: Image file '{image}' not found!")
             return None
 
+        image = load_image(image)
+        extracted_info = extract_nicop_front_with_layout(image)
+        if extracted_info:
+            return extracted_info
+
         original_image, processed_image = preprocess_image_enhanced(
-            image_path, resize_factor=2.5
+            image, profile=preprocessing_profile("nicop_front"), languages=("en",)
+        )
+        results = extract_text_with_multiple_configs(
+            processed_image,
+            has_required_fields=required_fields_check(
+                extract_nicop_fields_improved, NICOP_FRONT_REQUIRED_FIELDS
+            ),
         )
-        results = extract_text_with_multiple_configs(processed_image)
 
         if not results:
             print("No text extracted!")
             return None
 
         extracted_info = extract_nicop_fields_improved(results)
+        record_ocr_results("nicop_front", results, extracted_info)
 
         return extracted_info
 
@@ -35,278 +207,192 @@ def process_nicop_front_improved(image_path, output_image_path):
         return None
 
 
-def extract_nicop_fields_improved(results):
-    text_items = []
-    for result in results:
-        bbox, text, confidence = result[:3]
-        if confidence > 0.3:
-            x = int(np.mean([point[0] for point in bbox]))
-            y = int(np.mean([point[1] for point in bbox]))
-            text_items.append(
-                {
-                    "text": text.strip(),
-                    "x": x,
-                    "y": y,
-                    "confidence": confidence,
-                    "bbox": bbox,
-                }
-            )
-
-    text_items.sort(key=lambda item: item["y"])
-
-    all_texts = [item["text"] for item in text_items]
-    full_text = " ".join(all_texts)
-
-    info = {
-        "name": "Not Found",
-        "father_name": "Not Found",
-        "gender": "Not Found",
-        "country": "Not Found",
-        "cnic_number": "Not Found",
-        "date_of_birth": "Not Found",
-        "date_of_issue": "Not Found",
-        "date_of_expiry": "Not Found",
-    }
+COUNTRIES = {
+    "saudi arabia": "Saudi Arabia",
+    "saudi": "Saudi Arabia",
+    "pakistan": "Pakistan",
+    "uae": "UAE",
+    "kuwait": "Kuwait",
+    "qatar": "Qatar",
+}
+COUNTRY_PREFERENCE = list(dict.fromkeys(COUNTRIES.values()))
+
+# Card furniture that is never part of a name
+NAME_SKIP_PATTERN = re.compile(
+    r"\d|pakistan|national|identity|card|islamic|republic|gender|country|stay|"
+    r"number|birth|issue|expiry|holder|signature|present|permanent|address|"
+    r"registrar|ordinance|section",
+    re.IGNORECASE,
+)
+NICOP_DATE_FIELDS = ("date_of_birth", "date_of_issue", "date_of_expiry")
+
+
+def _name(text):
+    words = text.split()
+    if NAME_SKIP_PATTERN.search(text) or len(words) < 2 or len(text) <= 4:
+        return None
+    if not all(
+        word.replace("'", "").replace("-", "").isalpha() and word[0].isupper()
+        for word in words
+    ):
+        return None
+    return text
+
+
+NICOP_FRONT_SPEC = DocumentSpec(
+    [
+        FieldSpec("name", labels=("name",), relation="below", normalize=_name),
+        FieldSpec(
+            "father_name",
+            labels=("father name", "husband name"),
+            relation="below",
+            normalize=_name,
+        ),
+        FieldSpec(
+            "gender",
+            labels=("gender",),
+            pattern=r"^(?:M|F|MALE|FEMALE)$",
+            relation="below",
+            whole_token=True,
+            normalize=lambda text: text[0].upper(),
+            flags=re.IGNORECASE,
+        ),
+        FieldSpec(
+            "country",
+            labels=("country of stay",),
+            pattern="|".join(COUNTRIES),
+            relation="below",
+            anywhere=True,
+            normalize=lambda text: COUNTRIES[text.lower()],
+            pick=lambda found: min(found, key=COUNTRY_PREFERENCE.index),
+            flags=re.IGNORECASE,
+        ),
+        FieldSpec(
+            "cnic_number",
+            labels=("identity number",),
+            pattern=CNIC_PATTERN,
+            relation="below",
+            anywhere=True,
+            normalize=format_cnic,
+        ),
+        FieldSpec(
+            "date_of_birth",
+            labels=("date of birth",),
+            pattern=DATE_PATTERN,
+            relation="below",
+            normalize=parse_ocr_date,
+            flags=re.IGNORECASE,
+        ),
+        FieldSpec(
+            "date_of_issue",
+            labels=("date of issue",),
+            pattern=DATE_PATTERN,
+            relation="below",
+            normalize=parse_ocr_date,
+            flags=re.IGNORECASE,
+        ),
+        FieldSpec(
+            "date_of_expiry",
+            labels=("date of expiry",),
+            pattern=DATE_PATTERN,
+            relation="below",
+            normalize=parse_ocr_date,
+            flags=re.IGNORECASE,
+        ),
+        FieldSpec(
+            "_dates",
+            pattern=DATE_PATTERN,
+            anywhere=True,
+            multiple=True,
+            normalize=parse_ocr_date,
+            flags=re.IGNORECASE,
+        ),
+    ]
+)
 
-    cnic_candidates = re.findall(r"(\d{5}[^\d]?\d{7}[^\d]?\d{1})", full_text)
-
-    for candidate in cnic_candidates:
-        digits = re.sub(r"[^\d]", "", candidate)
-        if len(digits) == 13:
-            info["cnic_number"] = f"{digits[:5]}-{digits[5:12]}-{digits[12]}"
-            break
-
-    if info["cnic_number"] == "Not Found":
-        matches = re.findall(r"\b\d{13}\b", full_text)
-        for match in matches:
-            info["cnic_number"] = f"{match[:5]}-{match[5:12]}-{match[12]}"
-            break
-
-    date_pattern = r"(\d{1,2})(?:[.\-/, ]+)(\d{1,2})(?:[.\-/,]+)(\d{4})|(\d{8})"
-    dates_found = []
-
-    for match in re.finditer(date_pattern, full_text):
-        date_str = match.group()
-
-        if len(date_str) == 8 and date_str.isdigit():
-            normalized = f"{date_str[:2]}.{date_str[2:4]}.{date_str[4:]}"
-        else:
-            normalized = re.sub(r"[.\-,/ ]+", ".", date_str)
-
-        try:
-            datetime.strptime(normalized, "%d.%m.%Y")
-            dates_found.append(normalized)
-        except:
-            continue
-
-    unique_dates = list(dict.fromkeys(dates_found))
-
-    if unique_dates:
-        try:
-            date_objs = [(d, datetime.strptime(d, "%d.%m.%Y")) for d in unique_dates]
-            date_objs.sort(key=lambda x: x[1])
-
-            if len(date_objs) == 1:
-                info["date_of_birth"] = date_objs[0][0]
-
-            elif len(date_objs) == 2:
-                dob = date_objs[0]
-                other = date_objs[1]
-                diff_years = (other[1] - dob[1]).days / 365.25
-
-                info["date_of_birth"] = dob[0]
-                if 9 <= diff_years <= 11:
-                    info["date_of_issue"] = dob[0]
-                    info["date_of_expiry"] = other[0]
-                else:
-                    info["date_of_issue"] = other[0]
-
-            elif len(date_objs) >= 3:
-                dob = date_objs[0]
-                middle = date_objs[1]
-                last = date_objs[-1]
-
-                diff_issue_expiry = (last[1] - middle[1]).days / 365.25
-
-                info["date_of_birth"] = dob[0]
-                if 9 <= diff_issue_expiry <= 11:
-                    info["date_of_issue"] = middle[0]
-                    info["date_of_expiry"] = last[0]
-                else:
-                    info["date_of_issue"] = middle[0]
-                    info["date_of_expiry"] = last[0]
-
-        except Exception as e:
-            print(f"Date parsing error: {e}")
-
-    for item in text_items:
-        text_upper = item["text"].upper().strip()
-        if text_upper in ["M", "F", "MALE", "FEMALE"]:
-            info["gender"] = "M" if text_upper in ["M", "MALE"] else "F"
-            break
-
-    country_mappings = {
-        "saudi arabia": "Saudi Arabia",
-        "saudi": "Saudi Arabia",
-        "pakistan": "Pakistan",
-        "uae": "UAE",
-        "kuwait": "Kuwait",
-        "qatar": "Qatar",
-    }
 
-    full_text_lower = full_text.lower()
-    for country_key, country_value in country_mappings.items():
-        if country_key in full_text_lower:
-            info["country"] = country_value
-            break
-
-    name_found = False
-    father_name_found = False
-
-    for i, item in enumerate(text_items):
-        text = item["text"].strip()
-
-        skip_patterns = [
-            r"\d",
-            r"pakistan",
-            r"national",
-            r"identity",
-            r"card",
-            r"islamic",
-            r"republic",
-            r"gender",
-            r"country",
-            r"stay",
-            r"number",
-            r"birth",
-            r"issue",
-            r"expiry",
-            r"holder",
-            r"signature",
-            r"present",
-            r"permanent",
-            r"address",
-            r"registrar",
-            r"ordinance",
-            r"section",
-        ]
-
-        if any(re.search(pattern, text, re.IGNORECASE) for pattern in skip_patterns):
-            continue
-
-        words = text.split()
-        if len(words) >= 2 and len(text) > 4:
-            if all(word.replace("'", "").replace("-", "").isalpha() for word in words):
-                if all(word[0].isupper() for word in words if word):
-                    context_before = ""
-                    context_after = ""
-
-                    if i > 0:
-                        context_before = text_items[i - 1]["text"].lower()
-                    if i < len(text_items) - 1:
-                        context_after = text_items[i + 1]["text"].lower()
-
-                    if (
-                        "name" in context_before
-                        and "father" not in context_before
-                        and not name_found
-                    ):
-                        info["name"] = text
-                        name_found = True
-                    elif (
-                        "father" in context_before
-                        or ("name" in context_before and name_found)
-                        and not father_name_found
-                    ):
-                        info["father_name"] = text
-                        father_name_found = True
-                    elif not name_found:
-                        info["name"] = text
-                        name_found = True
-                    elif not father_name_found:
-                        info["father_name"] = text
-                        father_name_found = True
+def _ten_years_apart(issue, expiry):
+    return 9 <= (expiry - issue).days / 365.25 <= 11
+
+
+def plausible_nicop_dates(birth, issue, expiry):
+    """Birth before issue before expiry, with expiry about ten years after issue"""
+    return birth < issue < expiry and _ten_years_apart(issue, expiry)
+
+
+def assign_dates_by_chronology(info, dates):
+    """
+    Fill unlabelled dates from their order: birth first, then issue and
+    expiry, which are ten years apart on a NICOP.
+    """
+    labelled = {info[field] for field in NICOP_DATE_FIELDS}
+    dates = sorted(set(dates) - labelled)
+    missing = [field for field in NICOP_DATE_FIELDS if info[field] == "Not Found"]
+    if not dates or not missing:
+        return
+
+    if len(missing) == 3 and len(dates) == 2:
+        if _ten_years_apart(dates[0], dates[1]):
+            missing = ["date_of_issue", "date_of_expiry"]
+    if len(missing) == 3 and len(dates) >= 3:
+        dates = [dates[0], dates[1], dates[-1]]
+    for field, parsed in zip(missing, dates):
+        info[field] = parsed
+
+
+def extract_nicop_fields_improved(results):
+    extraction = NICOP_FRONT_SPEC.extract(results)
+    info = extraction.fields
+
+    assign_dates_by_chronology(info, extraction.found["_dates"])
+    for field in NICOP_DATE_FIELDS:
+        if info[field] != "Not Found":
+            info[field] = info[field].strftime(NICOP_DATE_FORMAT)
+
+    # Unlabelled names: the card prints the holder's name above the father's
+    names = [
+        text
+        for text in extraction.texts
+        if _name(text) and text not in (info["name"], info["father_name"])
+    ]
+    for field in ("name", "father_name"):
+        if info[field] == "Not Found" and names:
+            info[field] = names.pop(0)
 
     return info
 
 
-def process_nicop_back_improved(image_path, output_image_path):
+def process_nicop_back_improved(image, output_image_path=None):
+    """image may be a file path, encoded image bytes or a decoded numpy array"""
     try:
-        if not os.path.exists(image_path):
-            print(f"Error: Image file '{image_path}' not found!")
+        if isinstance(image, str) and not os.path.exists(image):
+            print(f"Error: Image file '{image}' not found!")
             return None
 
+        image = load_image(image)
+        extracted_info = extract_nicop_back_with_layout(image)
+        if extracted_info:
+            return extracted_info
+
         original_image, processed_image = preprocess_image_enhanced(
-            image_path, resize_factor=2.5
+            image, profile=preprocessing_profile("nicop_back"), languages=("en",)
         )
 
-        results = extract_text_with_multiple_configs(processed_image)
+        results = extract_text_with_multiple_configs(
+            processed_image,
+            has_required_fields=required_fields_check(
+                extract_nicop_back_fields, NICOP_BACK_REQUIRED_FIELDS
+            ),
+        )
 
         if not results:
             print("No text extracted from back!")
             return None
 
-        text_items = []
-        for result in results:
-            bbox, text, confidence = result[:3]
-            if confidence > 0.3:
-                y = int(np.mean([point[1] for point in bbox]))
-                text_items.append(
-                    {"text": text.strip(), "y": y, "confidence": confidence}
-                )
-
-        text_items.sort(key=lambda item: item["y"])
-        all_texts = [item["text"] for item in text_items]
-        combined_text = " ".join(all_texts)
-
-        def clean_address(address):
-            address = re.sub(r"^\s*\d{5}[-\s]?\d{7}[-\s]?\d\s*", "", address)
-            address = re.sub(r"[\s;:,-]*\d{11,15}$", "", address)
-            return address.strip()
-
-        present_address = "Not Found"
-        permanent_address = "Not Found"
-
-        structured_text = ""
-        for i, text in enumerate(all_texts):
-            structured_text += text
-            if i < len(all_texts) - 1:
-                structured_text += " "
-
-        present_patterns = [
-            r"present\s+address\s*:?\s*(.*?)(?=permanent\s+address|the\s+holder|registrar|visa|$)",
-            r"present\s+address\s*:?\s*(.*?)(?=\n.*permanent|\n.*the\s+holder|\n.*registrar|$)",
-        ]
-
-        for pattern in present_patterns:
-            match = re.search(pattern, structured_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                present_address = re.sub(r"\s+", " ", match.group(1).strip())
-                present_address = present_address.replace("H.No.", "H.No.").replace(
-                    "  ", " "
-                )
-                present_address = clean_address(present_address)
-                break
-
-        permanent_patterns = [
-            r"permanent\s+address\s*:?\s*(.*?)(?=the\s+holder|registrar|visa|issued|$)",
-            r"permanent\s+address\s*:?\s*(.*?)(?=\n.*the\s+holder|\n.*registrar|$)",
-        ]
-
-        for pattern in permanent_patterns:
-            match = re.search(pattern, structured_text, re.IGNORECASE | re.DOTALL)
-            if match:
-                permanent_address = re.sub(r"\s+", " ", match.group(1).strip())
-                permanent_address = permanent_address.replace("H.No.", "H.No.").replace(
-                    "  ", " "
-                )
-                permanent_address = clean_address(permanent_address)
-                break
-
-        return {
-            "present_address": present_address,
-            "permanent_address": permanent_address,
-        }
+        extracted_info = extract_nicop_back_fields(results)
+        record_ocr_results("nicop_back", results, extracted_info)
+
+        return extracted_info
 
     except Exception as e:
         print(f"Error processing back image: {str(e)}")
@@ -316,23 +402,39 @@ def process_nicop_back_improved(image_path, output_image_path):
         return None
 
 
-def parse_date_variants(date_str):
-    date_formats = [
-        "%d.%m.%Y",
-        "%d,%m.%Y",
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%m.%d.%Y",
-        "%d.%m,%Y",
-        "%d,%m,%Y",
-    ]
+def _address(text):
+    address = re.sub(r"\s+", " ", text).strip()
+    address = re.sub(r"^\s*\d{5}[-\s]?\d{7}[-\s]?\d\s*", "", address)
+    address = re.sub(r"[\s;:,-]*\d{11,15}$", "", address)
+    return address.strip() or None
 
-    for fmt in date_formats:
-        try:
-            return datetime.strptime(date_str, fmt)
-        except ValueError:
-            continue
-    return None
+
+NICOP_BACK_SPEC = DocumentSpec(
+    [
+        FieldSpec(
+            "present_address",
+            labels=("present address",),
+            relation="following",
+            normalize=_address,
+        ),
+        FieldSpec(
+            "permanent_address",
+            labels=("permanent address",),
+            relation="following",
+            normalize=_address,
+        ),
+    ],
+    stop_labels=("the holder", "registrar", "visa", "issued"),
+)
+
+
+def extract_nicop_back_fields(results):
+    return NICOP_BACK_SPEC.extract(results).fields
+
+
+def parse_date_variants(date_str):
+    parsed = parse_ocr_date(date_str)
+    return datetime.combine(parsed, datetime.min.time()) if parsed else None
 
 
 def clean_ocr_text(text):
@@ -0,0 +1,207 @@
+import math
+
+import cv2
+import numpy as np
+
+from app.utils.config import settings
+
+from .Cleaning_OCR import (
+    GREEDY_PASS,
+    _grayscale,
+    detect_text_regions,
+    recognize_regions,
+)
+from .layout import find_card
+from .metrics import ocr_metrics
+from .reader_registry import get_reader
+
+# Orientation is classified on a thumbnail of this long side
+ORIENTATION_THUMBNAIL = 640
+# Text boxes at least this much taller than wide are read as rotated lines
+TALL_BOX_RATIO = 1.5
+# Upright reads this confident are not compared with the upside-down read
+UPRIGHT_CONFIDENCE = 0.7
+# Boxes recognized per orientation; the widest are the most telling
+ORIENTATION_SAMPLE_BOXES = 6
+# Skew below MIN_SKEW is not worth resampling for; above MAX_SKEW the
+# estimate is more likely a stray line than the document
+MIN_SKEW_DEGREES = 1.0
+MAX_SKEW_DEGREES = 30.0
+
+ROTATIONS = {
+    90: cv2.ROTATE_90_CLOCKWISE,
+    180: cv2.ROTATE_180,
+    270: cv2.ROTATE_90_COUNTERCLOCKWISE,
+}
+
+
+def rotate(image, degrees):
+    """Rotate by a multiple of 90 degrees clockwise"""
+    return cv2.rotate(image, ROTATIONS[degrees]) if degrees else image
+
+
+def _thumbnail(image, size):
+    gray = _grayscale(image)
+    scale = min(1.0, size / max(gray.shape[:2]))
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def _tall_and_wide(horizontal_list):
+    tall = wide = 0
+    for x_min, x_max, y_min, y_max in horizontal_list:
+        width, height = x_max - x_min, y_max - y_min
+        if height > width * TALL_BOX_RATIO:
+            tall += 1
+        elif width > height * TALL_BOX_RATIO:
+            wide += 1
+    return tall, wide
+
+
+def _mean_confidence(reader, gray, boxes):
+    results = recognize_regions(reader, gray, (boxes, []), GREEDY_PASS, 0, len(boxes))
+    if not results:
+        return 0.0
+    return sum(confidence for _, _, confidence in results) / len(results)
+
+
+def _flip_boxes(boxes, width, height):
+    return [
+        [width - x_max, width - x_min, height - y_max, height - y_min]
+        for x_min, x_max, y_min, y_max in boxes
+    ]
+
+
+def detect_orientation(image, languages=("en",)):
+    """
+    Clockwise rotation (0, 90, 180 or 270) that turns the image upright.
+
+    One detector pass on a thumbnail tells upright or upside-down text
+    (wide line boxes) from text turned a quarter (tall boxes). The widest
+    lines are then recognized with the greedy decoder as they are and, unless
+    that read is already confident, turned 180 degrees; the more confident
+    read wins.
+    """
+    reader = get_reader(languages)
+    thumbnail = _thumbnail(image, ORIENTATION_THUMBNAIL)
+    horizontal_list, _ = detect_text_regions(reader, [thumbnail])[0]
+    tall, wide = _tall_and_wide(horizontal_list)
+
+    quarter = 0
+    if tall > wide:
+        quarter = 90
+        thumbnail = rotate(thumbnail, 90)
+        horizontal_list, _ = detect_text_regions(reader, [thumbnail])[0]
+
+    boxes = sorted(
+        (box for box in horizontal_list if box[1] - box[0] > box[3] - box[2]),
+        key=lambda box: box[1] - box[0],
+        reverse=True,
+    )[:ORIENTATION_SAMPLE_BOXES]
+    if not boxes:
+        return quarter
+
+    upright = _mean_confidence(reader, thumbnail, boxes)
+    if upright >= UPRIGHT_CONFIDENCE:
+        return quarter
+
+    height, width = thumbnail.shape[:2]
+    flipped = _mean_confidence(
+        reader, rotate(thumbnail, 180), _flip_boxes(boxes, width, height)
+    )
+    return (quarter + 180) % 360 if flipped > upright else quarter
+
+
+def _skew_from_card(corners):
+    angle = cv2.minAreaRect(corners.astype(np.float32))[2]
+    return (angle + 45) % 90 - 45
+
+
+def _skew_from_lines(gray):
+    edges = cv2.Canny(cv2.GaussianBlur(gray, (3, 3), 0), 50, 150)
+    lines = cv2.HoughLinesP(
+        edges,
+        1,
+        np.pi / 180,
+        threshold=80,
+        minLineLength=gray.shape[1] // 4,
+        maxLineGap=10,
+    )
+    if lines is None:
+        return None
+
+    angles, lengths = [], []
+    for x0, y0, x1, y1 in lines.reshape(-1, 4).tolist():
+        angle = math.degrees(math.atan2(y1 - y0, x1 - x0))
+        angle = (angle + 90) % 180 - 90
+        if abs(angle) < MAX_SKEW_DEGREES:
+            angles.append(angle)
+            lengths.append(math.hypot(x1 - x0, y1 - y0))
+    if not angles:
+        return None
+
+    # Length-weighted median, so a long card edge outvotes short strokes
+    order = np.argsort(angles)
+    cumulative = np.cumsum(np.asarray(lengths)[order])
+    middle = np.searchsorted(cumulative, cumulative[-1] / 2)
+    return float(np.asarray(angles)[order][middle])
+
+
+def estimate_skew(image):
+    """
+    Degrees the document's lines slope clockwise (positive) from horizontal,
+    or None.
+
+    Uses minAreaRect of the card outline when one is found, otherwise the
+    length-weighted median angle of the near-horizontal Hough lines.
+    """
+    gray = _thumbnail(image, ORIENTATION_THUMBNAIL)
+    height, width = gray.shape[:2]
+    corners = find_card(gray)
+    # find_card takes a card-shaped image as the card itself; its edges
+    # carry no skew
+    if corners is not None and not (
+        np.allclose(corners[0], (0, 0)) and np.allclose(corners[2], (width, height))
+    ):
+        return _skew_from_card(corners)
+    return _skew_from_lines(gray)
+
+
+def deskew(image, angle):
+    """Undo a clockwise skew of angle degrees, growing the image to fit"""
+    height, width = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+    new_width = int(round(height * sin + width * cos))
+    new_height = int(round(height * cos + width * sin))
+    matrix[0, 2] += new_width / 2 - width / 2
+    matrix[1, 2] += new_height / 2 - height / 2
+    return cv2.warpAffine(
+        image,
+        matrix,
+        (new_width, new_height),
+        flags=cv2.INTER_LINEAR,
+        borderMode=cv2.BORDER_REPLICATE,
+    )
+
+
+def normalize_orientation(image, languages=("en",)):
+    """
+    Turn a BGR photo upright and straighten it, once, before any OCR pass.
+
+    Counts ocr.orientation.<degrees> for each upload and ocr.deskew.applied
+    when the skew was corrected.
+    """
+    if not settings.OCR_ORIENTATION:
+        return image
+
+    rotation = detect_orientation(image, languages)
+    ocr_metrics.increment(f"ocr.orientation.{rotation}")
+    image = rotate(image, rotation)
+
+    angle = estimate_skew(image)
+    if angle is not None and MIN_SKEW_DEGREES <= abs(angle) <= MAX_SKEW_DEGREES:
+        ocr_metrics.increment("ocr.deskew.applied")
+        image = deskew(image, angle)
+    return image
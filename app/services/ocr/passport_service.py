@@ -1,281 +1,184 @@
+import logging
+
 import cv2
-import numpy as np
-import easyocr
-import re
-from rapidfuzz import fuzz
-import os
-from datetime import datetime
-from .Cleaning_OCR import preprocess_image_enhanced, extract_text_with_multiple_configs
+from datetime import date
+from app.utils.config import settings
+
+from .Cleaning_OCR import (
+    PREPROCESSING_PROFILES,
+    load_image,
+    preprocess_image_enhanced,
+    preprocessing_profile,
+    extract_text_with_multiple_configs,
+    required_fields_check,
+    resize_to_target,
+)
+from .dates import DATE_PATTERN, parse_ocr_date
+from .fields import CNIC_PATTERN, DocumentSpec, FieldSpec, format_cnic
+from .metrics import ocr_metrics
+from .mrz import read_passport_mrz
+from .replay import record_ocr_results
+
+logger = logging.getLogger(__name__)
+
+# Fields that must be read confidently before beam search is skipped
+PASSPORT_REQUIRED_FIELDS = ("passport_number", "date_of_birth", "date_of_expiry")
+# The same, once a valid MRZ has supplied everything it encodes
+PASSPORT_VISUAL_ZONE_REQUIRED_FIELDS = ("date_of_issue",)
+# Fields the MRZ does not encode that the page above it is OCR'd for
+PASSPORT_VISUAL_FIELDS = tuple(
+    field.strip()
+    for field in settings.OCR_PASSPORT_VISUAL_FIELDS.split(",")
+    if field.strip()
+)
+
+
+PASSPORT_DATE_FIELDS = ("date_of_birth", "date_of_issue", "date_of_expiry")
+NOT_NAMES = ("PAKISTAN", "PAKISTANI", "PASSPORT")
+
+
+def _place_of_birth(text):
+    city, _, country = text.partition(",")
+    city = city.strip().replace("[", "L").replace("]", "")
+    return f"{city}, {country.strip()}"
+
+
+def format_passport_date(parsed):
+    return parsed.strftime("%d %b %Y").upper()
+
+
+PASSPORT_SPEC = DocumentSpec(
+    [
+        FieldSpec("type", pattern=r"P", whole_token=True, normalize=lambda text: "P"),
+        FieldSpec("country_code"),
+        FieldSpec(
+            "passport_number",
+            pattern=r"\b(?:[A-Z]{2,3}[0-9]{6,7}|[A-Z][0-9]{8})\b",
+            anywhere=True,
+        ),
+        FieldSpec("surname", labels=("SURNAME",)),
+        FieldSpec("given_names", labels=("GIVEN NAMES", "GIVEN NAME", "NAME")),
+        FieldSpec("nationality"),
+        FieldSpec(
+            "citizenship_number",
+            pattern=CNIC_PATTERN,
+            anywhere=True,
+            normalize=format_cnic,
+        ),
+        FieldSpec("sex", pattern=r"[MFX]", whole_token=True),
+        FieldSpec(
+            "date_of_birth",
+            labels=("DATE OF BIRTH", "BIRTH DATE", "DOB"),
+            pattern=DATE_PATTERN,
+            normalize=parse_ocr_date,
+        ),
+        FieldSpec(
+            "place_of_birth",
+            labels=("PLACE OF BIRTH", "BIRTH PLACE"),
+            pattern=r"[A-Z\[\]]{3,},\s*[A-Z]{3}",
+            anywhere=True,
+            normalize=_place_of_birth,
+        ),
+        FieldSpec("father_name", labels=("FATHER NAME", "FATHER")),
+        FieldSpec(
+            "date_of_issue",
+            labels=("DATE OF ISSUE", "ISSUE DATE", "ISSUED"),
+            pattern=DATE_PATTERN,
+            normalize=parse_ocr_date,
+        ),
+        FieldSpec(
+            "date_of_expiry",
+            labels=("DATE OF EXPIRY", "EXPIRY DATE", "EXPIRES", "VALID UNTIL"),
+            pattern=DATE_PATTERN,
+            normalize=parse_ocr_date,
+        ),
+        FieldSpec("issuing_authority"),
+        FieldSpec("tracking_number", pattern=r"\b\d{11}\b", anywhere=True),
+        FieldSpec("booklet_number", pattern=r"\b[A-Z][0-9]{7}\b", anywhere=True),
+        FieldSpec("mrz_lines", pattern=r"P<.*|.*<<.*", whole_token=True, multiple=True),
+        FieldSpec(
+            "_dates",
+            pattern=DATE_PATTERN,
+            anywhere=True,
+            multiple=True,
+            normalize=parse_ocr_date,
+        ),
+        FieldSpec("_pakistan", pattern=r"PAK", anywhere=True),
+    ],
+    uppercase=True,
+    fuzzy_labels=True,
+)
+
+
+def assign_passport_dates(fields, dates):
+    """Fill unlabelled dates in order: birth, then issue, then expiry"""
+    for parsed in sorted(set(dates)):
+        if fields["date_of_birth"] == "Not Found":
+            if 1900 <= parsed.year <= date.today().year - 10:
+                fields["date_of_birth"] = parsed
+            continue
+
+        if parsed <= fields["date_of_birth"]:
+            continue
+        if fields["date_of_issue"] == "Not Found":
+            fields["date_of_issue"] = parsed
+            continue
+
+        if (
+            fields["date_of_expiry"] == "Not Found"
+            and 4 <= parsed.year - fields["date_of_issue"].year <= 11
+        ):
+            fields["date_of_expiry"] = parsed
 
 
 def extract_passport_fields(results):
-    text_items = []
-    for result in results:
-        bbox, text, confidence = result[:3]
-        if confidence > 0.3:
-            x = int(np.mean([point[0] for point in bbox]))
-            y = int(np.mean([point[1] for point in bbox]))
-            text_items.append(
-                {"text": text.strip(), "x": x, "y": y, "confidence": confidence}
-            )
-
-    text_items.sort(key=lambda item: item["y"])
-    all_texts = [item["text"] for item in text_items]
-    full_text = " ".join(all_texts).upper()
-
-    fields = {
-        "type": "Not Found",
-        "country_code": "Not Found",
-        "passport_number": "Not Found",
-        "surname": "Not Found",
-        "given_names": "Not Found",
-        "nationality": "Not Found",
-        "citizenship_number": "Not Found",
-        "sex": "Not Found",
-        "date_of_birth": "Not Found",
-        "place_of_birth": "Not Found",
-        "father_name": "Not Found",
-        "date_of_issue": "Not Found",
-        "date_of_expiry": "Not Found",
-        "issuing_authority": "Not Found",
-        "tracking_number": "Not Found",
-        "booklet_number": "Not Found",
-        "mrz_lines": [],
-    }
+    extraction = PASSPORT_SPEC.extract(results)
+    fields = extraction.fields
 
-    mrz_candidates = [t for t in all_texts if t.startswith("P<") or "<<" in t]
-    if mrz_candidates:
-        fields["mrz_lines"] = mrz_candidates
-
-    passport_patterns = [
-        r"\b([A-Z]{2,3}[0-9]{6,7})\b",
-        r"\b([A-Z][0-9]{8})\b",
-    ]
-    for pattern in passport_patterns:
-        passport_match = re.search(pattern, full_text)
-        if passport_match:
-            fields["passport_number"] = passport_match.group(1)
-            break
-
-    cnic_patterns = [
-        r"(\d{5}[-\s]?\d{7}[-\s]?\d{1})",
-        r"(\d{13})",
-    ]
-    for pattern in cnic_patterns:
-        cnic_match = re.search(pattern, full_text)
-        if cnic_match:
-            cnic = cnic_match.group(1)
-            if "-" not in cnic and len(cnic) == 13:
-                cnic = f"{cnic[:5]}-{cnic[5:12]}-{cnic[12]}"
-            fields["citizenship_number"] = cnic
-            break
-
-    booklet_match = re.search(r"\b([A-Z]{1}[0-9]{7})\b", full_text)
-    if booklet_match:
-        fields["booklet_number"] = booklet_match.group(1)
-
-    tracking_match = re.search(r"\b(\d{11})\b", full_text)
-    if tracking_match:
-        fields["tracking_number"] = tracking_match.group(1)
-
-    date_patterns = [
-        r"\b(\d{2}\s[A-Z]{3}\s\d{4})\b",
-    ]
-
-    found_dates = []
-    for pattern in date_patterns:
-        dates = re.findall(pattern, full_text)
-        found_dates.extend(dates)
-
-    sex_indicators = ["M", "F", "X"]
-    for idx, text_item in enumerate(text_items):
-        text = text_item["text"].strip().upper()
-
-        if text in sex_indicators:
-            fields["sex"] = text
-            break
-
-    if "PAKISTAN" in full_text or "PAK" in full_text:
+    if extraction.found["_pakistan"]:
         fields["nationality"] = "PAKISTANI"
         fields["country_code"] = "PAK"
         fields["issuing_authority"] = "PAKISTAN"
 
-    if "P" in [item["text"].strip() for item in text_items]:
-        fields["type"] = "P"
-
-    for i, item in enumerate(text_items):
-        text = item["text"].upper()
-
-        if ("SURNAME" in text) and i + 1 < len(text_items):
-            fields["surname"] = text_items[i + 1]["text"]
-
-        if (
-            "GIVEN NAMES" in text
-            or "GIVEN NAME" in text
-            or "GIVEN" in text
-            or "NAME" in text
-        ) and i + 1 < len(text_items):
-            fields["given_names"] = text_items[i + 1]["text"]
-
-        if (
-            fuzz.partial_ratio(text, "PLACE OF BIRTH") > 80
-            or fuzz.partial_ratio(text, "BIRTH PLACE") > 80
-        ) and i + 1 < len(text_items):
-            fields["place_of_birth"] = text_items[i + 1]["text"]
-
-        if ("FATHER NAME" in text or "FATHER" in text) and i + 1 < len(text_items):
-            fields["father_name"] = text_items[i + 1]["text"]
-
-        field_map = {
-            "date_of_birth": ["DATE OF BIRTH", "BIRTH DATE", "DOB"],
-            "date_of_issue": ["DATE OF ISSUE", "ISSUE DATE", "ISSUED"],
-            "date_of_expiry": [
-                "DATE OF EXPIRY",
-                "EXPIRY DATE",
-                "EXPIRES",
-                "VALID UNTIL",
-            ],
-        }
-
-        for field_key, field_labels in field_map.items():
-            for label in field_labels:
-                if fuzz.partial_ratio(text, label) > 80 and i + 1 < len(text_items):
-                    next_text = text_items[i + 1]["text"].upper()
-
-                    for pattern in date_patterns:
-                        match = re.search(pattern, next_text)
-                        if match:
-                            fields[field_key] = match.group()
-                            break
-                    break
-
     if fields["surname"] == "Not Found" or fields["given_names"] == "Not Found":
         for line in fields["mrz_lines"]:
             if line.startswith("P<PAK"):
-                name_part = line[5:]
-                name_parts = name_part.split("<<")
-                if len(name_parts) >= 2:
+                surname, _, given_names = line[5:].partition("<<")
+                if given_names:
                     if fields["surname"] == "Not Found":
-                        fields["surname"] = name_parts[0].replace("<", " ").strip()
-                    if fields["given_names"] == "Not Found" and len(name_parts) > 1:
-                        fields["given_names"] = name_parts[1].replace("<", " ").strip()
+                        fields["surname"] = surname.replace("<", " ").strip()
+                    if fields["given_names"] == "Not Found":
+                        fields["given_names"] = given_names.replace("<", " ").strip()
                 break
 
-    if found_dates:
-        found_dates = list(set(found_dates))
-
-        date_objects = []
-        for date_str in found_dates:
-            parsed_date = None
-            for fmt in ["%d %b %Y", "%d %B %Y", "%d/%m/%Y", "%d-%m-%Y"]:
-                try:
-                    parsed_date = datetime.strptime(date_str, fmt)
-                    date_objects.append((parsed_date, date_str))
-                    break
-                except:
-                    continue
-
-        date_objects.sort(key=lambda x: x[0])
-
-        for i, (parsed_date, date_str) in enumerate(date_objects):
-            year = parsed_date.year
-
-            if (
-                fields["date_of_birth"] == "Not Found"
-                and 1900 <= year <= datetime.now().year - 10
-            ):
-                fields["date_of_birth"] = date_str
-                continue
-
-            if fields["date_of_birth"] != "Not Found":
-                try:
-                    dob_obj = datetime.strptime(fields["date_of_birth"], "%d %b %Y")
-                except:
-                    try:
-                        dob_obj = datetime.strptime(fields["date_of_birth"], "%d %B %Y")
-                    except:
-                        dob_obj = None
-
-                if dob_obj and parsed_date > dob_obj:
-                    if fields["date_of_issue"] == "Not Found":
-                        fields["date_of_issue"] = date_str
-                        continue
-
-                    if (
-                        fields["date_of_issue"] != "Not Found"
-                        and fields["date_of_expiry"] == "Not Found"
-                    ):
-                        try:
-                            doi_obj = datetime.strptime(
-                                fields["date_of_issue"], "%d %b %Y"
-                            )
-                        except:
-                            try:
-                                doi_obj = datetime.strptime(
-                                    fields["date_of_issue"], "%d %B %Y"
-                                )
-                            except:
-                                doi_obj = None
-
-                        if doi_obj:
-                            year_diff = parsed_date.year - doi_obj.year
-                            if 4 <= year_diff <= 11:
-                                fields["date_of_expiry"] = date_str
-                                continue
-
-    if fields["place_of_birth"] == "Not Found":
-        for item in text_items:
-            text = item["text"].upper().strip()
-            if "," in text:
-                parts = [
-                    part.strip().replace("[", "L").replace("]", "")
-                    for part in text.split(",")
-                ]
-                if (
-                    len(parts) == 2
-                    and len(parts[1]) == 3
-                    and parts[1].isalpha()
-                    and parts[1].isupper()
-                ):
-                    city_part = parts[0]
-                    country_code = parts[1]
-                    if len(city_part) > 2:
-                        fields["place_of_birth"] = f"{city_part}, {country_code}"
-                        break
-
-    if fields["place_of_birth"] == "Not Found":
-        match = re.search(r"([A-Z\[\]]{3,}),\s*([A-Z]{3})", full_text.upper())
-        if match:
-            city = match.group(1).replace("[", "L").replace("]", "")
-            country = match.group(2)
-            fields["place_of_birth"] = f"{city}, {country}"
+    assign_passport_dates(fields, extraction.found["_dates"])
+    for field in PASSPORT_DATE_FIELDS:
+        if fields[field] != "Not Found":
+            fields[field] = format_passport_date(fields[field])
 
     if fields["surname"] == "Not Found" or fields["given_names"] == "Not Found":
-        potential_names = []
-        for item in text_items:
-            text = item["text"].strip()
-            if (
-                text.isalpha()
-                and 2 <= len(text) <= 20
-                and item["confidence"] > 0.6
-                and text not in ["PAKISTAN", "PAKISTANI", "PASSPORT"]
-            ):
-                potential_names.append(text)
-
+        potential_names = [
+            token.text
+            for token in extraction.tokens
+            if token.text.isalpha()
+            and 2 <= len(token.text) <= 20
+            and token.confidence > 0.6
+            and token.text not in NOT_NAMES
+        ]
         if len(potential_names) >= 2:
             if fields["surname"] == "Not Found":
                 fields["surname"] = potential_names[0]
-            if fields["given_names"] == "Not Found" and len(potential_names) > 1:
+            if fields["given_names"] == "Not Found":
                 fields["given_names"] = " ".join(potential_names[1:3])
 
     if fields["father_name"] == "Not Found":
-        for item in text_items:
-            text = item["text"].strip()
+        for token in extraction.tokens:
+            text = token.text
             if (
                 "," in text
                 and any(part.isalpha() for part in text.split(","))
                 and len(text) > 10
-                and item["confidence"] > 0.6
+                and token.confidence > 0.6
             ):
                 fields["father_name"] = text
                 break
@@ -284,37 +187,92 @@ def extract_passport_fields(results):
 
 
 def parse_date(text):
-    formats = [
-        "%d %b %Y",
-        "%d %B %Y",
-        "%d %b %y",
-        "%d %B %y",
-        "%d/%m/%Y",
-        "%d-%m-%Y",
-        "%d.%m.%Y",
-        "%m/%d/%Y",
-        "%m-%d-%Y",
-    ]
-
-    for fmt in formats:
-        try:
-            parsed = datetime.strptime(text, fmt)
-            return parsed.strftime("%d %b %Y")
-        except:
-            continue
-    return None
+    parsed = parse_ocr_date(text)
+    return parsed.strftime("%d %b %Y") if parsed else None
+
+
+def read_mrz_first(image, visual_fields=None):
+    """
+    Try the MRZ before any full-page OCR.
+
+    Returns (mrz_fields, page, required_fields). When the MRZ validates, page
+    is the part of the page above it, to be OCR'd for visual_fields (default
+    PASSPORT_VISUAL_FIELDS, the fields the MRZ does not encode) and any MRZ
+    field that came back empty; page is None when there are none, and the
+    MRZ is the whole read. Otherwise mrz_fields is None and page is the
+    whole image.
+    """
+    if not settings.OCR_PASSPORT_MRZ_FIRST:
+        return None, image, PASSPORT_REQUIRED_FIELDS
+
+    profile = PREPROCESSING_PROFILES.get(
+        preprocessing_profile("passport_front"), PREPROCESSING_PROFILES["balanced"]
+    )
+    page = resize_to_target(image, profile["target_size"])
+    gray = cv2.cvtColor(page, cv2.COLOR_BGR2GRAY) if page.ndim == 3 else page
+
+    try:
+        mrz_fields, band_top = read_passport_mrz(gray)
+    except Exception as e:
+        logger.warning("MRZ read failed: %s", e, exc_info=True)
+        mrz_fields, band_top = None, None
+
+    if not mrz_fields:
+        ocr_metrics.increment(
+            "ocr.mrz.invalid" if band_top is not None else "ocr.mrz.not_found"
+        )
+        return None, image, PASSPORT_REQUIRED_FIELDS
+
+    ocr_metrics.increment("ocr.mrz.valid")
+    if visual_fields is None:
+        visual_fields = PASSPORT_VISUAL_FIELDS
+    wanted = set(visual_fields) | {
+        field for field, value in mrz_fields.items() if value == "Not Found"
+    }
+    if not wanted:
+        ocr_metrics.increment("ocr.mrz.visual_zone_skipped")
+        return mrz_fields, None, ()
+    required_fields = tuple(
+        field for field in PASSPORT_VISUAL_ZONE_REQUIRED_FIELDS if field in wanted
+    )
+    return mrz_fields, page[:band_top], required_fields
+
+
+def merge_mrz_fields(page_fields, mrz_fields):
+    """
+    Fields read from a validated MRZ win over those read from the page,
+    except where the MRZ has none (e.g. an empty personal-number field)
+    """
+    if not mrz_fields:
+        return page_fields
+    return {
+        **page_fields,
+        **{field: value for field, value in mrz_fields.items() if value != "Not Found"},
+    }
+
 
+def process_passport_front(image):
+    """image may be a file path, encoded image bytes or a decoded numpy array"""
+    mrz_fields, page, required_fields = read_mrz_first(load_image(image))
+    if page is None:
+        return merge_mrz_fields(extract_passport_fields([]), mrz_fields)
 
-def process_passport_front(image_path):
     original_image, processed_image = preprocess_image_enhanced(
-        image_path, resize_factor=2.5
+        page, profile=preprocessing_profile("passport_front"), languages=("en",)
+    )
+    results = extract_text_with_multiple_configs(
+        processed_image,
+        has_required_fields=required_fields_check(
+            extract_passport_fields, required_fields
+        ),
     )
-    results = extract_text_with_multiple_configs(processed_image)
 
-    if not results:
+    if not results and not mrz_fields:
         print("No text found in Passport image.")
         return None
 
-    passport_info = extract_passport_fields(results)
+    page_fields = extract_passport_fields(results)
+    record_ocr_results("passport_front", results, page_fields)
+    passport_info = merge_mrz_fields(page_fields, mrz_fields)
 
     return passport_info
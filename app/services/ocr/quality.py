@@ -0,0 +1,163 @@
+import logging
+
+import cv2
+import numpy as np
+
+from app.utils.config import settings
+
+from .errors import ImageQualityError
+from .layout import ID1_ASPECT_RATIO, find_card
+from .metrics import ocr_metrics
+
+logger = logging.getLogger(__name__)
+
+# Scores are measured on a copy scaled to this long side, so thresholds do not
+# depend on the upload's resolution
+QUALITY_SIZE = 1024
+# Mean brightness below this is too dark. There is no upper bound: a clean,
+# evenly lit card with a light background is bright on average, and glare
+# shows up as clipped pixels instead
+MIN_BRIGHTNESS = 40
+# Share of pixels that may be clipped to black or white (shadow, glare)
+MAX_CLIPPED = 0.35
+
+CARD_DOCUMENTS = ("nicop_front", "nicop_back", "iqama_front")
+
+
+def _exposure_scores(gray):
+    histogram = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel() / gray.size
+    return {
+        "sharpness": round(float(cv2.Laplacian(gray, cv2.CV_64F).var()), 1),
+        "brightness": round(float(np.dot(histogram, np.arange(256))), 1),
+        "dark": round(float(histogram[:16].sum()), 3),
+        "bright": round(float(histogram[240:].sum()), 3),
+    }
+
+
+def _warp_card(gray, corners):
+    """The card cut out of gray and flattened, at its own size (no upscaling)"""
+    top_left, top_right, bottom_right, bottom_left = corners
+    width = int(
+        max(
+            np.linalg.norm(top_right - top_left),
+            np.linalg.norm(bottom_right - bottom_left),
+        )
+    )
+    height = int(
+        max(
+            np.linalg.norm(bottom_left - top_left),
+            np.linalg.norm(bottom_right - top_right),
+        )
+    )
+    target = np.array(
+        [[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32
+    )
+    matrix = cv2.getPerspectiveTransform(corners, target)
+    return cv2.warpPerspective(gray, matrix, (width, height))
+
+
+def image_quality_scores(image, document_type=None):
+    """
+    Cheap quality measurements of a BGR upload:
+
+    - sharpness: variance of the Laplacian
+    - brightness: mean gray level
+    - dark / bright: share of pixels clipped near black / white
+    - width, height: the upload's size
+    - card_coverage, card_width: share of the photo covered by the card and
+      its long side in upload pixels, for ID cards whose outline was found
+      (None otherwise)
+    - region: "card" when the four scores above were measured on the card
+      alone, "frame" when on the whole photo
+
+    A card on a dark table or a white scanner bed would otherwise be judged
+    by its background.
+    """
+    height, width = image.shape[:2]
+    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image
+    scale = min(1.0, QUALITY_SIZE / max(height, width))
+    if scale < 1:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    region, card_coverage, card_width = gray, None, None
+    if document_type in CARD_DOCUMENTS:
+        corners = find_card(gray, ID1_ASPECT_RATIO, min_area=0.05)
+        # A quadrilateral without the card's proportions is more likely the
+        # photo or a box printed on it than the card
+        if corners is not None and _card_shaped(corners):
+            card_coverage = round(cv2.contourArea(corners) / gray.size, 3)
+            card = _warp_card(gray, corners)
+            card_width = round(max(card.shape[:2]) / scale)
+            if min(card.shape[:2]) >= 16:
+                region = card
+
+    return {
+        **_exposure_scores(region),
+        "width": width,
+        "height": height,
+        "card_coverage": card_coverage,
+        "card_width": card_width,
+        "region": "card" if region is not gray else "frame",
+    }
+
+
+def _card_shaped(corners, tolerance=0.2):
+    top_left, top_right, bottom_right, bottom_left = corners
+    width = np.linalg.norm(top_right - top_left) + np.linalg.norm(
+        bottom_right - bottom_left
+    )
+    height = np.linalg.norm(bottom_left - top_left) + np.linalg.norm(
+        bottom_right - top_right
+    )
+    if min(width, height) == 0:
+        return False
+    ratio = max(width, height) / min(width, height)
+    return abs(ratio - ID1_ASPECT_RATIO) / ID1_ASPECT_RATIO < tolerance
+
+
+def quality_problem(scores):
+    """The reason an upload should be rejected, or None"""
+    if min(scores["width"], scores["height"]) < settings.OCR_QUALITY_MIN_SIDE:
+        return "too_small"
+    if scores["brightness"] < MIN_BRIGHTNESS or scores["dark"] > MAX_CLIPPED:
+        return "too_dark"
+    if scores["bright"] > MAX_CLIPPED:
+        return "overexposed"
+    if scores["sharpness"] < settings.OCR_QUALITY_MIN_SHARPNESS:
+        return "blurry"
+    # A card on a scanned A4 page covers under a tenth of it but is still
+    # large in pixels; only a card that is both is too far from the camera
+    coverage = scores["card_coverage"]
+    if (
+        coverage is not None
+        and coverage < settings.OCR_QUALITY_MIN_CARD_COVERAGE
+        and scores["card_width"] < settings.OCR_QUALITY_MIN_CARD_WIDTH
+    ):
+        return "card_too_small"
+    return None
+
+
+def check_image_quality(image, document_type=None):
+    """
+    Score an upload and, with OCR_QUALITY_ENFORCE, raise ImageQualityError
+    for one not worth OCR'ing.
+
+    Every upload's scores are logged so the thresholds can be tuned against
+    real traffic. Outcomes are counted as ocr.quality.passed and
+    ocr.quality.rejected.<reason>, or ocr.quality.flagged.<reason> while the
+    gate only logs.
+    """
+    if not settings.OCR_QUALITY_GATE:
+        return None
+
+    scores = image_quality_scores(image, document_type)
+    reason = quality_problem(scores)
+    logger.info("OCR quality %s: %s -> %s", document_type, scores, reason or "passed")
+    if reason and settings.OCR_QUALITY_ENFORCE:
+        ocr_metrics.increment(f"ocr.quality.rejected.{reason}")
+        raise ImageQualityError(reason, scores)
+    if reason:
+        ocr_metrics.increment(f"ocr.quality.flagged.{reason}")
+    else:
+        ocr_metrics.increment("ocr.quality.passed")
+    return scores
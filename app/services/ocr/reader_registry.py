@@ -0,0 +1,124 @@
+import logging
+import threading
+import time
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_languages(languages):
+    """Return the registry key for a language list, e.g. ["en", "ar"] -> ("ar", "en")"""
+    if isinstance(languages, str):
+        languages = [languages]
+    return tuple(sorted({lang.strip() for lang in languages if lang.strip()}))
+
+
+def parse_language_sets(value):
+    """Parse "en;ar,en" into [("en",), ("ar", "en")]"""
+    language_sets = []
+    for group in (value or "").split(";"):
+        key = normalize_languages(group.split(","))
+        if key and key not in language_sets:
+            language_sets.append(key)
+    return language_sets
+
+
+class ReaderRegistry:
+    """
+    Process-wide cache of EasyOCR readers keyed by language set.
+
+    Loading a Reader pulls the CRAFT detector and the recognition weights from
+    disk, which is slower than the OCR itself, so each language set is loaded
+    once per process and shared by every OCR service.
+    """
+
+    def __init__(self, gpu=False, model_dir=None, download_enabled=True):
+        self.gpu = gpu
+        self.model_dir = model_dir
+        self.download_enabled = download_enabled
+        self._readers = {}
+        self._locks = {}
+        self._errors = {}
+        self._load_seconds = {}
+        self._expected = set()
+        self._lock = threading.Lock()
+
+    def _get_lock(self, key):
+        with self._lock:
+            if key not in self._locks:
+                self._locks[key] = threading.Lock()
+            return self._locks[key]
+
+    def get(self, languages):
+        key = normalize_languages(languages)
+        reader = self._readers.get(key)
+        if reader is not None:
+            return reader
+
+        with self._get_lock(key):
+            reader = self._readers.get(key)
+            if reader is not None:
+                return reader
+
+            logger.info("Loading EasyOCR reader for languages %s", key)
+            started = time.perf_counter()
+            try:
+                # Imported here so that only processes that OCR pay for
+                # easyocr and torch
+                import easyocr
+
+                reader = easyocr.Reader(
+                    list(key),
+                    gpu=self.gpu,
+                    model_storage_directory=self.model_dir,
+                    download_enabled=self.download_enabled,
+                    verbose=False,
+                )
+            except Exception as e:
+                self._errors[key] = str(e)
+                raise
+
+            self._load_seconds[key] = round(time.perf_counter() - started, 3)
+            self._errors.pop(key, None)
+            self._readers[key] = reader
+            logger.info(
+                "EasyOCR reader for %s loaded in %.2fs", key, self._load_seconds[key]
+            )
+            return reader
+
+    def warm_up(self, language_sets):
+        """Load every language set up front; failures are recorded, not raised"""
+        keys = [normalize_languages(languages) for languages in language_sets]
+        self._expected.update(keys)
+        for key in keys:
+            try:
+                self.get(key)
+            except Exception as e:
+                logger.error("Failed to warm EasyOCR reader for %s: %s", key, e)
+
+    def is_loaded(self, languages):
+        return normalize_languages(languages) in self._readers
+
+    @property
+    def ready(self):
+        return all(key in self._readers for key in self._expected)
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "loaded": {
+                ",".join(key): self._load_seconds.get(key) for key in self._readers
+            },
+            "pending": [
+                ",".join(key) for key in self._expected if key not in self._readers
+            ],
+            "errors": {",".join(key): error for key, error in self._errors.items()},
+        }
+
+
+reader_registry = ReaderRegistry(gpu=settings.OCR_GPU, model_dir=settings.OCR_MODEL_DIR)
+
+
+def get_reader(languages=("en",)):
+    return reader_registry.get(languages)
@@ -0,0 +1,85 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+
+from app.utils.config import settings
+
+logger = logging.getLogger(__name__)
+
+FIXTURE_VERSION = 1
+
+
+def fixture_from_results(document_type, results, fields=None):
+    """
+    A replay fixture for raw EasyOCR output.
+
+    Each token is stored as [8 box coordinates rounded to whole pixels, text,
+    confidence to 3 decimals]. expected holds the fields extracted when the
+    tokens were recorded; correct it by hand to turn it into ground truth.
+    """
+    return {
+        "version": FIXTURE_VERSION,
+        "document_type": document_type,
+        "tokens": [
+            [
+                [int(round(float(value))) for point in bbox for value in point],
+                text,
+                round(float(confidence), 3),
+            ]
+            for bbox, text, confidence in results
+        ],
+        "expected": fields,
+    }
+
+
+def results_from_fixture(fixture):
+    """The fixture's tokens as (bbox, text, confidence), as EasyOCR returns them"""
+    return [
+        ([coords[0:2], coords[2:4], coords[4:6], coords[6:8]], text, confidence)
+        for coords, text, confidence in fixture["tokens"]
+    ]
+
+
+def write_fixture(directory, fixture):
+    """Write a fixture as compact JSON named by its content; returns the path"""
+    data = json.dumps(fixture, ensure_ascii=False, separators=(",", ":"))
+    digest = hashlib.sha256(data.encode("utf-8")).hexdigest()[:12]
+    path = os.path.join(directory, f"{fixture['document_type']}-{digest}.json")
+    os.makedirs(directory, exist_ok=True)
+    # Write then rename so a replay never reads a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return path
+
+
+def record_ocr_results(document_type, results, fields=None):
+    """
+    Save the raw OCR output of one document to OCR_RECORD_DIR, if set.
+
+    Fixtures hold personal data (names, CNIC numbers, addresses); record
+    only on machines allowed to keep it.
+    """
+    if not settings.OCR_RECORD_DIR or not results:
+        return None
+    try:
+        return write_fixture(
+            settings.OCR_RECORD_DIR,
+            fixture_from_results(document_type, results, fields),
+        )
+    except OSError as e:
+        logger.warning("Could not record OCR fixture for %s: %s", document_type, e)
+        return None
+
+
+def load_fixtures(paths):
+    """(path, fixture) for every fixture file given or found in the directories given"""
+    for path in map(Path, paths):
+        files = sorted(path.glob("*.json")) if path.is_dir() else [path]
+        for file in files:
+            with open(file, encoding="utf-8") as f:
+                yield file, json.load(f)
@@ -0,0 +1,44 @@
+import asyncio
+
+from .metrics import ocr_metrics
+
+
+class SingleFlight:
+    """
+    Runs at most one computation per key at a time.
+
+    The first caller for a key starts the work as its own task; callers
+    arriving while it runs await the same task instead of starting another
+    (counted as ocr.singleflight.coalesced). The task is shielded, so a
+    caller that disconnects does not cancel the work for the others, and
+    every caller sees the same result or exception.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+
+    def __len__(self):
+        return len(self._tasks)
+
+    async def run(self, key, func):
+        """Await func() (a coroutine function), or the running call for key"""
+        task = self._tasks.get(key)
+        if task is not None:
+            ocr_metrics.increment("ocr.singleflight.coalesced")
+        else:
+            ocr_metrics.increment("ocr.singleflight.leader")
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Retrieve the exception so an error nobody awaited any more (every
+        # caller disconnected) is not logged as never retrieved
+        if not task.cancelled():
+            task.exception()
+
+
+ocr_single_flight = SingleFlight()
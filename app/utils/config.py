@@ -34,6 +34,105 @@ class Settings:
         "strict" if ENVIRONMENT == "production" else "lax"
     )
 
+    # OCR Settings
+    OCR_GPU: bool = os.getenv("OCR_GPU", "False").lower() == "true"
+    OCR_MODEL_DIR: Optional[str] = os.getenv("OCR_MODEL_DIR") or None
+    # Load readers at startup instead of on the first scan
+    OCR_PRELOAD: bool = os.getenv("OCR_PRELOAD", "True").lower() == "true"
+    # Language sets separated by ";" and languages by ",", e.g. "en;ar,en".
+    # The Arabic reader is only needed when the Iqama fast mode fails
+    OCR_PRELOAD_LANGUAGES: str = os.getenv("OCR_PRELOAD_LANGUAGES", "en")
+    # 0 runs OCR on a single background thread of the API process
+    OCR_WORKERS: int = int(os.getenv("OCR_WORKERS", "2"))
+    # 0 splits the CPU cores evenly between the OCR workers
+    OCR_TORCH_THREADS: int = int(os.getenv("OCR_TORCH_THREADS", "0"))
+    OCR_OPENCV_THREADS: int = int(os.getenv("OCR_OPENCV_THREADS", "0"))
+    OCR_JOB_TIMEOUT_SECONDS: int = int(os.getenv("OCR_JOB_TIMEOUT_SECONDS", "120"))
+    OCR_START_METHOD: str = os.getenv("OCR_START_METHOD", "spawn")
+    # Admission control per API process: OCR jobs running at once (0: one per
+    # OCR worker), requests allowed to wait for a slot and for how long before
+    # a 503 with Retry-After; optional per-document caps such as
+    # OCR_DOCUMENT_CONCURRENCY="passport_front=1,iqama_front=1"
+    OCR_MAX_CONCURRENT: int = int(os.getenv("OCR_MAX_CONCURRENT", "0"))
+    OCR_MAX_QUEUE: int = int(os.getenv("OCR_MAX_QUEUE", "8"))
+    OCR_MAX_QUEUE_WAIT_SECONDS: float = float(
+        os.getenv("OCR_MAX_QUEUE_WAIT_SECONDS", "10")
+    )
+    OCR_DOCUMENT_CONCURRENCY: str = os.getenv("OCR_DOCUMENT_CONCURRENCY", "")
+    # Run the beam-search pass only where the greedy pass missed required fields
+    OCR_ADAPTIVE: bool = os.getenv("OCR_ADAPTIVE", "True").lower() == "true"
+    OCR_ADAPTIVE_MIN_CONFIDENCE: float = float(
+        os.getenv("OCR_ADAPTIVE_MIN_CONFIDENCE", "0.6")
+    )
+    # fast | balanced | quality, optionally per document type:
+    # OCR_DOCUMENT_PROFILES="iqama_front=quality,nicop_back=fast"
+    OCR_PREPROCESSING_PROFILE: str = os.getenv("OCR_PREPROCESSING_PROFILE", "balanced")
+    OCR_DOCUMENT_PROFILES: str = os.getenv("OCR_DOCUMENT_PROFILES", "")
+    # Scale each image so its text is about OCR_TEXT_HEIGHT px tall (measured
+    # by a detection pass on a thumbnail), and re-read boxes that still fail
+    # at OCR_UPSCALE_FACTOR times that scale
+    OCR_MULTISCALE: bool = os.getenv("OCR_MULTISCALE", "True").lower() == "true"
+    OCR_TEXT_HEIGHT: int = int(os.getenv("OCR_TEXT_HEIGHT", "24"))
+    OCR_UPSCALE_FACTOR: float = float(os.getenv("OCR_UPSCALE_FACTOR", "2.0"))
+    # Score uploads for blur, exposure, resolution and distance before OCR;
+    # sharpness is the Laplacian variance at 1024 px, card coverage the share
+    # of the photo an ID card must fill. Failures are only logged and counted
+    # unless OCR_QUALITY_ENFORCE rejects them with a 422 (off until the
+    # thresholds are tuned on real traffic)
+    OCR_QUALITY_GATE: bool = os.getenv("OCR_QUALITY_GATE", "True").lower() == "true"
+    OCR_QUALITY_ENFORCE: bool = (
+        os.getenv("OCR_QUALITY_ENFORCE", "False").lower() == "true"
+    )
+    OCR_QUALITY_MIN_SIDE: int = int(os.getenv("OCR_QUALITY_MIN_SIDE", "480"))
+    OCR_QUALITY_MIN_SHARPNESS: float = float(
+        os.getenv("OCR_QUALITY_MIN_SHARPNESS", "40")
+    )
+    OCR_QUALITY_MIN_CARD_COVERAGE: float = float(
+        os.getenv("OCR_QUALITY_MIN_CARD_COVERAGE", "0.2")
+    )
+    # ...unless its long side is at least this many pixels (scans)
+    OCR_QUALITY_MIN_CARD_WIDTH: int = int(
+        os.getenv("OCR_QUALITY_MIN_CARD_WIDTH", "640")
+    )
+    # Turn rotated photos upright (4-way check on a thumbnail) and straighten
+    # skewed ones once, before the first full detection pass
+    OCR_ORIENTATION: bool = os.getenv("OCR_ORIENTATION", "True").lower() == "true"
+    # Read NICOP cards through their layout templates before full-image OCR.
+    # Off until the field regions are measured on real cards
+    OCR_LAYOUT_TEMPLATES: bool = (
+        os.getenv("OCR_LAYOUT_TEMPLATES", "False").lower() == "true"
+    )
+    # Decode the passport MRZ first and OCR only the page above it when it validates
+    OCR_PASSPORT_MRZ_FIRST: bool = (
+        os.getenv("OCR_PASSPORT_MRZ_FIRST", "True").lower() == "true"
+    )
+    # Passport fields only the page above the MRZ carries that are needed;
+    # with a valid MRZ and none of these, the page is not OCR'd at all
+    OCR_PASSPORT_VISUAL_FIELDS: str = os.getenv(
+        "OCR_PASSPORT_VISUAL_FIELDS",
+        "date_of_issue,place_of_birth,father_name,tracking_number,booklet_number",
+    )
+    # Read the Iqama number with the English model and a digit allowlist
+    # before loading the Arabic model
+    OCR_IQAMA_FAST: bool = os.getenv("OCR_IQAMA_FAST", "True").lower() == "true"
+    # Cache of extracted fields keyed by upload hash; 0 entries disables the
+    # memory tier. The disk tier, shared between processes, is off unless
+    # OCR_CACHE_DIR names a private directory: entries hold personal data
+    OCR_CACHE_MAX_ENTRIES: int = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "256"))
+    OCR_CACHE_DIR: Optional[str] = os.getenv("OCR_CACHE_DIR") or None
+    OCR_CACHE_TTL_SECONDS: int = int(os.getenv("OCR_CACHE_TTL_SECONDS", "86400"))
+    # Save the raw OCR tokens of every document here as replay fixtures
+    # (python -m app.commands.ocr_replay); they hold personal data. Empty: off
+    OCR_RECORD_DIR: str = os.getenv("OCR_RECORD_DIR", "")
+    # Asynchronous OCR jobs (python -m app.commands.ocr_worker)
+    OCR_JOB_POLL_SECONDS: float = float(os.getenv("OCR_JOB_POLL_SECONDS", "1"))
+    OCR_JOB_LEASE_SECONDS: int = int(os.getenv("OCR_JOB_LEASE_SECONDS", "300"))
+    OCR_JOB_MAX_ATTEMPTS: int = int(os.getenv("OCR_JOB_MAX_ATTEMPTS", "3"))
+    # Wait before retrying a failed job: this many seconds, doubled per attempt
+    OCR_JOB_RETRY_BACKOFF_SECONDS: float = float(
+        os.getenv("OCR_JOB_RETRY_BACKOFF_SECONDS", "30")
+    )
+
     # # Email Settings
     # SMTP_TLS: bool = True
     # SMTP_PORT: Optional[int] = (
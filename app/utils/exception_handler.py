@@ -5,6 +5,8 @@ from fastapi.exceptions import HTTPException, RequestValidationError
 from fastapi.responses import JSONResponse
 from pydantic import ValidationError
 
+from app.services.ocr.errors import ImageQualityError, OCRBusyError, OCRError
+
 
 def format_validation_errors(errors) -> Dict[str, List[str]]:
     """Convert Pydantic validation errors to custom format"""
@@ -62,9 +64,25 @@ async def http_exception_handler(request: Request, exc: HTTPException):
         and "message" in exc.detail
         and "errors" in exc.detail
     ):
-        return JSONResponse(status_code=exc.status_code, content=exc.detail)
+        return JSONResponse(
+            status_code=exc.status_code, content=exc.detail, headers=exc.headers
+        )
 
     # Otherwise, return the standard format
     return JSONResponse(
-        status_code=exc.status_code, content={"message": str(exc.detail)}
+        status_code=exc.status_code,
+        content={"message": str(exc.detail)},
+        headers=exc.headers,
     )
+
+
+async def ocr_exception_handler(request: Request, exc: OCRError):
+    """Custom handler for OCR errors: quality, busy, timeout, engine down"""
+    headers = None
+    if isinstance(exc, OCRBusyError):
+        headers = {"Retry-After": str(exc.retry_after)}
+    if isinstance(exc, ImageQualityError):
+        content = exc.detail()
+    else:
+        content = {"message": str(exc)}
+    return JSONResponse(status_code=exc.status_code, content=content, headers=headers)
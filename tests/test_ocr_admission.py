@@ -0,0 +1,122 @@
+"""
+Admission control for OCR: the global and per-type slot limits, the
+bounded queue, batches, and the Retry-After estimate.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.ocr.admission import AdmissionController, parse_document_limits
+from app.services.ocr.errors import OCRBusyError
+
+
+def test_parse_document_limits():
+    assert parse_document_limits("passport_front=1, iqama_front=2,,x=") == {
+        "passport_front": 1,
+        "iqama_front": 2,
+    }
+    assert parse_document_limits("") == {}
+
+
+def test_admission_turns_away_when_queue_is_full():
+    async def scenario():
+        admission = AdmissionController(limit=1, max_queue=0, max_wait=1)
+        async with admission.admit():
+            with pytest.raises(OCRBusyError) as busy:
+                async with admission.admit():
+                    pass
+        assert busy.value.retry_after >= 1
+        assert admission.active == 0 and admission.waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_times_out_waiting():
+    async def scenario():
+        admission = AdmissionController(limit=1, max_queue=1, max_wait=0.05)
+        async with admission.admit():
+            with pytest.raises(OCRBusyError):
+                async with admission.admit():
+                    pass
+        # The slot is free again
+        async with admission.admit():
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_admission_queued_request_runs_when_slot_frees():
+    async def scenario():
+        admission = AdmissionController(limit=1, max_queue=1, max_wait=1)
+        order = []
+
+        async def job(name, seconds):
+            async with admission.admit():
+                order.append(name)
+                await asyncio.sleep(seconds)
+
+        await asyncio.gather(job("first", 0.05), job("second", 0))
+        return order
+
+    assert asyncio.run(scenario()) == ["first", "second"]
+
+
+def test_admission_document_limits():
+    async def scenario():
+        admission = AdmissionController(
+            limit=4, max_queue=0, max_wait=1, document_limits={"passport_front": 1}
+        )
+        async with admission.admit("passport_front"):
+            # Other types still get in, a second passport does not
+            async with admission.admit("nicop_front"):
+                pass
+            with pytest.raises(OCRBusyError):
+                async with admission.admit("passport_front"):
+                    pass
+
+    asyncio.run(scenario())
+
+
+def test_admission_batch_holds_a_slot_per_document():
+    async def scenario():
+        admission = AdmissionController(
+            limit=3, max_queue=1, max_wait=0.05, document_limits={"passport_front": 1}
+        )
+        async with admission.admit("passport_front", "iqama_front"):
+            assert admission.active == 2
+            # The batch counts against the per-type limits...
+            with pytest.raises(OCRBusyError):
+                async with admission.admit("passport_front"):
+                    pass
+            async with admission.admit("nicop_front"):
+                pass
+            # ...and two more documents do not fit in the one slot left
+            with pytest.raises(OCRBusyError):
+                async with admission.admit("nicop_front", "nicop_back"):
+                    pass
+        assert admission.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_admission_batch_larger_than_limit():
+    async def scenario():
+        admission = AdmissionController(limit=2, max_queue=0, max_wait=1)
+        async with admission.admit("a", "b", "c", "d"):
+            assert admission.active == 2
+        async with admission.admit():
+            pass
+
+    asyncio.run(scenario())
+
+
+def test_admission_retry_after():
+    admission = AdmissionController(limit=2)
+    # No job finished yet: DEFAULT_JOB_SECONDS (5s) for the request itself
+    assert admission.retry_after() == 3
+    admission.average_seconds = 4.0
+    admission.waiting = 3
+    assert admission.retry_after() == 8
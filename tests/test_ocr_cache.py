@@ -0,0 +1,112 @@
+"""
+The OCR result cache: LRU eviction and expiry of the in-memory tier, and
+the on-disk tier that outlives it.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import os
+import time
+
+import pytest
+
+from app.services.ocr import cache as cache_module
+from app.services.ocr.cache import OCRResultCache
+
+FIELDS = {"cnic_number": "35202-1234567-1"}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache_module.time, "time", lambda: now[0])
+    return now
+
+
+def test_repeat_upload_is_a_hit():
+    cache = OCRResultCache()
+    cache.set("cnic_front", b"image", FIELDS)
+
+    assert cache.get("cnic_front", b"image") == FIELDS
+    assert cache.get("cnic_back", b"image") is None
+    assert cache.get("cnic_front", b"other image") is None
+
+
+def test_failed_extraction_is_not_stored():
+    cache = OCRResultCache()
+    cache.set("cnic_front", b"image", None)
+    cache.set("cnic_front", b"image", {})
+
+    assert cache.get("cnic_front", b"image") is None
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = OCRResultCache(max_entries=2)
+    cache.set("cnic_front", b"a", {"n": "a"})
+    cache.set("cnic_front", b"b", {"n": "b"})
+    # Reading a makes b the least recently used
+    cache.get("cnic_front", b"a")
+    cache.set("cnic_front", b"c", {"n": "c"})
+
+    assert cache.get("cnic_front", b"a") == {"n": "a"}
+    assert cache.get("cnic_front", b"b") is None
+    assert cache.get("cnic_front", b"c") == {"n": "c"}
+
+
+def test_memory_entry_expires(clock):
+    cache = OCRResultCache(ttl_seconds=60)
+    cache.set("cnic_front", b"image", FIELDS)
+
+    clock[0] += 59
+    assert cache.get("cnic_front", b"image") == FIELDS
+    clock[0] += 1
+    assert cache.get("cnic_front", b"image") is None
+
+
+def test_disk_entry_survives_a_new_process(tmp_path):
+    OCRResultCache(directory=str(tmp_path)).set("cnic_front", b"image", FIELDS)
+
+    # A fresh cache has an empty memory tier, as after a restart
+    restarted = OCRResultCache(directory=str(tmp_path))
+    assert restarted.get("cnic_front", b"image") == FIELDS
+    assert len(restarted._entries) == 1
+
+
+def test_evicted_entry_is_read_back_from_disk(tmp_path):
+    cache = OCRResultCache(max_entries=1, directory=str(tmp_path))
+    cache.set("cnic_front", b"a", {"n": "a"})
+    cache.set("cnic_front", b"b", {"n": "b"})
+
+    assert cache.get("cnic_front", b"a") == {"n": "a"}
+
+
+def test_expired_disk_entry_is_deleted(tmp_path):
+    OCRResultCache(directory=str(tmp_path)).set("cnic_front", b"image", FIELDS)
+    (path,) = tmp_path.iterdir()
+    written = time.time() - 120
+    os.utime(path, (written, written))
+
+    cache = OCRResultCache(directory=str(tmp_path), ttl_seconds=60)
+    assert cache.get("cnic_front", b"image") is None
+    assert not path.exists()
+
+
+def test_unreadable_disk_entry_is_a_miss(tmp_path):
+    cache = OCRResultCache(directory=str(tmp_path))
+    key = cache.key("cnic_front", b"image")
+    (tmp_path / f"{key}.json").write_text("{not json", encoding="utf-8")
+
+    assert cache.get("cnic_front", b"image") is None
+
+
+def test_purge_expired_removes_only_old_entries(tmp_path):
+    cache = OCRResultCache(directory=str(tmp_path), ttl_seconds=60)
+    cache.set("cnic_front", b"old", {"n": "old"})
+    cache.set("cnic_front", b"new", {"n": "new"})
+    old = tmp_path / f"{cache.key('cnic_front', b'old')}.json"
+    written = time.time() - 120
+    os.utime(old, (written, written))
+
+    assert cache.purge_expired() == 1
+    assert not old.exists()
+    assert len(list(tmp_path.iterdir())) == 1
@@ -0,0 +1,53 @@
+"""
+Date parsing for OCR tokens: numeric, compact and printed dates, O/I read
+for 0/1, month-first dates and text around the date.
+
+Run from the repository root: python -m pytest tests
+"""
+
+from datetime import date
+
+import pytest
+
+from app.services.ocr.dates import parse_ocr_date
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("14.08.1985", date(1985, 8, 14)),
+        ("14/08/1985", date(1985, 8, 14)),
+        ("14-8-1985", date(1985, 8, 14)),
+        ("14081985", date(1985, 8, 14)),
+        ("14 AUG 1985", date(1985, 8, 14)),
+        ("14 August 1985", date(1985, 8, 14)),
+        ("14AUG1985", date(1985, 8, 14)),
+        # O and I read in place of 0 and 1
+        ("I4.O8.I985", date(1985, 8, 14)),
+        ("O1 JAN 2OI0", date(2010, 1, 1)),
+        # Month-first dates are swapped back
+        ("08.25.1990", date(1990, 8, 25)),
+        # Labelled tokens
+        ("Date of Birth: 14.08.1985", date(1985, 8, 14)),
+        ("DATE OF EXPIRY 26 DEC 2031", date(2031, 12, 26)),
+        # A date-shaped token that is not a date does not hide a later one
+        ("31.02.2020 issued 01.02.2020", date(2020, 2, 1)),
+        ("14 XYZ 1985 / 15 AUG 1985", date(1985, 8, 15)),
+        ("14.13.1985 issued 01.02.2020", date(2020, 2, 1)),
+    ],
+)
+def test_parse_ocr_date(text, expected):
+    assert parse_ocr_date(text) == expected
+
+
+def test_parse_ocr_date_two_digit_years():
+    this_year = date.today().year % 100
+    assert parse_ocr_date(f"01 JAN {this_year:02d}").year == 2000 + this_year
+    assert parse_ocr_date(f"01 JAN {this_year + 1:02d}").year == 1901 + this_year
+
+
+@pytest.mark.parametrize(
+    "text", ["31.02.2020", "14.13.1985", "14 XYZ 1985", "12.08.1885", "no date", ""]
+)
+def test_parse_ocr_date_rejects(text):
+    assert parse_ocr_date(text) is None
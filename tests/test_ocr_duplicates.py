@@ -0,0 +1,78 @@
+"""
+Duplicate filtering of OCR boxes: overlapping reads of the same text keep
+the most confident one, bucketed in a grid so the cost stays linear.
+
+Run from the repository root: python -m pytest tests
+"""
+
+from app.services.ocr.Cleaning_OCR import DUPLICATE_DISTANCE, filter_duplicate_results
+
+
+def box(x, y, width=100, height=20):
+    return [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+
+
+def test_filter_duplicate_results_keeps_most_confident_duplicate():
+    results = [
+        (box(10, 10), "MUHAMMAD ALI", 0.7),
+        (box(20, 15), "MUHAMMAD AL1", 0.9),
+    ]
+    assert filter_duplicate_results(results) == [results[1]]
+
+
+def test_filter_duplicate_results_keeps_distant_and_different_texts():
+    results = [
+        (box(10, 10), "14.08.1985", 0.9),
+        (box(10, 300), "14.08.1985", 0.8),
+        (box(15, 12), "PAKISTAN", 0.7),
+    ]
+    assert filter_duplicate_results(results) == results
+
+
+def test_filter_duplicate_results_drops_empty_and_unconfident():
+    results = [
+        (box(10, 10), "  ", 0.9),
+        (box(10, 100), "KHAN", 0.3),
+        (box(10, 200), "MALIK", 0.31),
+    ]
+    assert filter_duplicate_results(results) == [results[2]]
+
+
+def test_filter_duplicate_results_sorted_by_confidence():
+    results = [
+        (box(10, 10), "A1", 0.5),
+        (box(10, 200), "B2", 0.9),
+        (box(10, 400), "C3", 0.7),
+    ]
+    assert [text for _, text, _ in filter_duplicate_results(results)] == [
+        "B2",
+        "C3",
+        "A1",
+    ]
+
+
+def test_filter_duplicate_results_across_grid_cells():
+    # Either side of a cell boundary, and diagonally across a cell corner
+    edge = DUPLICATE_DISTANCE
+    results = [
+        (box(edge - 5, 10), "PAKISTAN", 0.9),
+        (box(edge + 5, 12), "PAKISTAN", 0.8),
+        (box(2 * edge - 3, 2 * edge - 3), "KHAN", 0.9),
+        (box(2 * edge + 3, 2 * edge + 3), "KHAN", 0.8),
+    ]
+    assert filter_duplicate_results(results) == [results[0], results[2]]
+
+
+def test_filter_duplicate_results_matches_pairwise_filtering():
+    # The grid must drop exactly what comparing every pair would
+    results = [
+        (box(x, y), text, confidence)
+        for x, y, text, confidence in [
+            (0, 0, "NAME", 0.9),
+            (30, 30, "NAME", 0.8),
+            (60, 60, "NAME", 0.7),
+            (49, 0, "NAMES", 0.6),
+            (120, 0, "NAME", 0.5),
+        ]
+    ]
+    assert filter_duplicate_results(results) == [results[0], results[2], results[4]]
@@ -0,0 +1,100 @@
+"""
+OCREngine's handling of a crashed worker pool, with stand-in executors so no
+process is started and no model is loaded.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import asyncio
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+from app.services.ocr.engine import OCREngine
+from app.services.ocr.errors import OCREngineUnavailableError
+
+
+class FakeExecutor:
+    def __init__(self, broken=False):
+        self.broken = broken
+        self.shutdowns = 0
+
+    def submit(self, fn, *args):
+        future = Future()
+        if self.broken:
+            future.set_exception(BrokenProcessPool("worker died"))
+        else:
+            future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        self.shutdowns += 1
+
+
+def echo(value):
+    return value
+
+
+def fake_engine(workers=2):
+    engine = OCREngine(workers=workers)
+    started = []
+
+    def start():
+        if engine._executor is None:
+            engine._executor = FakeExecutor()
+            started.append(engine._executor)
+
+    engine.start = start
+    return engine, started
+
+
+def test_default_torch_threads_use_normalised_workers(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    assert OCREngine(workers=-3).torch_threads == 8
+    assert OCREngine(workers=4).torch_threads == 2
+
+
+def test_broken_pool_is_restarted_once():
+    async def scenario():
+        engine, started = fake_engine()
+        engine.ready = True
+        broken = FakeExecutor(broken=True)
+        engine._executor = broken
+
+        outcomes = await asyncio.gather(
+            *[engine.run(echo, n) for n in range(3)], return_exceptions=True
+        )
+        assert all(isinstance(o, OCREngineUnavailableError) for o in outcomes)
+        # One replacement pool, and the crashed one shut down once
+        assert broken.shutdowns == 1
+        assert len(started) == 1 and engine._executor is started[0]
+        assert started[0].shutdowns == 0
+        assert engine.ready is False
+
+        # The new pool takes jobs and is warmed up again
+        assert await engine.run(echo, "ok") == "ok"
+        await engine._warm_up_task
+        assert engine.ready is True
+
+    asyncio.run(scenario())
+
+
+def test_failure_on_an_old_pool_leaves_the_new_one_alone():
+    async def scenario():
+        engine, started = fake_engine()
+        old = FakeExecutor(broken=True)
+        engine._executor = FakeExecutor()
+        assert engine._restart(old) is False
+        assert old.shutdowns == 0 and not started
+
+    asyncio.run(scenario())
+
+
+def test_thread_mode_has_no_pool_to_restart():
+    async def scenario():
+        engine = OCREngine(workers=0)
+        try:
+            assert await engine.run(echo, 5) == 5
+        finally:
+            engine.shutdown()
+
+    asyncio.run(scenario())
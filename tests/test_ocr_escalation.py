@@ -0,0 +1,132 @@
+"""
+Adaptive decoding: how much beam search a greedy pass needs, and which boxes
+it re-reads. The reader is stubbed.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from app.services.ocr import Cleaning_OCR
+from app.services.ocr.Cleaning_OCR import (
+    escalation_mode,
+    extract_text_with_multiple_configs,
+    uncertain_regions,
+)
+from app.utils.config import settings
+
+CNIC = "35202-1234567-1"
+NAME_BOX = [20, 120, 10, 30]
+CNIC_BOX = [20, 220, 50, 70]
+
+
+def result(box, text, confidence):
+    """An EasyOCR result for a (x_min, x_max, y_min, y_max) box"""
+    x_min, x_max, y_min, y_max = box
+    points = [[x_min, y_min], [x_max, y_min], [x_max, y_max], [x_min, y_max]]
+    return points, text, confidence
+
+
+def has_cnic(results):
+    return any(text == CNIC for _, text, _ in results)
+
+
+@pytest.fixture(autouse=True)
+def adaptive(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_ADAPTIVE", True)
+    monkeypatch.setattr(settings, "OCR_ADAPTIVE_MIN_CONFIDENCE", 0.6)
+    monkeypatch.setattr(settings, "OCR_MULTISCALE", False)
+
+
+def test_confident_fields_need_no_beam_search():
+    greedy = [result(NAME_BOX, "AHMED", 0.4), result(CNIC_BOX, CNIC, 0.9)]
+    assert escalation_mode(greedy, has_cnic) == "none"
+
+
+def test_fields_from_uncertain_tokens_rerun_those_regions():
+    greedy = [result(NAME_BOX, "AHMED", 0.9), result(CNIC_BOX, CNIC, 0.5)]
+    assert escalation_mode(greedy, has_cnic) == "regions"
+
+
+def test_missing_fields_need_the_full_pass():
+    greedy = [result(NAME_BOX, "AHMED", 0.5), result(CNIC_BOX, "3520Z", 0.5)]
+    assert escalation_mode(greedy, has_cnic) == "full"
+    assert escalation_mode([], has_cnic) == "full"
+
+
+def test_uncertain_regions_splits_horizontal_and_free_boxes():
+    rotated = [[10, 100], [90, 95], [92, 115], [12, 120]]
+    regions = uncertain_regions(
+        [
+            result(NAME_BOX, "AHMED", 0.9),
+            result(CNIC_BOX, CNIC, 0.5),
+            (rotated, "LAHORE", 0.4),
+        ]
+    )
+
+    assert regions == ([CNIC_BOX], [rotated])
+
+
+class StubReader:
+    """Reads each (x_min, x_max, y_min, y_max) box as reads[decoder][box]"""
+
+    def __init__(self, reads):
+        self.reads = reads
+        self.calls = []
+
+    def detect(self, batch, reformat=False):
+        return [[list(box) for box in self.reads["greedy"]]], [[]]
+
+    def recognize(self, gray, horizontal_list, free_list, decoder, **kwargs):
+        self.calls.append((decoder, [tuple(box) for box in horizontal_list]))
+        return [
+            result(box, *self.reads[decoder][tuple(box)]) for box in horizontal_list
+        ]
+
+
+def run(monkeypatch, reads, has_required_fields):
+    reader = StubReader(reads)
+    monkeypatch.setattr(Cleaning_OCR, "get_reader", lambda languages: reader)
+    image = np.full((100, 300), 255, dtype=np.uint8)
+    results = extract_text_with_multiple_configs(
+        image, has_required_fields=has_required_fields
+    )
+    return results, reader.calls
+
+
+def test_regions_mode_rereads_only_uncertain_boxes(monkeypatch):
+    reads = {
+        "greedy": {tuple(NAME_BOX): ("AHMED", 0.9), tuple(CNIC_BOX): (CNIC, 0.5)},
+        "beamsearch": {tuple(CNIC_BOX): (CNIC, 0.8)},
+    }
+    results, calls = run(monkeypatch, reads, has_cnic)
+
+    assert calls == [
+        ("greedy", [tuple(NAME_BOX), tuple(CNIC_BOX)]),
+        ("beamsearch", [tuple(CNIC_BOX)]),
+    ]
+    assert [(text, confidence) for _, text, confidence in results] == [
+        ("AHMED", 0.9),
+        (CNIC, 0.8),
+    ]
+
+
+def test_confident_greedy_pass_skips_beam_search(monkeypatch):
+    reads = {
+        "greedy": {tuple(NAME_BOX): ("AHMED", 0.9), tuple(CNIC_BOX): (CNIC, 0.9)},
+        "beamsearch": {},
+    }
+    _, calls = run(monkeypatch, reads, has_cnic)
+
+    assert [decoder for decoder, _ in calls] == ["greedy"]
+
+
+def test_without_a_field_check_both_passes_read_every_box(monkeypatch):
+    both = {tuple(NAME_BOX): ("AHMED", 0.9), tuple(CNIC_BOX): (CNIC, 0.9)}
+    _, calls = run(monkeypatch, {"greedy": both, "beamsearch": both}, None)
+
+    assert calls == [
+        ("greedy", [tuple(NAME_BOX), tuple(CNIC_BOX)]),
+        ("beamsearch", [tuple(NAME_BOX), tuple(CNIC_BOX)]),
+    ]
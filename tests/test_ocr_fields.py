@@ -0,0 +1,227 @@
+"""
+Declarative field extraction: how a DocumentSpec finds each FieldSpec's
+value from its labels, its pattern or whole tokens.
+
+Run from the repository root: python -m pytest tests
+"""
+
+from app.services.ocr.fields import DocumentSpec, FieldSpec, format_cnic
+
+
+def result(text, x, y, width=None, height=20, confidence=0.9):
+    """An EasyOCR result whose box has its top left corner at (x, y)"""
+    width = width or 12 * len(text)
+    box = [[x, y], [x + width, y], [x + width, y + height], [x, y + height]]
+    return box, text, confidence
+
+
+def test_next_token_in_reading_order():
+    spec = DocumentSpec([FieldSpec("name", labels=("NAME",))])
+    fields = spec.extract(
+        [result("AHMED KHAN", 0, 40), result("Name", 0, 0), result("Other", 0, 80)]
+    )
+
+    assert fields.fields == {"name": "AHMED KHAN"}
+
+
+def test_longest_label_wins():
+    spec = DocumentSpec(
+        [
+            FieldSpec("name", labels=("NAME",)),
+            FieldSpec("father_name", labels=("FATHER NAME",)),
+        ]
+    )
+    fields = spec.extract(
+        [
+            result("Name", 0, 0),
+            result("AHMED", 0, 40),
+            result("Father Name", 0, 80),
+            result("KHALID", 0, 120),
+        ]
+    ).fields
+
+    assert fields == {"name": "AHMED", "father_name": "KHALID"}
+
+
+def test_right_and_below_relations():
+    spec = DocumentSpec(
+        [
+            FieldSpec("gender", labels=("GENDER",), relation="right"),
+            FieldSpec("country", labels=("COUNTRY",), relation="below"),
+        ]
+    )
+    fields = spec.extract(
+        [
+            result("Gender", 0, 0, width=80),
+            result("Country", 200, 0, width=80),
+            result("M", 100, 2, width=15),
+            # Under "Gender", so not the country
+            result("ELSEWHERE", 0, 30, width=100),
+            result("Pakistan", 210, 30, width=90),
+        ]
+    ).fields
+
+    assert fields == {"gender": "M", "country": "Pakistan"}
+
+
+def test_following_relation_runs_to_the_next_label():
+    spec = DocumentSpec(
+        [FieldSpec("address", labels=("ADDRESS",), relation="following")],
+        stop_labels=("SIGNATURE",),
+    )
+    fields = spec.extract(
+        [
+            result("Address:", 0, 0),
+            result("House 12, Street 4", 0, 30),
+            result("Lahore", 0, 60),
+            result("Signature", 0, 90),
+            result("scribble", 0, 120),
+        ]
+    ).fields
+
+    assert fields == {"address": "House 12, Street 4 Lahore"}
+
+
+def test_value_must_match_the_pattern():
+    spec = DocumentSpec(
+        [FieldSpec("cnic", labels=("CNIC",), pattern=r"\d{5}-\d{7}-\d")]
+    )
+
+    assert spec.extract([result("CNIC", 0, 0), result("unreadable", 0, 30)]).fields == {
+        "cnic": "Not Found"
+    }
+
+
+def test_anywhere_field_and_pick():
+    spec = DocumentSpec(
+        [
+            FieldSpec(
+                "cnic",
+                pattern=r"\d{5}\D?\d{7}\D?\d",
+                anywhere=True,
+                normalize=format_cnic,
+            ),
+            FieldSpec("year", pattern=r"\b\d{4}\b", anywhere=True, pick=max),
+        ]
+    )
+    fields = spec.extract(
+        [
+            result("3520212345671", 0, 0),
+            result("1990", 0, 30),
+            result("2031", 0, 60),
+            result("2021", 0, 90),
+        ]
+    ).fields
+
+    assert fields == {"cnic": "35202-1234567-1", "year": "2031"}
+
+
+def test_whole_token_multiple_and_private_fields():
+    spec = DocumentSpec(
+        [
+            FieldSpec("sex", pattern=r"[MF]", whole_token=True),
+            FieldSpec("mrz_lines", pattern=r".*<<.*", whole_token=True, multiple=True),
+            FieldSpec("_digits", pattern=r"\d+", anywhere=True, multiple=True),
+        ],
+        uppercase=True,
+    )
+    extraction = spec.extract(
+        [
+            # "M" inside a word is not the sex
+            result("Male 12", 0, 0),
+            result("f", 0, 30),
+            result("P<PAKKHAN<<AHMED", 0, 60),
+            result("AB1234567<<", 0, 90),
+        ]
+    )
+
+    assert extraction.fields == {
+        "sex": "F",
+        "mrz_lines": ["P<PAKKHAN<<AHMED", "AB1234567<<"],
+    }
+    assert extraction.found["_digits"] == ["12", "1234567"]
+
+
+def test_low_confidence_tokens_are_dropped():
+    spec = DocumentSpec([FieldSpec("name", labels=("NAME",))], default=None)
+    fields = spec.extract(
+        [result("Name", 0, 0), result("AHMED", 0, 30, confidence=0.2)]
+    ).fields
+
+    assert fields == {"name": None}
+
+
+def test_confidence_order():
+    spec = DocumentSpec(
+        [FieldSpec("number", pattern=r"\d{4}", anywhere=True)],
+        min_confidence=None,
+        order="confidence",
+    )
+    fields = spec.extract(
+        [result("1111", 0, 0, confidence=0.4), result("2222", 0, 30, confidence=0.8)]
+    ).fields
+
+    assert fields == {"number": "2222"}
+
+
+def test_fuzzy_labels_match_garbled_labels():
+    spec = DocumentSpec(
+        [
+            FieldSpec("surname", labels=("SURNAME",)),
+            FieldSpec("father_name", labels=("FATHER NAME",)),
+        ],
+        uppercase=True,
+        fuzzy_labels=True,
+    )
+    fields = spec.extract(
+        [
+            result("Surnarne", 0, 0),
+            result("Khan", 0, 30),
+            result("FATHFR NAME", 0, 60),
+            result("Khalid", 0, 90),
+        ]
+    ).fields
+
+    assert fields == {"surname": "KHAN", "father_name": "KHALID"}
+
+
+def test_fuzzy_labels_ignore_fragments_and_poor_matches():
+    spec = DocumentSpec(
+        [FieldSpec("father_name", labels=("FATHER NAME",))],
+        uppercase=True,
+        fuzzy_labels=True,
+    )
+    fields = spec.extract(
+        [
+            # Scores 100 against a part of the label, but is far too short
+            result("NAME", 0, 0),
+            result("AHMED", 0, 30),
+            result("FEATHERED GAME", 0, 60),
+            result("KHALID", 0, 90),
+        ]
+    ).fields
+
+    assert fields == {"father_name": "Not Found"}
+
+
+def test_passport_fields_from_garbled_labels():
+    from app.services.ocr.passport_service import extract_passport_fields
+
+    fields = extract_passport_fields(
+        [
+            result("PASSP0RT", 0, 0),
+            result("Surnarne", 0, 40),
+            result("KHAN", 0, 70),
+            result("Given Narnes", 0, 100),
+            result("AHMED ALI", 0, 130),
+            result("Date 0f Birth", 0, 160),
+            result("14.08.1985", 0, 190),
+            result("Date of lssue", 0, 220),
+            result("02.03.2020", 0, 250),
+        ]
+    )
+
+    assert fields["surname"] == "KHAN"
+    assert fields["given_names"] == "AHMED ALI"
+    assert fields["date_of_birth"] == "14 AUG 1985"
+    assert fields["date_of_issue"] == "02 MAR 2020"
@@ -0,0 +1,75 @@
+"""
+Iqama numbers: validation, the Arabic-digit field, and the fast mode that
+reads the number with the English model. Readers are stubbed.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from app.services.ocr import iqama_service
+from app.services.ocr.iqama_service import (
+    extract_iqama_fast,
+    extract_iqama_fields,
+    is_valid_iqama_number,
+)
+from app.utils.config import settings
+
+
+def test_is_valid_iqama_number():
+    assert is_valid_iqama_number("2147413815")
+    # Wrong check digit, wrong first digit, wrong length
+    assert not is_valid_iqama_number("2147413816")
+    assert not is_valid_iqama_number("1147413815")
+    assert not is_valid_iqama_number("214741381")
+    assert not is_valid_iqama_number("21474138150")
+
+
+def test_extract_iqama_fields_takes_the_most_confident_ten_digit_run():
+    box = [[0, 0], [10, 0], [10, 5], [0, 5]]
+    results = [
+        (box, "٢١٤٧٤١٣٨١٥١", 0.99),  # eleven digits
+        (box, "رقم الإقامة ٢١٤٧٤١٣٨١٥", 0.6),
+        (box, "٢٣٣٣٣٣٣٣٣٣", 0.9),
+    ]
+    assert extract_iqama_fields(results) == {"iqama_number_arabic": "٢٣٣٣٣٣٣٣٣٣"}
+    assert extract_iqama_fields([]) == {"iqama_number_arabic": None}
+
+
+@pytest.fixture
+def fast_reader(monkeypatch):
+    """Stub detector and recognizer; boxes are (x_min, x_max, y_min, y_max)"""
+    reads = {}
+    calls = []
+
+    def detect(reader, images):
+        return [(list(reads), [])]
+
+    def recognize(reader, gray, regions, config, index, batch_size=1):
+        calls.append((list(regions[0]), config["allowlist"]))
+        return [(None, reads[box], 0.9) for box in regions[0]]
+
+    monkeypatch.setattr(settings, "OCR_IQAMA_FAST", True)
+    monkeypatch.setattr(iqama_service, "get_reader", lambda languages: None)
+    monkeypatch.setattr(iqama_service, "detect_text_regions", detect)
+    monkeypatch.setattr(iqama_service, "recognize_regions", recognize)
+    return reads, calls
+
+
+def test_fast_mode_reads_a_valid_number(fast_reader):
+    reads, calls = fast_reader
+    reads[(0, 700, 0, 100)] = "2147413816"  # wrong check digit
+    reads[(0, 140, 0, 100)] = "KINGDOM"  # not number-shaped, never read
+    reads[(0, 650, 0, 95)] = "ID 2147413815"
+    fields = extract_iqama_fast(None, processed_image=np.zeros((10, 10), np.uint8))
+    assert fields == {"iqama_number_arabic": "٢١٤٧٤١٣٨١٥"}
+    assert calls == [([(0, 700, 0, 100), (0, 650, 0, 95)], "0123456789")]
+
+
+def test_fast_mode_misses_without_a_valid_number(fast_reader):
+    reads, _ = fast_reader
+    reads[(0, 700, 0, 100)] = "1147413815"
+    assert (
+        extract_iqama_fast(None, processed_image=np.zeros((10, 10), np.uint8)) is None
+    )
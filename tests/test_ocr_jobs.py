@@ -0,0 +1,172 @@
+"""
+The OCR job queue: claiming, lease expiry, retry backoff and the outcome of
+a failed or hung attempt. Runs on in-memory SQLite (JSONB stored as JSON);
+the FOR UPDATE SKIP LOCKED clause is Postgres-only and ignored there.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import sessionmaker
+
+from app.features.user.noc_application import service
+from app.features.user.noc_application.service import (
+    claim_next_ocr_job,
+    process_ocr_job,
+    retry_ocr_job,
+)
+from app.models.ocr_job import OCRDocumentTypeEnum, OCRJob, OCRJobStatusEnum
+from app.services.ocr.engine import job_deadline
+from app.services.ocr.errors import OCRTimeoutError
+from app.utils.config import settings
+
+
+@compiles(JSONB, "sqlite")
+def _jsonb_as_json(type_, compiler, **kw):
+    return "JSON"
+
+
+def utcnow():
+    # SQLite hands datetimes back without their time zone
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    OCRJob.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+    engine.dispose()
+
+
+def add_job(db, minutes_ago, **columns):
+    created = datetime.now(timezone.utc) - timedelta(minutes=minutes_ago)
+    columns = {
+        "status": OCRJobStatusEnum.pending,
+        "attempts": 0,
+        "created_at": created,
+        "updated_at": created,
+        **columns,
+    }
+    job = OCRJob(
+        document_type=OCRDocumentTypeEnum.nicop_front, image=b"jpeg", **columns
+    )
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_claims_the_oldest_pending_job(db):
+    newer = add_job(db, minutes_ago=1)
+    older = add_job(db, minutes_ago=5)
+
+    job = claim_next_ocr_job(db, "worker-1")
+    assert job.id == older.id
+    assert job.status == OCRJobStatusEnum.processing
+    assert job.attempts == 1 and job.worker_id == "worker-1"
+
+    assert claim_next_ocr_job(db, "worker-2").id == newer.id
+    assert claim_next_ocr_job(db, "worker-3") is None
+
+
+def test_reclaims_a_job_whose_lease_expired(db):
+    lease = timedelta(seconds=settings.OCR_JOB_LEASE_SECONDS)
+    add_job(
+        db,
+        minutes_ago=10,
+        status=OCRJobStatusEnum.processing,
+        started_at=datetime.now(timezone.utc) - lease / 2,
+        attempts=1,
+    )
+    assert claim_next_ocr_job(db, "worker-2") is None
+
+    stale = add_job(
+        db,
+        minutes_ago=10,
+        status=OCRJobStatusEnum.processing,
+        started_at=datetime.now(timezone.utc) - lease - timedelta(seconds=1),
+        attempts=1,
+    )
+    job = claim_next_ocr_job(db, "worker-2")
+    assert job.id == stale.id
+    assert job.attempts == 2 and job.worker_id == "worker-2"
+
+
+def test_retry_backs_off_exponentially(db, monkeypatch):
+    monkeypatch.setattr(settings, "OCR_JOB_RETRY_BACKOFF_SECONDS", 30)
+    job = add_job(db, minutes_ago=1)
+
+    for attempt, delay in [(1, 30), (2, 60), (3, 120)]:
+        job.attempts = attempt
+        before = utcnow()
+        retry_ocr_job(db, job)
+        assert job.status == OCRJobStatusEnum.pending
+        assert job.available_at - before == pytest.approx(
+            timedelta(seconds=delay), abs=timedelta(seconds=2)
+        )
+
+
+def test_backed_off_job_waits_until_available(db):
+    job = add_job(
+        db,
+        minutes_ago=5,
+        available_at=datetime.now(timezone.utc) + timedelta(minutes=1),
+    )
+    assert claim_next_ocr_job(db, "worker-1") is None
+
+    job.available_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.commit()
+    assert claim_next_ocr_job(db, "worker-1").id == job.id
+
+
+def test_failed_attempt_is_retried_then_fails(db, monkeypatch):
+    def crash(document_type, content):
+        raise RuntimeError("reader crashed")
+
+    monkeypatch.setattr("app.services.ocr.documents.run_document_ocr", crash)
+    monkeypatch.setattr(service.ocr_result_cache, "get", lambda *args: None)
+    monkeypatch.setattr(settings, "OCR_JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(settings, "OCR_JOB_RETRY_BACKOFF_SECONDS", 0)
+    add_job(db, minutes_ago=1)
+
+    job = process_ocr_job(db, claim_next_ocr_job(db, "worker-1"))
+    assert job.status == OCRJobStatusEnum.pending and job.attempts == 1
+
+    job = process_ocr_job(db, claim_next_ocr_job(db, "worker-1"))
+    assert job.status == OCRJobStatusEnum.failed
+    assert job.error == "reader crashed" and job.image is None
+
+
+def test_hung_attempt_times_out_and_is_retried(db, monkeypatch):
+    def hang(document_type, content):
+        time.sleep(5)
+
+    monkeypatch.setattr("app.services.ocr.documents.run_document_ocr", hang)
+    monkeypatch.setattr(service.ocr_result_cache, "get", lambda *args: None)
+    monkeypatch.setattr(service.ocr_engine, "job_timeout", 0.1)
+    add_job(db, minutes_ago=1)
+
+    started = time.perf_counter()
+    job = process_ocr_job(db, claim_next_ocr_job(db, "worker-1"))
+    assert time.perf_counter() - started < 2
+    assert job.status == OCRJobStatusEnum.pending and job.available_at is not None
+
+
+def test_job_deadline():
+    with pytest.raises(OCRTimeoutError):
+        with job_deadline(0.05):
+            time.sleep(1)
+    # A falsy timeout disables it, and a finished block leaves no alarm behind
+    with job_deadline(0):
+        time.sleep(0.1)
+    with job_deadline(0.05):
+        pass
+    time.sleep(0.1)
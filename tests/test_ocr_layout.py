@@ -0,0 +1,68 @@
+"""
+Finding and flattening an ID card in a photo for layout-template reads.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from app.services.ocr.layout import (
+    ID1_ASPECT_RATIO,
+    CardLayout,
+    find_card,
+    order_corners,
+    rectify_card,
+)
+
+LAYOUT = CardLayout(
+    "card", {"top": (0.0, 0.0, 1.0, 0.5), "bottom": (0.0, 0.5, 1.0, 1.0)}
+)
+
+
+def photo_with_card(x=300, y=250, width=856, height=540):
+    photo = np.full((1200, 1600, 3), 40, np.uint8)
+    photo[y : y + height, x : x + width] = 210
+    return photo
+
+
+def test_order_corners():
+    corners = order_corners([[10, 90], [100, 5], [5, 10], [95, 95]])
+    assert corners.tolist() == [[5, 10], [100, 5], [95, 95], [10, 90]]
+
+
+def test_find_card_on_a_table():
+    corners = find_card(photo_with_card())
+    assert corners is not None
+    expected = [[300, 250], [1156, 250], [1156, 790], [300, 790]]
+    assert np.abs(corners - np.array(expected)).max() < 8
+
+
+def test_find_card_in_a_photo_cropped_to_the_card():
+    card = np.full((540, 856, 3), 210, np.uint8)
+    corners = find_card(card)
+    assert corners.tolist() == [[0, 0], [856, 0], [856, 540], [0, 540]]
+
+
+def test_find_card_none_without_a_card():
+    assert find_card(np.full((1200, 1200, 3), 128, np.uint8)) is None
+
+
+def test_rectify_card_to_the_layout_size():
+    photo = photo_with_card()
+    card = rectify_card(photo, find_card(photo), LAYOUT)
+    assert card.shape[:2] == (LAYOUT.height, LAYOUT.width)
+    assert LAYOUT.width / LAYOUT.height == pytest.approx(ID1_ASPECT_RATIO, rel=0.01)
+    # The table does not leak into the flattened card
+    assert card[20:-20, 20:-20].min() > 150
+
+
+def test_rectify_card_rejects_portrait():
+    corners = order_corners([[0, 0], [540, 0], [540, 856], [0, 856]])
+    assert rectify_card(photo_with_card(), corners, LAYOUT) is None
+
+
+def test_field_at():
+    assert LAYOUT.field_at(100, 10) == "top"
+    assert LAYOUT.field_at(100, LAYOUT.height - 10) == "bottom"
+    assert LAYOUT.field_at(LAYOUT.width + 10, 10) is None
@@ -0,0 +1,168 @@
+"""
+The passport MRZ: ICAO 9303 check digits and TD3 parsing, and the MRZ-first
+path, which decides how much of the page is still OCR'd once the MRZ
+validates. The MRZ reader is stubbed, so no model is loaded.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from app.services.ocr import passport_service
+from app.services.ocr.mrz import check_digit, parse_td3
+from app.services.ocr.passport_service import (
+    PASSPORT_VISUAL_ZONE_REQUIRED_FIELDS,
+    merge_mrz_fields,
+    read_mrz_first,
+)
+
+
+def td3(number="AB1234567", birth="970712", sex="M", expiry="330105", personal=""):
+    """A TD3 MRZ with valid check digits"""
+    line1 = "P<PAKKHAN<<AHMED<ALI".ljust(44, "<")
+    personal = personal.ljust(14, "<")
+    line2 = (
+        number
+        + check_digit(number)
+        + "PAK"
+        + birth
+        + check_digit(birth)
+        + sex
+        + expiry
+        + check_digit(expiry)
+        + personal
+        + check_digit(personal)
+    )
+    composite = line2[0:10] + line2[13:20] + line2[21:43]
+    return line1, line2 + check_digit(composite)
+
+
+def test_check_digit_icao_examples():
+    # ICAO 9303 part 3 specimen values
+    assert check_digit("L898902C3") == "6"
+    assert check_digit("740812") == "2"
+    assert check_digit("120415") == "9"
+    assert check_digit("<<<<<<<<<<<<<<") == "0"
+
+
+def test_parse_td3():
+    fields = parse_td3(*td3(personal="3520212345671"))
+    assert fields["passport_number"] == "AB1234567"
+    assert fields["surname"] == "KHAN"
+    assert fields["given_names"] == "AHMED ALI"
+    assert fields["nationality"] == "PAKISTANI"
+    assert fields["issuing_authority"] == "PAKISTAN"
+    assert fields["citizenship_number"] == "35202-1234567-1"
+    assert fields["sex"] == "M"
+    assert fields["date_of_birth"] == "12 JUL 1997"
+    assert fields["date_of_expiry"] == "05 JAN 2033"
+
+
+def test_parse_td3_empty_personal_number():
+    assert parse_td3(*td3())["citizenship_number"] == "Not Found"
+
+
+def test_parse_td3_repairs_letters_in_digit_fields():
+    line1, line2 = td3()
+    # 970712 read as 97O7I2
+    line2 = line2[:13] + "97O7I2" + line2[19:]
+    assert parse_td3(line1, line2)["date_of_birth"] == "12 JUL 1997"
+
+
+def test_parse_td3_rejects_bad_check_digits():
+    line1, line2 = td3()
+    assert (
+        parse_td3(line1, line2[:9] + str((int(line2[9]) + 1) % 10) + line2[10:]) is None
+    )
+    assert parse_td3(line1, line2[:43] + str((int(line2[43]) + 1) % 10)) is None
+    assert parse_td3("V" + line1[1:], line2) is None
+
+
+# MRZ first
+
+
+MRZ_FIELDS = {
+    "type": "P",
+    "country_code": "PAK",
+    "passport_number": "AB1234567",
+    "surname": "KHAN",
+    "given_names": "AHMED ALI",
+    "nationality": "PAKISTANI",
+    "issuing_authority": "PAKISTAN",
+    "citizenship_number": "35202-1234567-1",
+    "sex": "M",
+    "date_of_birth": "12 JUL 1997",
+    "date_of_expiry": "05 JAN 2033",
+}
+
+
+@pytest.fixture
+def valid_mrz(monkeypatch):
+    fields = dict(MRZ_FIELDS)
+    band_tops = []
+
+    def read_passport_mrz(gray):
+        band_tops.append(int(gray.shape[0] * 0.8))
+        return dict(fields), band_tops[-1]
+
+    fields_and_bands = fields, band_tops
+
+    monkeypatch.setattr(passport_service, "read_passport_mrz", read_passport_mrz)
+    return fields_and_bands
+
+
+def page():
+    return np.full((880, 1250, 3), 230, np.uint8)
+
+
+def test_visual_zone_ocr_for_fields_the_mrz_lacks(valid_mrz):
+    _, band_tops = valid_mrz
+    mrz_fields, visual_zone, required = read_mrz_first(page())
+    assert mrz_fields == MRZ_FIELDS
+    # Only the page above the MRZ band, checked for the issue date
+    assert visual_zone.shape[0] == band_tops[-1]
+    assert required == PASSPORT_VISUAL_ZONE_REQUIRED_FIELDS
+
+
+def test_visual_zone_skipped_when_no_field_is_wanted(valid_mrz):
+    mrz_fields, visual_zone, required = read_mrz_first(page(), visual_fields=())
+    assert mrz_fields == MRZ_FIELDS
+    assert visual_zone is None and required == ()
+
+
+def test_visual_zone_read_for_an_empty_mrz_field(valid_mrz):
+    fields, _ = valid_mrz
+    fields["citizenship_number"] = "Not Found"
+    _, visual_zone, required = read_mrz_first(page(), visual_fields=())
+    assert visual_zone is not None
+    # The issue date is not wanted, so greedy decoding is enough
+    assert required == ()
+
+
+def test_invalid_mrz_reads_the_whole_page(monkeypatch):
+    monkeypatch.setattr(passport_service, "read_passport_mrz", lambda gray: (None, 700))
+    image = page()
+    mrz_fields, visual_zone, required = read_mrz_first(image)
+    assert mrz_fields is None and visual_zone is image
+    assert required == passport_service.PASSPORT_REQUIRED_FIELDS
+
+
+def test_process_passport_front_skips_ocr_with_a_complete_mrz(valid_mrz, monkeypatch):
+    monkeypatch.setattr(passport_service, "PASSPORT_VISUAL_FIELDS", ())
+
+    def no_ocr(*args, **kwargs):
+        raise AssertionError("the page should not be OCR'd")
+
+    monkeypatch.setattr(passport_service, "extract_text_with_multiple_configs", no_ocr)
+    fields = passport_service.process_passport_front(page())
+    assert fields["passport_number"] == "AB1234567"
+    assert fields["date_of_issue"] == "Not Found"
+
+
+def test_merge_mrz_fields_keeps_page_values_the_mrz_lacks():
+    page_fields = {"citizenship_number": "35202-1234567-1", "surname": "KHAN"}
+    merged = merge_mrz_fields(
+        page_fields, {"citizenship_number": "Not Found", "surname": "MALIK"}
+    )
+    assert merged == {"citizenship_number": "35202-1234567-1", "surname": "MALIK"}
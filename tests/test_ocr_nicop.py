@@ -0,0 +1,135 @@
+"""
+NICOP rules: assigning unlabelled dates by chronology, and reading the card
+through its layout template with a fall back when the read is not trusted.
+
+Run from the repository root: python -m pytest tests
+"""
+
+from datetime import date
+
+import pytest
+
+from app.services.ocr import nicop_service
+from app.services.ocr.nicop_service import (
+    assign_dates_by_chronology,
+    extract_nicop_front_with_layout,
+    plausible_nicop_dates,
+)
+from app.utils.config import settings
+
+
+def test_assign_dates_by_chronology_fills_in_order():
+    info = dict.fromkeys(
+        ("date_of_birth", "date_of_issue", "date_of_expiry"), "Not Found"
+    )
+    assign_dates_by_chronology(
+        info, [date(2033, 1, 5), date(1997, 7, 12), date(2023, 1, 6)]
+    )
+    assert info == {
+        "date_of_birth": date(1997, 7, 12),
+        "date_of_issue": date(2023, 1, 6),
+        "date_of_expiry": date(2033, 1, 5),
+    }
+
+
+def test_assign_dates_by_chronology_two_dates_ten_years_apart():
+    info = dict.fromkeys(
+        ("date_of_birth", "date_of_issue", "date_of_expiry"), "Not Found"
+    )
+    assign_dates_by_chronology(info, [date(2023, 1, 6), date(2033, 1, 5)])
+    assert info["date_of_birth"] == "Not Found"
+    assert info["date_of_issue"] == date(2023, 1, 6)
+    assert info["date_of_expiry"] == date(2033, 1, 5)
+
+
+def test_assign_dates_by_chronology_keeps_labelled_dates():
+    info = {
+        "date_of_birth": date(1997, 7, 12),
+        "date_of_issue": "Not Found",
+        "date_of_expiry": "Not Found",
+    }
+    assign_dates_by_chronology(
+        info, [date(1997, 7, 12), date(2023, 1, 6), date(2033, 1, 5)]
+    )
+    assert info["date_of_issue"] == date(2023, 1, 6)
+    assert info["date_of_expiry"] == date(2033, 1, 5)
+
+
+def test_plausible_nicop_dates():
+    assert plausible_nicop_dates(date(1997, 7, 12), date(2023, 1, 6), date(2033, 1, 5))
+    # Birth and issue swapped
+    assert not plausible_nicop_dates(
+        date(2023, 1, 6), date(1997, 7, 12), date(2033, 1, 5)
+    )
+    # Expiry not about ten years after issue
+    assert not plausible_nicop_dates(
+        date(1997, 7, 12), date(2023, 1, 6), date(2026, 1, 5)
+    )
+
+
+# Layout template reads
+
+
+LAYOUT_READ = {
+    "name": "Name AHMED ALI KHAN",
+    "father_name": "Father Name MUHAMMAD KHAN",
+    "gender": "M",
+    "country": "SAUDI ARABIA",
+    "cnic_number": "35202 1234567 1",
+    "date_of_birth": "12.07.1997",
+    "date_of_issue": "06.01.2023",
+    "date_of_expiry": "05.01.2033",
+}
+
+
+@pytest.fixture
+def layout_read(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_LAYOUT_TEMPLATES", True)
+    read = dict(LAYOUT_READ)
+    monkeypatch.setattr(
+        nicop_service, "read_layout_fields", lambda image, layout: dict(read)
+    )
+    return read
+
+
+def test_layout_read_parses_fields(layout_read):
+    info = extract_nicop_front_with_layout(None)
+    assert info == {
+        "name": "AHMED ALI KHAN",
+        "father_name": "MUHAMMAD KHAN",
+        "gender": "M",
+        "country": "Saudi Arabia",
+        "cnic_number": "35202-1234567-1",
+        "date_of_birth": "12.07.1997",
+        "date_of_issue": "06.01.2023",
+        "date_of_expiry": "05.01.2033",
+    }
+
+
+def test_layout_read_falls_back_on_out_of_order_dates(layout_read):
+    # A crop shifted by one row reads the issue date as the birth date
+    layout_read["date_of_birth"], layout_read["date_of_issue"] = (
+        layout_read["date_of_issue"],
+        layout_read["date_of_birth"],
+    )
+    assert extract_nicop_front_with_layout(None) is None
+
+
+def test_layout_read_falls_back_on_a_missing_required_field(layout_read):
+    layout_read["cnic_number"] = "35202 12345"
+    assert extract_nicop_front_with_layout(None) is None
+
+
+def test_layout_read_falls_back_when_no_card_is_found(layout_read, monkeypatch):
+    monkeypatch.setattr(nicop_service, "read_layout_fields", lambda image, layout: None)
+    assert extract_nicop_front_with_layout(None) is None
+
+
+def test_layout_templates_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_LAYOUT_TEMPLATES", False)
+
+    def unexpected(image, layout):
+        raise AssertionError("layout read while templates are off")
+
+    monkeypatch.setattr(nicop_service, "read_layout_fields", unexpected)
+    assert extract_nicop_front_with_layout(None) is None
@@ -0,0 +1,125 @@
+"""
+Orientation and skew: rotated photos are turned upright and slanted ones
+straightened before OCR. The reader is stubbed; skew runs on drawn pages.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+from app.services.ocr import orientation
+from app.services.ocr.metrics import ocr_metrics
+from app.services.ocr.orientation import (
+    MIN_SKEW_DEGREES,
+    deskew,
+    detect_orientation,
+    estimate_skew,
+    normalize_orientation,
+    rotate,
+)
+from app.utils.config import settings
+
+
+class ShapeReader:
+    """
+    Sees wide line boxes on a landscape image and tall ones on a portrait
+    image; reads confidently only when the dark half is on the left.
+    """
+
+    def __init__(self):
+        self.recognized = 0
+
+    def detect(self, batch, reformat=False):
+        height, width = batch.shape[1:3]
+        if height > width:
+            boxes = [[10, 30, 10, 100], [40, 60, 10, 120]]
+        else:
+            boxes = [[10, 100, 10, 30], [10, 120, 40, 60]]
+        return [boxes], [[]]
+
+    def recognize(self, gray, horizontal_list, free_list, **kwargs):
+        self.recognized += 1
+        half = gray.shape[1] // 2
+        upright = gray[:, :half].mean() < gray[:, half:].mean()
+        return [(None, "TEXT", 0.9 if upright else 0.3) for _ in horizontal_list]
+
+
+@pytest.fixture
+def reader(monkeypatch):
+    reader = ShapeReader()
+    monkeypatch.setattr(orientation, "get_reader", lambda languages: reader)
+    return reader
+
+
+def upright_page():
+    page = np.full((400, 600, 3), 255, dtype=np.uint8)
+    page[:, :300] = 0
+    return page
+
+
+@pytest.mark.parametrize("turned", [0, 90, 180, 270])
+def test_detect_orientation_undoes_each_rotation(reader, turned):
+    image = rotate(upright_page(), (360 - turned) % 360)
+    assert detect_orientation(image) == turned
+
+
+def test_confident_upright_read_skips_the_flipped_read(reader):
+    detect_orientation(upright_page())
+    assert reader.recognized == 1
+
+
+def page_with_lines(angle):
+    """A page of ruled lines sloping angle degrees clockwise"""
+    page = np.full((600, 900, 3), 255, dtype=np.uint8)
+    for y in range(100, 550, 60):
+        cv2.line(page, (100, y), (800, y), (0, 0, 0), 3)
+    matrix = cv2.getRotationMatrix2D((450, 300), -angle, 1.0)
+    return cv2.warpAffine(page, matrix, (900, 600), borderValue=(255, 255, 255))
+
+
+def card_on_table(angle):
+    table = np.full((700, 1000, 3), 40, dtype=np.uint8)
+    corners = cv2.boxPoints(((500, 350), (600, 380), angle)).astype(np.int32)
+    cv2.fillPoly(table, [corners], (230, 230, 230))
+    return table
+
+
+@pytest.mark.parametrize("angle", [0, 5, -8, 12])
+def test_estimate_skew(angle):
+    assert estimate_skew(page_with_lines(angle)) == pytest.approx(angle, abs=0.5)
+    assert estimate_skew(card_on_table(angle)) == pytest.approx(angle, abs=0.5)
+
+
+def test_blank_page_has_no_skew():
+    assert estimate_skew(np.full((400, 600, 3), 255, dtype=np.uint8)) is None
+
+
+def test_deskew_straightens_and_keeps_the_whole_page():
+    page = page_with_lines(8)
+    straight = deskew(page, estimate_skew(page))
+
+    assert abs(estimate_skew(straight)) < MIN_SKEW_DEGREES
+    assert straight.shape[0] > page.shape[0] and straight.shape[1] > page.shape[1]
+
+
+def test_normalize_orientation(reader, monkeypatch):
+    monkeypatch.setattr(settings, "OCR_ORIENTATION", True)
+    page = page_with_lines(6)
+    # Dark left half, so the stub reads it as upright
+    page[:, :100] = 0
+
+    with ocr_metrics.capture() as recorded:
+        normalized = normalize_orientation(page)
+
+    assert recorded == {"ocr.orientation.0": 1, "ocr.deskew.applied": 1}
+    assert normalized.shape != page.shape
+
+
+def test_normalize_orientation_off(reader, monkeypatch):
+    monkeypatch.setattr(settings, "OCR_ORIENTATION", False)
+    page = page_with_lines(6)
+
+    assert normalize_orientation(page) is page
+    assert reader.recognized == 0
@@ -0,0 +1,53 @@
+"""
+The upload quality gate's verdicts on synthetic photos.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import cv2
+import numpy as np
+
+from app.services.ocr.quality import image_quality_scores, quality_problem
+
+
+def card_photo(card_gray, table_gray=60):
+    """A 1200x900 photo of an ID-1 card with text lines, on a plain table"""
+    photo = np.full((900, 1200, 3), table_gray, np.uint8)
+    card = np.full((540, 856, 3), card_gray, np.uint8)
+    for row in range(3):
+        cv2.putText(
+            card,
+            "KINGDOM OF SAUDI ARABIA 2147413815",
+            (30, 120 + row * 150),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.9,
+            (20, 20, 20),
+            1,
+        )
+    photo[180:720, 172:1028] = card
+    return photo
+
+
+def test_light_unclipped_card_passes():
+    scores = image_quality_scores(card_photo(238), "iqama_front")
+    assert scores["region"] == "card"
+    assert scores["brightness"] > 225
+    assert scores["bright"] == 0
+    assert quality_problem(scores) is None
+
+
+def test_card_scored_without_its_dark_table():
+    scores = image_quality_scores(card_photo(200, table_gray=5), "nicop_front")
+    assert scores["region"] == "card"
+    assert quality_problem(scores) is None
+
+
+def test_washed_out_photo_is_overexposed():
+    scores = image_quality_scores(card_photo(255, table_gray=250), "nicop_front")
+    assert scores["bright"] > 0.35
+    assert quality_problem(scores) == "overexposed"
+
+
+def test_dark_photo_is_too_dark():
+    photo = (card_photo(200).astype(np.float32) * 0.15).astype(np.uint8)
+    assert quality_problem(image_quality_scores(photo, "nicop_front")) == "too_dark"
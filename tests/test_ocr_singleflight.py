@@ -0,0 +1,65 @@
+"""
+Request coalescing: concurrent identical OCR requests share one run, its
+result and its exception.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import asyncio
+
+from app.services.ocr.singleflight import SingleFlight
+
+
+def test_single_flight_coalesces_identical_calls():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"cnic_number": "35202-1234567-1"}
+
+        results = await asyncio.gather(*[flight.run("key", work) for _ in range(5)])
+        other = await flight.run("other", work)
+        return calls, results, other, len(flight)
+
+    calls, results, other, pending = asyncio.run(scenario())
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results)
+    assert other == results[0]
+    assert pending == 0
+
+
+def test_single_flight_shares_exceptions():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("unreadable")
+
+        return await asyncio.gather(
+            flight.run("key", fail), flight.run("key", fail), return_exceptions=True
+        )
+
+    errors = asyncio.run(scenario())
+    assert all(isinstance(error, ValueError) for error in errors)
+
+
+def test_single_flight_survives_a_cancelled_caller():
+    async def scenario():
+        flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.05)
+            return "done"
+
+        leader = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flight.run("key", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
@@ -0,0 +1,150 @@
+"""
+Multi-scale OCR: the target size chosen from the measured text height, and
+uncertain boxes re-read from upscaled crops with their results mapped back
+to the page. The reader is stubbed.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import numpy as np
+import pytest
+
+from app.services.ocr import Cleaning_OCR
+from app.services.ocr.Cleaning_OCR import (
+    BEAM_PASS,
+    MAX_TARGET_SIZE,
+    MIN_TARGET_SIZE,
+    UPSCALE_MAX_SIDE,
+    _upscale_box,
+    text_target_size,
+    upscale_failed_regions,
+)
+from app.utils.config import settings
+
+
+class EchoReader:
+    """Detects the given boxes; recognize() reads every box back unchanged"""
+
+    def __init__(self, detected=()):
+        self.detected = list(detected)
+        self.crops = []
+
+    def detect(self, batch, reformat=False):
+        return [self.detected], [[]]
+
+    def recognize(self, gray, horizontal_list, free_list, **kwargs):
+        self.crops.append((gray.shape, kwargs["decoder"]))
+        boxes = [
+            [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+            for x0, x1, y0, y1 in horizontal_list
+        ]
+        return [(box, "TEXT", 0.9) for box in boxes + free_list]
+
+
+def rectangle(x0, y0, x1, y1):
+    return [[x0, y0], [x1, y0], [x1, y1], [x0, y1]]
+
+
+def test_horizontal_box_maps_back_to_the_page():
+    reader = EchoReader()
+    gray = np.zeros((300, 400), dtype=np.uint8)
+    box = rectangle(40, 50, 140, 70)
+
+    results = _upscale_box(reader, gray, box, True, BEAM_PASS, 2)
+
+    # The crop has 4 px of margin on every side, then is doubled
+    assert reader.crops == [((56, 216), "beamsearch")]
+    assert results == [(box, "TEXT", 0.9)]
+
+
+def test_free_box_maps_back_to_the_page():
+    reader = EchoReader()
+    gray = np.zeros((300, 400), dtype=np.uint8)
+    box = [[100, 60], [200, 40], [204, 62], [104, 82]]
+
+    ((points, _, _),) = _upscale_box(reader, gray, box, False, BEAM_PASS, 3)
+
+    # Scaling to int and back loses at most a pixel
+    assert np.abs(np.array(points) - np.array(box)).max() <= 1
+
+
+def test_box_at_the_edge_is_clipped_to_the_page():
+    reader = EchoReader()
+    gray = np.zeros((100, 200), dtype=np.uint8)
+
+    ((points, _, _),) = _upscale_box(
+        reader, gray, rectangle(0, 0, 60, 20), True, BEAM_PASS, 2
+    )
+
+    assert reader.crops[0][0] == (48, 128)
+    assert points == rectangle(0, 0, 60, 20)
+
+
+def test_upscale_is_capped_and_skipped_when_it_cannot_enlarge():
+    reader = EchoReader()
+    gray = np.zeros((100, 2000), dtype=np.uint8)
+
+    _upscale_box(reader, gray, rectangle(100, 10, 1092, 30), True, BEAM_PASS, 4)
+    assert max(reader.crops[0][0]) <= UPSCALE_MAX_SIDE
+
+    assert (
+        _upscale_box(reader, gray, rectangle(0, 10, 1800, 30), True, BEAM_PASS, 4) == []
+    )
+    assert len(reader.crops) == 1
+
+
+@pytest.fixture
+def multiscale(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_MULTISCALE", True)
+    monkeypatch.setattr(settings, "OCR_UPSCALE_FACTOR", 2.0)
+    monkeypatch.setattr(settings, "OCR_ADAPTIVE_MIN_CONFIDENCE", 0.6)
+
+
+def test_failed_fields_reread_uncertain_boxes_upscaled(multiscale):
+    reader = EchoReader()
+    gray = np.zeros((300, 400), dtype=np.uint8)
+    greedy = [
+        (rectangle(40, 50, 140, 70), "3520Z", 0.5),
+        (rectangle(40, 100, 140, 120), "AHMED", 0.9),
+    ]
+
+    results = upscale_failed_regions(
+        reader, gray, greedy, greedy, lambda results: False
+    )
+
+    assert reader.crops == [((56, 216), "beamsearch")]
+    assert results == greedy + [(rectangle(40, 50, 140, 70), "TEXT", 0.9)]
+
+
+def test_no_upscale_once_the_fields_are_found(multiscale):
+    reader = EchoReader()
+    gray = np.zeros((300, 400), dtype=np.uint8)
+    greedy = [(rectangle(40, 50, 140, 70), "3520Z", 0.5)]
+
+    results = upscale_failed_regions(reader, gray, greedy, greedy, lambda r: True)
+
+    assert results == greedy
+    assert reader.crops == []
+
+
+def test_target_size_brings_text_to_the_configured_height(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_TEXT_HEIGHT", 32)
+    # 12 px text on an 800 px wide thumbnail of a 1600 px image
+    reader = EchoReader([[0, 100, 0, 12], [0, 100, 40, 52], [0, 100, 80, 94]])
+    monkeypatch.setattr(Cleaning_OCR, "get_reader", lambda languages: reader)
+    image = np.zeros((1000, 1600), dtype=np.uint8)
+
+    assert text_target_size(image, ("en",), 1280) == int(1600 * 32 / 24)
+
+
+def test_target_size_is_clamped_or_defaults(monkeypatch):
+    monkeypatch.setattr(settings, "OCR_TEXT_HEIGHT", 32)
+    reader = EchoReader()
+    monkeypatch.setattr(Cleaning_OCR, "get_reader", lambda languages: reader)
+    image = np.zeros((600, 800), dtype=np.uint8)
+
+    assert text_target_size(image, ("en",), 1280) == 1280
+    reader.detected = [[0, 100, 0, 4]]
+    assert text_target_size(image, ("en",), 1280) == MAX_TARGET_SIZE
+    reader.detected = [[0, 100, 0, 200]]
+    assert text_target_size(image, ("en",), 1280) == MIN_TARGET_SIZE